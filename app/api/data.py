@@ -4,6 +4,10 @@
 
 from fastapi import APIRouter, HTTPException, Query
 from app.database import get_db
+from app.engine import data_stats
+from app.engine.admission import task_queue
+from app.engine.deletion import start_deletion, DeletionConflictError
+from app.utils.json_codec import FastJSONResponse
 
 router = APIRouter(prefix="/api/v1", tags=["数据管理"])
 
@@ -35,24 +39,59 @@ async def list_data(
         .limit(page_size)
     )
 
-    items = []
-    async for doc in cursor:
-        # 转换 ObjectId 为字符串，防止 json 序列化报错
-        if "_id" in doc:
-            doc["_id"] = str(doc["_id"])
-        items.append(doc)
+    # ObjectId / datetime 由 FastJSONResponse 直接序列化，跳过 jsonable_encoder
+    items = await cursor.to_list(length=page_size)
 
-    return {
+    return FastJSONResponse({
         "total": total,
         "page": page,
         "page_size": page_size,
         "items": items,
-    }
+    })
 
 
-@router.delete("/projects/{project_id}/data")
+@router.get("/projects/{project_id}/data/stats")
+async def get_data_stats(project_id: str):
+    """
+    采集数据统计：字段填充率与去重计数（估算）、每个任务 / 每小时入库条数
+
+    读取按任务增量维护的缓存（见 engine/data_stats.py），不扫描数据。
+    """
+    db = get_db()
+    project = await db.projects.find_one({"_id": project_id}, {"_id": 1})
+    if not project:
+        raise HTTPException(status_code=404, detail="项目不存在")
+    doc = await db.data_stats.find_one({"_id": project_id})
+    return FastJSONResponse({
+        "project_id": project_id,
+        "rebuilding": data_stats.is_rebuilding(project_id),
+        **data_stats.render(doc),
+    })
+
+
+@router.post("/projects/{project_id}/data/stats/rebuild", status_code=202)
+async def rebuild_data_stats(project_id: str):
+    """全量重建数据统计（统计上线前已有数据的项目使用，后台执行）"""
+    db = get_db()
+    project = await db.projects.find_one({"_id": project_id})
+    if not project:
+        raise HTTPException(status_code=404, detail="项目不存在")
+    if project.get("status") == "deleting" or task_queue.is_active(project_id):
+        raise HTTPException(status_code=409, detail="项目有运行中的任务或正在删除，请稍后再试")
+    if not data_stats.start_rebuild(project_id):
+        raise HTTPException(status_code=409, detail="统计正在重建中")
+    return {"message": "统计正在后台重建"}
+
+
+@router.delete("/projects/{project_id}/data", status_code=202)
 async def clear_data(project_id: str):
-    """清空采集数据"""
+    """清空采集数据（后台分批删除，进度见 GET /projects/{id}/deletion）"""
     db = get_db()
-    result = await db.data_store.delete_many({"project_id": project_id})
-    return {"message": f"已删除 {result.deleted_count} 条数据"}
+    project = await db.projects.find_one({"_id": project_id})
+    if not project:
+        raise HTTPException(status_code=404, detail="项目不存在")
+    try:
+        job = await start_deletion(project, "data")
+    except DeletionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"message": "数据正在后台删除", "job_id": job["_id"]}
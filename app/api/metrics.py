@@ -0,0 +1,18 @@
+"""
+引擎指标 API（Prometheus 抓取端点）
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.utils.metrics import REGISTRY
+
+router = APIRouter(tags=["监控"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """导出 Prometheus 文本格式的引擎指标"""
+    return PlainTextResponse(
+        REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
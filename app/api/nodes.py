@@ -6,7 +6,9 @@ import uuid
 from datetime import datetime, timezone
 from fastapi import APIRouter, HTTPException
 from app.database import get_db
-from app.models.node import NodeCreate, NodeUpdate
+from app.engine import preview
+from app.engine.graph import bump_graph_version, load_graph
+from app.models.node import NodeCreate, NodeUpdate, NodePreviewRequest
 
 router = APIRouter(prefix="/api/v1", tags=["节点管理"])
 
@@ -34,6 +36,7 @@ async def create_node(project_id: str, node: NodeCreate):
     }
 
     await db.nodes.insert_one(doc)
+    await bump_graph_version(project_id)
     return doc
 
 
@@ -80,6 +83,7 @@ async def update_node(node_id: str, node: NodeUpdate):
 
     if update_data:
         await db.nodes.update_one({"_id": node_id}, {"$set": update_data})
+        await bump_graph_version(existing["project_id"])
 
     return await db.nodes.find_one({"_id": node_id})
 
@@ -99,6 +103,7 @@ async def delete_node(node_id: str):
     )
 
     await db.nodes.delete_one({"_id": node_id})
+    await bump_graph_version(node["project_id"])
     return {"message": "节点已删除", "node_id": node_id}
 
 
@@ -119,5 +124,47 @@ async def set_callback(node_id: str, target_node_id: str = None):
         {"_id": node_id},
         {"$set": {"callback_node_id": target_node_id}},
     )
+    await bump_graph_version(node["project_id"])
 
     return {"message": "回调已设置", "node_id": node_id, "callback_node_id": target_node_id}
+
+
+@router.post("/nodes/{node_id}/preview")
+async def preview_node(node_id: str, req: NodePreviewRequest = None):
+    """
+    在样例页面上试运行节点的解析规则（不创建任务、不入库）
+
+    样例页面按 URL + 请求头缓存，调整选择器后重复预览不会再次请求目标站点。
+    """
+    req = req or NodePreviewRequest()
+    node = await get_node(node_id)
+    graph = await load_graph(node["project_id"])
+
+    try:
+        sample = preview.sample_request(node, graph.start_node, req.url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        page, cached = await preview.load_sample(sample, refresh=req.refresh)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"样例页面请求失败: {e}")
+
+    parse_rules = (
+        req.parse_rules.model_dump() if req.parse_rules is not None
+        else node.get("parse_rules")
+    )
+    pagination = (
+        req.pagination.model_dump() if req.pagination is not None
+        else node.get("pagination")
+    )
+    result = preview.preview_rules(
+        page, node["node_type"], parse_rules, pagination, limit=req.limit
+    )
+    return {"node_id": node_id, "node_type": node["node_type"],
+            "page": page.describe(cached), **result}
+
+
+@router.delete("/preview-cache")
+async def clear_preview_cache():
+    """清空规则预览的样例页面缓存"""
+    return {"message": "预览缓存已清空", "cleared": preview.page_cache.clear()}
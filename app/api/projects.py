@@ -7,6 +7,7 @@ from datetime import datetime, timezone
 from typing import Optional
 from fastapi import APIRouter, HTTPException, Query
 from app.database import get_db
+from app.engine.deletion import start_deletion, DeletionConflictError
 from app.models.project import ProjectCreate, ProjectUpdate
 
 router = APIRouter(prefix="/api/v1/projects", tags=["项目管理"])
@@ -22,6 +23,11 @@ async def create_project(project: ProjectCreate):
         "name": project.name,
         "description": project.description or "",
         "status": "idle",
+        "graph_version": 0,
+        "concurrency": project.concurrency.model_dump() if project.concurrency else None,
+        "scheduling": project.scheduling.model_dump() if project.scheduling else None,
+        "schedule": project.schedule.model_dump() if project.schedule else None,
+        "budget": project.budget.model_dump() if project.budget else None,
         "created_at": now,
         "updated_at": now,
     }
@@ -81,24 +87,43 @@ async def update_project(project_id: str, project: ProjectUpdate):
         update_data["name"] = project.name
     if project.description is not None:
         update_data["description"] = project.description
+    if project.concurrency is not None:
+        update_data["concurrency"] = project.concurrency.model_dump()
+    if project.scheduling is not None:
+        update_data["scheduling"] = project.scheduling.model_dump()
+    if project.schedule is not None:
+        update_data["schedule"] = project.schedule.model_dump()
+        # 配置变更后由调度器按新配置重新计算下一次运行时间
+        update_data["schedule_state.next_run_at"] = None
+    if project.budget is not None:
+        update_data["budget"] = project.budget.model_dump()
     update_data["updated_at"] = datetime.now(timezone.utc)
 
     await db.projects.update_one({"_id": project_id}, {"$set": update_data})
     return await db.projects.find_one({"_id": project_id})
 
 
-@router.delete("/{project_id}")
+@router.delete("/{project_id}", status_code=202)
 async def delete_project(project_id: str):
-    """删除项目（级联删除节点、任务和数据）"""
+    """删除项目（后台分批级联删除节点、任务和数据，进度见 GET /projects/{id}/deletion）"""
     db = get_db()
     existing = await db.projects.find_one({"_id": project_id})
     if not existing:
         raise HTTPException(status_code=404, detail="项目不存在")
 
-    # 级联删除
-    await db.nodes.delete_many({"project_id": project_id})
-    await db.tasks.delete_many({"project_id": project_id})
-    await db.data_store.delete_many({"project_id": project_id})
-    await db.projects.delete_one({"_id": project_id})
+    try:
+        job = await start_deletion(existing, "project")
+    except DeletionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"message": "项目正在后台删除", "project_id": project_id, "job_id": job["_id"]}
 
-    return {"message": "项目已删除", "project_id": project_id}
+
+@router.get("/{project_id}/deletion")
+async def get_deletion(project_id: str):
+    """查询项目最近一次删除作业的进度（项目删除完成后仍可查询）"""
+    db = get_db()
+    cursor = db.deletion_jobs.find({"project_id": project_id}).sort("created_at", -1).limit(1)
+    jobs = await cursor.to_list(length=1)
+    if not jobs:
+        raise HTTPException(status_code=404, detail="没有删除作业")
+    return jobs[0]
@@ -0,0 +1,51 @@
+"""
+种子文件管理 API
+"""
+
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from app.database import get_db
+from app.engine import seeds
+
+router = APIRouter(prefix="/api/v1", tags=["种子管理"])
+
+
+@router.post("/projects/{project_id}/seeds")
+async def upload_seeds(
+    project_id: str,
+    request: Request,
+    name: str = Query("", description="种子集名称"),
+    format: Literal["lines", "csv"] = Query("lines", description="文件格式：逐行 URL / CSV"),
+    column: Optional[str] = Query(None, description="CSV 中 URL 所在列名（首行为表头），为空取第一列"),
+):
+    """
+    上传种子文件（请求体为文件原始内容）
+
+    请求体按流读取、逐行解析并分块入库，不会整体读入内存。
+    返回的 _id 用作起始页 seed_source.seed_set_id。
+    """
+    db = get_db()
+    project = await db.projects.find_one({"_id": project_id})
+    if not project:
+        raise HTTPException(status_code=404, detail="项目不存在")
+
+    try:
+        return await seeds.store_upload(project_id, request.stream(), name, format, column)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/projects/{project_id}/seeds")
+async def list_seed_sets(project_id: str):
+    """获取项目的种子集列表"""
+    db = get_db()
+    cursor = db.seed_sets.find({"project_id": project_id}).sort("created_at", -1)
+    return [doc async for doc in cursor]
+
+
+@router.delete("/seeds/{seed_set_id}")
+async def delete_seed_set(seed_set_id: str):
+    """删除种子集"""
+    if not await seeds.delete_seed_set(seed_set_id):
+        raise HTTPException(status_code=404, detail="种子集不存在")
+    return {"message": "种子集已删除", "seed_set_id": seed_set_id}
@@ -2,12 +2,24 @@
 任务运行 API
 """
 
+import asyncio
 import logging
+import time
 import uuid
 from datetime import datetime, timezone
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from typing import Literal, Optional
+from fastapi import APIRouter, Body, HTTPException, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from app.config import STOP_GRACE_SECONDS, EVENTS_FALLBACK_POLL_SECONDS, EVENTS_KEEPALIVE_SECONDS
 from app.database import get_db
+from app.engine import data_stats
+from app.engine.admission import task_queue, FetchShare
+from app.engine.events import FINAL_STATUSES
 from app.engine.flow_manager import FlowManager
+from app.models.project import BudgetConfig
+from app.utils.profiler import TaskProfiler, ProfilerBusyError
+from app.utils import json_codec
+from app.utils.json_codec import FastJSONResponse
 
 logger = logging.getLogger(__name__)
 
@@ -20,9 +32,35 @@ router = APIRouter(prefix="/api/v1", tags=["任务管理"])
 _running_managers: dict[str, FlowManager] = {}
 
 
+class WorkflowInvalidError(Exception):
+    """工作流校验失败，无法提交任务"""
+
+    def __init__(self, errors: list[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+class ProjectDeletingError(Exception):
+    """项目正在删除，拒绝新的运行"""
+
+    def __init__(self):
+        super().__init__("项目正在删除，不能运行")
+
+
+class StatsRebuildingError(Exception):
+    """项目正在重建数据统计，拒绝新的运行（重建扫描与任务增量合并会重复或丢失计数）"""
+
+    def __init__(self):
+        super().__init__("项目正在重建数据统计，请稍后再运行")
+
+
 @router.post("/projects/{project_id}/run")
-async def run_project(project_id: str, background_tasks: BackgroundTasks):
-    """启动爬虫任务"""
+async def run_project(
+    project_id: str,
+    priority: Optional[int] = Query(None, description="任务优先级，默认使用项目配置"),
+    budget: Optional[BudgetConfig] = Body(None, description="本次运行的预算，覆盖项目配置中的对应项"),
+):
+    """提交爬虫任务（进入队列，满足全局 / 项目并发上限时启动）"""
     db = get_db()
 
     # 验证项目存在
@@ -30,18 +68,67 @@ async def run_project(project_id: str, background_tasks: BackgroundTasks):
     if not project:
         raise HTTPException(status_code=404, detail="项目不存在")
 
+    try:
+        return await submit_run(
+            project,
+            priority=priority,
+            budget=budget.model_dump(exclude_none=True) if budget else None,
+        )
+    except WorkflowInvalidError as e:
+        raise HTTPException(status_code=400, detail={"errors": e.errors})
+    except (ProjectDeletingError, StatsRebuildingError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+async def submit_run(
+    project: dict,
+    priority: int = None,
+    trigger: str = "manual",
+    resume_from: str = None,
+    budget: dict = None,
+) -> dict:
+    """
+    为项目创建任务记录并提交到任务队列（手动运行、定时调度和恢复共用）
+
+    Args:
+        project: 项目文档
+        priority: 任务优先级，None 使用项目 scheduling.priority
+        trigger: 触发方式，manual / schedule / resume
+        resume_from: 恢复来源任务 ID（从其保存的 frontier 继续）
+        budget: 本次运行的预算覆盖项（与项目 budget 配置合并）
+
+    Raises:
+        WorkflowInvalidError: 工作流校验失败
+        ProjectDeletingError: 项目正在删除
+        StatsRebuildingError: 项目正在重建数据统计
+    """
+    db = get_db()
+    project_id = project["_id"]
+    if project.get("status") == "deleting":
+        raise ProjectDeletingError()
+    if data_stats.is_rebuilding(project_id):
+        raise StatsRebuildingError()
+
     # 验证工作流合法性
     task_id = str(uuid.uuid4())
-    manager = FlowManager(project_id, task_id)
+    manager = FlowManager(project_id, task_id, resume_from=resume_from, budget=budget)
     errors = await manager.validate()
     if errors:
-        raise HTTPException(status_code=400, detail={"errors": errors})
+        raise WorkflowInvalidError(errors)
 
-    # 创建任务记录
+    scheduling = project.get("scheduling") or {}
+    if priority is None:
+        priority = scheduling.get("priority") or 0
+
+    # 创建任务记录（出队后由 FlowManager 置为 running）
     task_doc = {
         "_id": task_id,
         "project_id": project_id,
         "status": "pending",
+        "priority": priority,
+        "trigger": trigger,
+        "resumed_from": resume_from,
+        "budget": budget,
         "started_at": None,
         "finished_at": None,
         "stats": {
@@ -54,30 +141,74 @@ async def run_project(project_id: str, background_tasks: BackgroundTasks):
     }
     await db.tasks.insert_one(task_doc)
 
-    # 更新项目状态
-    await db.projects.update_one(
-        {"_id": project_id}, {"$set": {"status": "running"}}
+    # 更新项目状态：以 CAS 方式避开正在开始的删除作业（见 engine/deletion.py），
+    # 此后到加入任务队列之间不能再有 await
+    claim = await db.projects.update_one(
+        {"_id": project_id, "status": {"$ne": "deleting"}}, {"$set": {"status": "running"}}
     )
+    if claim.matched_count != 1:
+        await db.tasks.delete_one({"_id": task_id})
+        raise ProjectDeletingError()
+    if data_stats.is_rebuilding(project_id):
+        # 提交过程中开始了重建（重建只在项目没有活动任务时开始，与此处之间没有 await）
+        await db.tasks.delete_one({"_id": task_id})
+        await _mark_project_idle(project_id, task_id)
+        raise StatsRebuildingError()
 
-    # 后台执行爬虫
+    # 加入任务队列
     _running_managers[task_id] = manager
-    logger.info("任务 %s 已加入后台执行队列 (项目: %s)", task_id, project_id)
 
-    async def run_and_cleanup():
+    async def run_and_cleanup(share: FetchShare):
         try:
+            manager.fetch_share = share
             await manager.execute()
-        except Exception as e:
-            logger.error("任务 %s 执行异常: %s", task_id, e, exc_info=True)
+            # 任务结束后增量更新数据统计（仍占用任务槽位，项目在此期间不能被删除）
+            try:
+                await data_stats.apply_task(project_id, task_id)
+            except Exception as e:
+                logger.error("任务 %s 数据统计更新失败: %s", task_id, e, exc_info=True)
         finally:
             _running_managers.pop(task_id, None)
-            await db.projects.update_one(
-                {"_id": project_id}, {"$set": {"status": "idle"}}
-            )
-            logger.info("任务 %s 已结束，项目状态已恢复为 idle", task_id)
+            await _mark_project_idle(project_id, task_id)
+            logger.info("任务 %s 已结束", task_id)
+
+    position = task_queue.submit(
+        task_id,
+        project_id,
+        run_and_cleanup,
+        priority=priority,
+        weight=scheduling.get("weight") or 1.0,
+        max_per_project=scheduling.get("max_running_tasks"),
+    )
+    if position is None:
+        return {"task_id": task_id, "status": "running", "message": "任务已启动"}
+    logger.info("任务 %s 已加入等待队列，位置 %d (项目: %s)", task_id, position, project_id)
+    return {
+        "task_id": task_id,
+        "status": "pending",
+        "queue_position": position,
+        "message": "任务已排队",
+    }
+
 
-    background_tasks.add_task(run_and_cleanup)
+async def submit_scheduled_run(project: dict) -> str:
+    """定时调度器的提交回调"""
+    result = await submit_run(project, trigger="schedule")
+    return result["task_id"]
 
-    return {"task_id": task_id, "message": "任务已启动"}
+
+async def _mark_project_idle(project_id: str, task_id: str):
+    """项目没有其他等待中或运行中的任务时，恢复为 idle"""
+    if task_queue.is_active(project_id, exclude=task_id):
+        return
+    db = get_db()
+    await db.projects.update_one({"_id": project_id}, {"$set": {"status": "idle"}})
+
+
+@router.get("/queue")
+async def get_queue():
+    """查看任务队列：运行中任务的请求槽位占用和等待中的任务"""
+    return task_queue.snapshot()
 
 
 @router.get("/tasks/{task_id}/status")
@@ -87,22 +218,118 @@ async def get_task_status(task_id: str):
     task = await db.tasks.find_one({"_id": task_id})
     if not task:
         raise HTTPException(status_code=404, detail="任务不存在")
-    return task
+
+    # 运行中的任务：用内存中的实时追踪摘要和并发状态覆盖（落库有间隔）
+    position = task_queue.position(task_id)
+    if position is not None:
+        task["queue_position"] = position
+
+    manager = _running_managers.get(task_id)
+    if manager and task.get("status") == "running":
+        stats = task.setdefault("stats", {})
+        stats["concurrency"] = manager.concurrency.snapshot()
+        if manager.frontier is not None:
+            stats["frontier"] = manager.frontier.snapshot()
+        stats["budget"] = manager.budget.snapshot()
+        if manager.tracer.enabled:
+            task["trace_summary"] = manager.tracer.summary()
+    return FastJSONResponse(task)
+
+
+@router.get("/tasks/{task_id}/events")
+async def task_events(task_id: str):
+    """
+    以 Server-Sent Events 推送任务进度
+
+    首个事件 snapshot 为任务文档（同 /status），之后推送 status / stats / error 事件，
+    任务结束时推送 end 并关闭连接。运行在本进程的任务直接订阅内存中的状态，
+    推送经过节流合并（每个连接最多约 1 / EVENTS_INTERVAL 次每秒）；
+    其他情况（多 worker 部署）退化为按 EVENTS_FALLBACK_POLL_SECONDS 查询数据库。
+    """
+    db = get_db()
+    task = await db.tasks.find_one({"_id": task_id})
+    if not task:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return StreamingResponse(
+        _task_event_stream(task),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event: str, data: dict) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + json_codec.dumps_bytes(data) + b"\n\n"
+
+
+async def _task_event_stream(task: dict):
+    task_id = task["_id"]
+    position = task_queue.position(task_id)
+    if position is not None:
+        task["queue_position"] = position
+    yield _sse("snapshot", task)
+
+    manager = _running_managers.get(task_id)
+    if manager is not None:
+        async for event, data in manager.events.subscribe():
+            yield b": keepalive\n\n" if event == "keepalive" else _sse(event, data)
+        return
+
+    # 任务不在本进程运行：按间隔查询数据库，只推送变化
+    db = get_db()
+    status, stats = task.get("status"), task.get("stats") or {}
+    sent_at = time.monotonic()
+    while status not in FINAL_STATUSES:
+        await asyncio.sleep(EVENTS_FALLBACK_POLL_SECONDS)
+        doc = await db.tasks.find_one({"_id": task_id}, {"status": 1, "stats": 1, "error_message": 1})
+        if doc is None:
+            break
+        if doc.get("status") != status:
+            status = doc.get("status")
+            yield _sse("status", {"status": status})
+            sent_at = time.monotonic()
+        new_stats = doc.get("stats") or {}
+        changed = {k: v for k, v in new_stats.items() if stats.get(k) != v}
+        if changed:
+            stats = new_stats
+            yield _sse("stats", {"stats": changed})
+            sent_at = time.monotonic()
+        if time.monotonic() - sent_at >= EVENTS_KEEPALIVE_SECONDS:
+            yield b": keepalive\n\n"
+            sent_at = time.monotonic()
+    yield _sse("end", {"status": status})
 
 
 @router.post("/tasks/{task_id}/stop")
-async def stop_task(task_id: str):
-    """停止任务"""
+async def stop_task(
+    task_id: str,
+    grace: float = Query(
+        STOP_GRACE_SECONDS, ge=0, le=60, description="进行中工作项的宽限时间（秒），超时后取消"
+    ),
+):
+    """
+    停止任务
+
+    运行中的任务先置为 stopping，等待排空完成（进行中的工作项执行完或被取消、
+    未执行的工作项已保存、最终统计已写入）后返回，任务由 FlowManager 置为 stopped。
+    """
     db = get_db()
     task = await db.tasks.find_one({"_id": task_id})
     if not task:
         raise HTTPException(status_code=404, detail="任务不存在")
 
     manager = _running_managers.get(task_id)
-    if manager:
-        manager.stop()
+    if task_queue.cancel(task_id):
+        # 尚未启动：直接移出队列
+        if manager:
+            manager.events.close("stopped")
         _running_managers.pop(task_id, None)
+        await _mark_project_idle(task["project_id"], task_id)
+        logger.info("任务 %s 已移出等待队列", task_id)
+    elif manager:
         logger.info("任务 %s 已接收停止指令", task_id)
+        await db.tasks.update_one({"_id": task_id}, {"$set": {"status": "stopping"}})
+        drain = await manager.shutdown(grace)
+        return {"message": "任务已停止", "task_id": task_id, "drain": drain}
     else:
         logger.warning("任务 %s 不在当前进程的运行列表中（可能已结束或在其他 worker）", task_id)
 
@@ -117,6 +344,64 @@ async def stop_task(task_id: str):
     return {"message": "任务已停止", "task_id": task_id}
 
 
+@router.post("/tasks/{task_id}/resume")
+async def resume_task(
+    task_id: str,
+    budget: Optional[BudgetConfig] = Body(None, description="恢复任务的预算，覆盖项目配置中的对应项"),
+):
+    """从被停止任务保存的 frontier 继续执行（创建新任务，预算重新计量）"""
+    db = get_db()
+    task = await db.tasks.find_one({"_id": task_id})
+    if not task:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    if task.get("status") != "stopped" or not task.get("drain"):
+        raise HTTPException(status_code=400, detail="只能恢复已排空停止的任务")
+    if not await db.task_frontier.find_one({"task_id": task_id}, {"_id": 1}):
+        raise HTTPException(status_code=400, detail="任务没有待恢复的工作项")
+
+    project = await db.projects.find_one({"_id": task["project_id"]})
+    if not project:
+        raise HTTPException(status_code=404, detail="项目不存在")
+    try:
+        return await submit_run(
+            project,
+            trigger="resume",
+            resume_from=task_id,
+            budget=budget.model_dump(exclude_none=True) if budget else None,
+        )
+    except WorkflowInvalidError as e:
+        raise HTTPException(status_code=400, detail={"errors": e.errors})
+    except (ProjectDeletingError, StatsRebuildingError) as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.post("/tasks/{task_id}/profile")
+async def profile_task(
+    task_id: str,
+    seconds: float = Query(30, gt=0, le=300, description="采样时长（秒）"),
+    interval_ms: float = Query(10, ge=1, le=1000, description="采样间隔（毫秒）"),
+    alloc: bool = Query(False, description="是否采集 tracemalloc 分配热点（进程级开销，会拖慢同进程的其他任务）"),
+    format: Literal["json", "folded"] = Query("json", description="folded 时直接返回折叠栈文本"),
+):
+    """对运行中的任务采样 CPU 调用栈（及内存分配热点）"""
+    manager = _running_managers.get(task_id)
+    if not manager:
+        raise HTTPException(status_code=404, detail="任务未在当前进程中运行")
+
+    profiler = TaskProfiler(manager, interval=interval_ms / 1000, trace_alloc=alloc)
+    try:
+        result = await profiler.run(seconds)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    logger.info(
+        "任务 %s 采样完成: %d/%d 个样本", task_id, result["task_samples"], result["samples"]
+    )
+    if format == "folded":
+        return PlainTextResponse(result["folded"])
+    return {"task_id": task_id, **result}
+
+
 @router.get("/projects/{project_id}/tasks")
 async def list_tasks(project_id: str):
     """获取项目的所有任务"""
@@ -125,4 +410,4 @@ async def list_tasks(project_id: str):
     cursor = db.tasks.find({"project_id": project_id}).sort("started_at", -1).limit(20)
     async for doc in cursor:
         tasks.append(doc)
-    return tasks
+    return FastJSONResponse(tasks)
@@ -8,10 +8,21 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# 存储后端：mongo（MongoDB）/ sqlite（嵌入式，单机部署与 CI）
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "rulecrawl.db")
+
 # MongoDB 配置
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/admin")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "rulecrawl")
 
+# 采集记录批量写入：每批条数与最长缓冲时间（秒）
+RECORD_BATCH_SIZE = int(os.getenv("RECORD_BATCH_SIZE", "200"))
+RECORD_FLUSH_SECONDS = float(os.getenv("RECORD_FLUSH_SECONDS", "1"))
+# 后台删除（清空数据 / 删除项目）：每批删除条数与批次间暂停（秒）
+DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", "1000"))
+DELETE_BATCH_PAUSE_SECONDS = float(os.getenv("DELETE_BATCH_PAUSE_SECONDS", "0.05"))
+
 # 服务器配置
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", "8000"))
@@ -23,5 +34,67 @@ DEFAULT_USER_AGENT = (
     "Chrome/120.0.0.0 Safari/537.36"
 )
 REQUEST_TIMEOUT = 30  # 秒
-MAX_CONCURRENT_REQUESTS = 10  # 最大并发请求数
+MAX_CONCURRENT_REQUESTS = 10  # 每主机初始并发请求数
+# 按主机自适应并发（项目 concurrency 配置可覆盖）
+ADAPTIVE_CONCURRENCY = os.getenv("ADAPTIVE_CONCURRENCY", "true").lower() in ("1", "true", "yes")
+CONCURRENCY_FLOOR = int(os.getenv("CONCURRENCY_FLOOR", "1"))  # 每主机并发下限
+CONCURRENCY_CEILING = int(os.getenv("CONCURRENCY_CEILING", "32"))  # 每主机并发上限
+# 任务准入：同时运行的任务数（全局 / 每项目）与运行中任务按权重分享的请求槽位数
+MAX_RUNNING_TASKS = int(os.getenv("MAX_RUNNING_TASKS", "4"))
+MAX_RUNNING_TASKS_PER_PROJECT = int(os.getenv("MAX_RUNNING_TASKS_PER_PROJECT", "1"))
+GLOBAL_FETCH_SLOTS = int(os.getenv("GLOBAL_FETCH_SLOTS", "100"))
 DEFAULT_MAX_PAGES = 100  # 默认最大翻页数
+# 停止任务时进行中工作项的宽限时间（秒），超时后取消（中断进行中的请求）
+STOP_GRACE_SECONDS = float(os.getenv("STOP_GRACE_SECONDS", "5"))
+# 任务预算默认值（项目 budget 配置和单次运行可覆盖），0 为不限制
+BUDGET_MAX_REQUESTS = int(os.getenv("BUDGET_MAX_REQUESTS", "0"))
+BUDGET_MAX_ITEMS = int(os.getenv("BUDGET_MAX_ITEMS", "0"))
+BUDGET_MAX_BYTES = int(os.getenv("BUDGET_MAX_BYTES", "0"))
+BUDGET_MAX_DURATION_SECONDS = float(os.getenv("BUDGET_MAX_DURATION_SECONDS", "0"))
+BUDGET_MAX_DEPTH = int(os.getenv("BUDGET_MAX_DEPTH", "0"))
+
+# 爬取顺序：dfs / bfs / terminal_first（项目 scheduling 可覆盖）
+CRAWL_ORDER = os.getenv("CRAWL_ORDER", "dfs")
+MAX_FRONTIER_SIZE = int(os.getenv("MAX_FRONTIER_SIZE", "10000"))  # 待处理工作项软上限，0 为不限制
+
+# 定时调度
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+SCHEDULER_POLL_SECONDS = float(os.getenv("SCHEDULER_POLL_SECONDS", "30"))  # 秒
+
+# 响应体限制（节点 request_config 中可单独覆盖）
+MAX_RESPONSE_BYTES = int(os.getenv("MAX_RESPONSE_BYTES", str(20 * 1024 * 1024)))  # 0 为不限制
+# Content-Type 白名单：以 "/" 结尾为前缀匹配，以 "+" 开头为后缀匹配，其余为精确匹配
+ALLOWED_CONTENT_TYPES = [
+    t.strip() for t in os.getenv(
+        "ALLOWED_CONTENT_TYPES",
+        "text/,application/json,application/javascript,application/x-javascript,application/xml,"
+        "application/xhtml+xml,+json,+xml",
+    ).split(",") if t.strip()
+]
+# 请求合并：相同的进行中请求只发送一次；成功的 GET 响应可在进程内短暂缓存
+FETCH_COALESCE = os.getenv("FETCH_COALESCE", "true").lower() in ("1", "true", "yes")
+FETCH_MEMO_TTL = float(os.getenv("FETCH_MEMO_TTL", "0"))  # 秒，0 为不缓存
+FETCH_MEMO_MAX_ENTRIES = int(os.getenv("FETCH_MEMO_MAX_ENTRIES", "256"))
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))  # 流式列表解析每批条目数
+
+# 规则预览：样例页面缓存（按 URL + 请求头），调试选择器时不重复请求目标站点
+PREVIEW_CACHE_TTL = float(os.getenv("PREVIEW_CACHE_TTL", "600"))  # 秒
+PREVIEW_CACHE_MAX_ENTRIES = int(os.getenv("PREVIEW_CACHE_MAX_ENTRIES", "32"))
+
+# JSON 后端：auto（优先 orjson）/ orjson / stdlib
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto").lower()
+
+# 可观测性配置
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))  # 节点追踪采样率 0~1，0 为关闭
+# 日志：级别、格式（text / json）、队列容量（满时丢弃）、同一消息模板每秒条数上限（0 为不限速）
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_RATE_LIMIT = float(os.getenv("LOG_RATE_LIMIT", "20"))
+# 逐 URL 事件（请求、入库、透传数据）的 trace 日志采样率 0~1，0 为关闭
+TRACE_LOG_SAMPLE_RATE = float(os.getenv("TRACE_LOG_SAMPLE_RATE", "0"))
+# 任务事件推送（SSE）：每个连接两次推送的最短间隔与空闲保活间隔（秒）
+EVENTS_INTERVAL = float(os.getenv("EVENTS_INTERVAL", "0.25"))
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+# 任务不在本进程运行时（多 worker 部署）SSE 改为查询数据库的间隔（秒）
+EVENTS_FALLBACK_POLL_SECONDS = float(os.getenv("EVENTS_FALLBACK_POLL_SECONDS", "2"))
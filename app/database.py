@@ -1,13 +1,13 @@
 """
 RuleCrawl 数据库连接管理
-使用 Motor 异步驱动连接 MongoDB
+默认使用 Motor 异步驱动连接 MongoDB；STORAGE_BACKEND=sqlite 时使用嵌入式 SQLite（见 app/storage）
 """
 
 import logging
 from motor.motor_asyncio import AsyncIOMotorClient
 
 logger = logging.getLogger(__name__)
-from app.config import MONGODB_URI, DATABASE_NAME
+from app.config import MONGODB_URI, DATABASE_NAME, STORAGE_BACKEND, SQLITE_PATH
 
 # 全局客户端实例
 client: AsyncIOMotorClient = None
@@ -15,18 +15,36 @@ db = None
 
 
 async def connect_db():
-    """连接 MongoDB 数据库"""
+    """连接数据库（MongoDB 或 SQLite）并创建索引"""
     global client, db
-    client = AsyncIOMotorClient(MONGODB_URI)
-    db = client[DATABASE_NAME]
+    if STORAGE_BACKEND == "sqlite":
+        from app.storage.sqlite import SQLiteDatabase
+        db = SQLiteDatabase(SQLITE_PATH)
+    elif STORAGE_BACKEND == "mongo":
+        client = AsyncIOMotorClient(MONGODB_URI)
+        db = client[DATABASE_NAME]
+    else:
+        raise ValueError(f"未知的存储后端: {STORAGE_BACKEND}")
 
     # 创建索引
-    await db.nodes.create_index("project_id")
-    await db.tasks.create_index("project_id")
-    await db.data_store.create_index("project_id")
-    await db.data_store.create_index("task_id")
+    await create_indexes(db)
 
-    logger.info("已连接 MongoDB: %s / %s", MONGODB_URI, DATABASE_NAME)
+    if client is not None:
+        logger.info("已连接 MongoDB: %s / %s", MONGODB_URI, DATABASE_NAME)
+    else:
+        logger.info("已打开 SQLite 数据库: %s", SQLITE_PATH)
+
+
+async def create_indexes(database):
+    """创建各集合的索引（SQLite 后端据此决定哪些查询条件下推到 SQL）"""
+    await database.nodes.create_index("project_id")
+    await database.tasks.create_index("project_id")
+    await database.data_store.create_index("project_id")
+    await database.data_store.create_index("task_id")
+    await database.seed_sets.create_index("project_id")
+    await database.seed_chunks.create_index([("seed_set_id", 1), ("seq", 1)])
+    await database.task_frontier.create_index([("task_id", 1), ("seq", 1)])
+    await database.deletion_jobs.create_index("project_id")
 
 
 async def close_db():
@@ -35,6 +53,9 @@ async def close_db():
     if client:
         client.close()
         logger.info("MongoDB 连接已关闭")
+    elif db is not None and STORAGE_BACKEND == "sqlite":
+        db.close()
+        logger.info("SQLite 数据库已关闭")
 
 
 def get_db():
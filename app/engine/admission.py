@@ -0,0 +1,253 @@
+"""
+任务准入控制与公平调度
+
+- TaskQueue: 任务先进入 pending 队列，按优先级（高者先）+ 提交顺序出队，
+  同时受全局运行上限和每项目运行上限约束；被项目上限挡住的任务不阻塞其他项目。
+- FetchSlotPool: 进程级请求槽位池，运行中的任务按权重公平分享。
+  有空闲槽位时任何任务都可直接使用；发生争用时，槽位优先分给
+  "占用数 / 权重" 最小的任务，重任务无法饿死轻任务。
+"""
+
+import asyncio
+import bisect
+import itertools
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from app.config import MAX_RUNNING_TASKS, MAX_RUNNING_TASKS_PER_PROJECT, GLOBAL_FETCH_SLOTS
+
+logger = logging.getLogger(__name__)
+
+
+class FetchShare:
+    """单个任务在请求槽位池中的份额"""
+
+    def __init__(self, pool: "FetchSlotPool", name: str, weight: float):
+        self.pool = pool
+        self.name = name
+        self.weight = weight
+        self.in_use = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self):
+        await self.pool._acquire(self)
+
+    def release(self):
+        self.pool._release(self)
+
+    def snapshot(self) -> dict:
+        return {"weight": self.weight, "in_use": self.in_use, "waiting": len(self._waiters)}
+
+
+class FetchSlotPool:
+    """按权重公平分配的全局请求槽位"""
+
+    def __init__(self, total: int = GLOBAL_FETCH_SLOTS):
+        self.total = max(1, total)
+        self.in_use = 0
+        self._waiting = 0
+        self._shares: list[FetchShare] = []
+
+    def share(self, name: str, weight: float = 1.0) -> FetchShare:
+        share = FetchShare(self, name, max(weight, 0.01))
+        self._shares.append(share)
+        return share
+
+    def remove(self, share: FetchShare):
+        """移除份额（任务结束时）；仍在排队的请求随之取消"""
+        if share in self._shares:
+            self._shares.remove(share)
+        while share._waiters:
+            self._waiting -= 1
+            share._waiters.popleft().cancel()
+        self._dispatch()
+
+    async def _acquire(self, share: FetchShare):
+        if self.in_use < self.total and not self._waiting:
+            self._grant(share)
+            return
+        future = asyncio.get_running_loop().create_future()
+        share._waiters.append(future)
+        self._waiting += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(share)
+            elif future in share._waiters:
+                # 已被 _dispatch() / remove() 弹出的 future 不再计入等待数
+                share._waiters.remove(future)
+                self._waiting -= 1
+            raise
+
+    def _release(self, share: FetchShare):
+        self.in_use -= 1
+        share.in_use -= 1
+        self._dispatch()
+
+    def _grant(self, share: FetchShare):
+        self.in_use += 1
+        share.in_use += 1
+
+    def _dispatch(self):
+        while self._waiting and self.in_use < self.total:
+            candidates = [s for s in self._shares if s._waiters]
+            if not candidates:
+                return
+            share = min(candidates, key=lambda s: s.in_use / s.weight)
+            future = share._waiters.popleft()
+            self._waiting -= 1
+            if not future.done():
+                self._grant(share)
+                future.set_result(None)
+
+
+@dataclass
+class _QueuedTask:
+    sort_key: tuple
+    task_id: str = field(compare=False)
+    project_id: str = field(compare=False)
+    run: Callable[[FetchShare], Awaitable] = field(compare=False)
+    priority: int = field(compare=False)
+    weight: float = field(compare=False)
+    max_per_project: int = field(compare=False)
+
+    def __lt__(self, other: "_QueuedTask") -> bool:
+        return self.sort_key < other.sort_key
+
+
+class TaskQueue:
+    """
+    爬虫任务队列
+
+    Args:
+        max_running: 全局同时运行的任务数
+        max_per_project: 每个项目同时运行的任务数（提交时可按项目覆盖）
+        pool: 运行中任务共享的请求槽位池
+    """
+
+    def __init__(
+        self,
+        max_running: int = MAX_RUNNING_TASKS,
+        max_per_project: int = MAX_RUNNING_TASKS_PER_PROJECT,
+        pool: FetchSlotPool = None,
+    ):
+        self.max_running = max(1, max_running)
+        self.max_per_project = max(1, max_per_project)
+        self.pool = pool or FetchSlotPool()
+        self._pending: list[_QueuedTask] = []
+        self._running: dict[str, tuple[_QueuedTask, FetchShare, asyncio.Task]] = {}
+        self._seq = itertools.count()
+
+    def submit(
+        self,
+        task_id: str,
+        project_id: str,
+        run: Callable[[FetchShare], Awaitable],
+        priority: int = 0,
+        weight: float = 1.0,
+        max_per_project: Optional[int] = None,
+    ) -> Optional[int]:
+        """
+        提交任务，条件允许时立即启动
+
+        Args:
+            run: 任务协程工厂，参数为该任务的请求槽位份额
+
+        Returns:
+            排队位置（从 1 开始），已启动时返回 None
+        """
+        entry = _QueuedTask(
+            sort_key=(-priority, next(self._seq)),
+            task_id=task_id,
+            project_id=project_id,
+            run=run,
+            priority=priority,
+            weight=weight,
+            max_per_project=max(1, max_per_project or self.max_per_project),
+        )
+        bisect.insort(self._pending, entry)
+        self._pump()
+        return self.position(task_id)
+
+    def cancel(self, task_id: str) -> bool:
+        """移除尚未启动的任务，返回是否移除成功"""
+        for index, entry in enumerate(self._pending):
+            if entry.task_id == task_id:
+                del self._pending[index]
+                return True
+        return False
+
+    def position(self, task_id: str) -> Optional[int]:
+        """任务在等待队列中的位置（从 1 开始），不在队列中返回 None"""
+        for index, entry in enumerate(self._pending):
+            if entry.task_id == task_id:
+                return index + 1
+        return None
+
+    def is_active(self, project_id: str, exclude: str = None) -> bool:
+        """项目是否还有等待中或运行中的任务（可排除指定任务）"""
+        return any(
+            entry.project_id == project_id and entry.task_id != exclude
+            for entry in itertools.chain(
+                self._pending, (running[0] for running in self._running.values())
+            )
+        )
+
+    def snapshot(self) -> dict:
+        return {
+            "max_running": self.max_running,
+            "fetch_slots": {"total": self.pool.total, "in_use": self.pool.in_use},
+            "running": [
+                {
+                    "task_id": entry.task_id,
+                    "project_id": entry.project_id,
+                    "priority": entry.priority,
+                    **share.snapshot(),
+                }
+                for entry, share, _ in self._running.values()
+            ],
+            "pending": [
+                {
+                    "task_id": entry.task_id,
+                    "project_id": entry.project_id,
+                    "priority": entry.priority,
+                    "position": index + 1,
+                }
+                for index, entry in enumerate(self._pending)
+            ],
+        }
+
+    def _running_in(self, project_id: str) -> int:
+        return sum(1 for entry, _, _ in self._running.values() if entry.project_id == project_id)
+
+    def _pump(self):
+        """按优先级启动可运行的任务；受项目上限限制的任务跳过，不阻塞后续任务"""
+        index = 0
+        while index < len(self._pending) and len(self._running) < self.max_running:
+            entry = self._pending[index]
+            if self._running_in(entry.project_id) >= entry.max_per_project:
+                index += 1
+                continue
+            del self._pending[index]
+            share = self.pool.share(entry.task_id, entry.weight)
+            task = asyncio.get_running_loop().create_task(self._run(entry, share))
+            self._running[entry.task_id] = (entry, share, task)
+            logger.info("任务 %s 开始运行 (项目: %s, 优先级: %d)",
+                        entry.task_id, entry.project_id, entry.priority)
+
+    async def _run(self, entry: _QueuedTask, share: FetchShare):
+        try:
+            await entry.run(share)
+        except Exception as e:
+            logger.error("任务 %s 执行异常: %s", entry.task_id, e, exc_info=True)
+        finally:
+            self._running.pop(entry.task_id, None)
+            self.pool.remove(share)
+            self._pump()
+
+
+# 进程内全局任务队列
+task_queue = TaskQueue()
@@ -0,0 +1,122 @@
+"""
+任务预算
+限制单个任务的资源消耗：请求数、入库条数、下载字节数、运行时长和抓取深度，
+避免配置错误的项目无限运行或无限扇出，多个租户的任务可以安全地共享工作进程。
+
+- 请求数与下载字节数在 fetch() / open_stream() 中统一计量（FlowManager 通过
+  bind_request_budget 绑定），合并到进行中请求或命中短期缓存的请求不计入
+- 入库条数由 FlowManager 在详情页实际写入记录后计量（去重跳过、内容未变化的不计）
+- 运行时长由 FlowManager 在任务开始运行时设置定时器
+- 深度 = 经列表页分裂的次数（起始页 / 种子为 0，翻页不增加深度），
+  超出深度的子项直接丢弃，不会结束任务
+
+除深度外，任一预算耗尽时回调 on_exceeded（只触发一次），由 FlowManager 走停止流程收尾。
+"""
+
+import logging
+import time
+from typing import Callable, Optional
+
+from app.config import (
+    BUDGET_MAX_REQUESTS, BUDGET_MAX_ITEMS, BUDGET_MAX_BYTES,
+    BUDGET_MAX_DURATION_SECONDS, BUDGET_MAX_DEPTH,
+)
+
+logger = logging.getLogger(__name__)
+
+# 预算项 → 全局默认值（0 为不限制）
+DEFAULT_LIMITS = {
+    "max_requests": BUDGET_MAX_REQUESTS,
+    "max_items": BUDGET_MAX_ITEMS,
+    "max_bytes": BUDGET_MAX_BYTES,
+    "max_duration_seconds": BUDGET_MAX_DURATION_SECONDS,
+    "max_depth": BUDGET_MAX_DEPTH,
+}
+
+
+class TaskBudget:
+    """
+    单个任务的预算与用量
+
+    Args:
+        limits: 预算项 → 上限，缺省或 0 为不限制（见 DEFAULT_LIMITS）
+        on_exceeded: 预算耗尽时的回调，参数为触发的预算项名
+    """
+
+    def __init__(self, limits: dict = None, on_exceeded: Callable[[str], None] = None):
+        limits = limits or {}
+        self.max_requests = limits.get("max_requests") or 0
+        self.max_items = limits.get("max_items") or 0
+        self.max_bytes = limits.get("max_bytes") or 0
+        self.max_duration_seconds = limits.get("max_duration_seconds") or 0
+        self.max_depth = limits.get("max_depth") or 0
+        self.on_exceeded = on_exceeded
+        self.requests = 0
+        self.items = 0
+        self.bytes = 0
+        self.depth_pruned = 0
+        self.exceeded: Optional[str] = None  # 触发的预算项
+        self.started = time.monotonic()
+
+    @classmethod
+    def from_project(cls, project: dict, override: dict = None, on_exceeded=None) -> "TaskBudget":
+        """按 单次运行覆盖 > 项目 budget 配置 > 全局默认 合并（显式设置 0 表示不限制）"""
+        limits = dict(DEFAULT_LIMITS)
+        for config in ((project or {}).get("budget"), override):
+            for name, value in (config or {}).items():
+                if name in limits and value is not None:
+                    limits[name] = value
+        return cls(limits, on_exceeded)
+
+    def limits(self) -> dict:
+        """已设置的预算项"""
+        return {
+            name: getattr(self, name)
+            for name in DEFAULT_LIMITS
+            if getattr(self, name)
+        }
+
+    def charge_request(self, nbytes: int):
+        """计入一次已发出的请求及其下载字节数（失败的请求同样计数）"""
+        self.requests += 1
+        self.bytes += nbytes
+        if self.max_requests and self.requests >= self.max_requests:
+            self._exceed("max_requests")
+        elif self.max_bytes and self.bytes >= self.max_bytes:
+            self._exceed("max_bytes")
+
+    def charge_item(self):
+        """计入一条入库记录"""
+        self.items += 1
+        if self.max_items and self.items >= self.max_items:
+            self._exceed("max_items")
+
+    def expire(self):
+        """运行时长耗尽（由定时器调用）"""
+        self._exceed("max_duration_seconds")
+
+    def allows_depth(self, depth: int, count: int = 1) -> bool:
+        """深度为 depth 的 count 个子项是否可以执行；不可以时计入 depth_pruned"""
+        if self.max_depth and depth > self.max_depth:
+            self.depth_pruned += count
+            return False
+        return True
+
+    def _exceed(self, limit: str):
+        if self.exceeded is not None:
+            return
+        self.exceeded = limit
+        logger.info("任务预算 %s 已耗尽: %s", limit, self.snapshot())
+        if self.on_exceeded is not None:
+            self.on_exceeded(limit)
+
+    def snapshot(self) -> dict:
+        return {
+            "limits": self.limits(),
+            "requests": self.requests,
+            "items": self.items,
+            "bytes": self.bytes,
+            "elapsed_seconds": round(time.monotonic() - self.started, 1),
+            "depth_pruned": self.depth_pruned,
+            "exceeded": self.exceeded,
+        }
@@ -0,0 +1,229 @@
+"""
+按主机自适应并发控制
+根据各主机的响应延迟、429/503 比例和超时情况调整该主机的并发上限（AIMD）：
+
+- 请求成功且延迟平稳：上限加性增长，每个"窗口"（约一轮请求）+1
+- 收到 429/503 或请求超时：上限乘性减半，同一窗口内只减一次
+- 平滑延迟超过基线的 LATENCY_TOLERANCE 倍：视为排队拥塞，上限小幅回落
+
+上限始终位于项目配置的 [floor, ceiling] 区间内。
+由 FlowManager 通过 http_client.bind_request_gate() 绑定，fetch() 自动经过闸门。
+由任务队列启动的任务还需在全局请求槽位池中按权重取得份额（见 admission.py）。
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+import httpx
+
+from app.config import (
+    MAX_CONCURRENT_REQUESTS, CONCURRENCY_FLOOR, CONCURRENCY_CEILING, ADAPTIVE_CONCURRENCY,
+)
+from app.utils import metrics
+
+OVERLOAD_STATUS = {429, 503}
+
+BACKOFF_FACTOR = 0.5       # 过载时的乘性减小系数
+LATENCY_BACKOFF = 0.9      # 延迟升高时的减小系数
+LATENCY_TOLERANCE = 2.0    # 平滑延迟超过基线的倍数视为拥塞
+EWMA_ALPHA = 0.2           # 平滑延迟的权重
+BASELINE_DRIFT = 1.001     # 基线延迟每个样本允许的上漂比例，适应站点整体变慢
+MIN_WINDOW = 1.0           # 两次减小之间的最短间隔（秒）
+
+
+@dataclass
+class SlotOutcome:
+    """一次请求的结果，由调用方在闸门内填写"""
+    status: Optional[int] = None
+    error: Optional[BaseException] = None
+
+
+class HostLimiter:
+    """单个主机的并发上限与等待队列"""
+
+    def __init__(self, host: str, floor: int, ceiling: int, initial: int, adaptive: bool = True):
+        self.host = host
+        self.floor = floor
+        self.ceiling = ceiling
+        self.adaptive = adaptive
+        self.limit = float(initial)
+        self.inflight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.timeouts = 0
+        self.min_latency: Optional[float] = None
+        self.latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._waiters: deque[asyncio.Future] = deque()
+        metrics.HOST_CONCURRENCY_LIMIT.set(int(self.limit), host=host)
+
+    async def acquire(self):
+        """获取一个并发槽位，超出当前上限时排队等待"""
+        if self.inflight < int(self.limit) and not self._waiters:
+            self.inflight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 已分配到槽位但调用方被取消，归还槽位
+                self.inflight -= 1
+                self._wake()
+            elif future in self._waiters:
+                # 已被 _wake() 弹出的已取消 future 不在队列中
+                self._waiters.remove(future)
+            raise
+
+    def release(self, latency: float, outcome: SlotOutcome):
+        """归还槽位并根据本次结果调整上限"""
+        self.inflight -= 1
+        if self.adaptive:
+            self._adjust(latency, outcome)
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.inflight < int(self.limit):
+            future = self._waiters.popleft()
+            if not future.done():
+                self.inflight += 1
+                future.set_result(None)
+
+    def _adjust(self, latency: float, outcome: SlotOutcome):
+        if isinstance(outcome.error, asyncio.CancelledError):
+            return
+        self.requests += 1
+        now = time.monotonic()
+
+        timed_out = isinstance(outcome.error, httpx.TimeoutException)
+        if timed_out or outcome.status in OVERLOAD_STATUS:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.throttled += 1
+            self._decrease(now, BACKOFF_FACTOR)
+            return
+        if outcome.error is not None:
+            # 连接失败、响应被拒绝等与对端负载无关的错误不影响上限
+            return
+
+        if self.min_latency is None:
+            self.min_latency = self.latency = latency
+        else:
+            self.min_latency = min(latency, self.min_latency * BASELINE_DRIFT)
+            self.latency += EWMA_ALPHA * (latency - self.latency)
+
+        if self.latency > self.min_latency * LATENCY_TOLERANCE:
+            self._decrease(now, LATENCY_BACKOFF)
+        else:
+            self._set_limit(self.limit + 1 / self.limit)
+
+    def _decrease(self, now: float, factor: float):
+        # 同一窗口内的一批失败只减一次，避免一波并发请求把上限直接压到底
+        if now - self._last_decrease < max(self.latency or 0.0, MIN_WINDOW):
+            return
+        self._last_decrease = now
+        self._set_limit(self.limit * factor)
+
+    def _set_limit(self, value: float):
+        self.limit = min(float(self.ceiling), max(float(self.floor), value))
+        metrics.HOST_CONCURRENCY_LIMIT.set(int(self.limit), host=self.host)
+
+    def snapshot(self) -> dict:
+        return {
+            "host": self.host,
+            "limit": int(self.limit),
+            "inflight": self.inflight,
+            "waiting": len(self._waiters),
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "timeouts": self.timeouts,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "min_latency_ms": (
+                round(self.min_latency * 1000, 1) if self.min_latency is not None else None
+            ),
+        }
+
+
+class AdaptiveConcurrency:
+    """
+    任务级请求闸门：为每个主机维护一个 HostLimiter
+
+    Args:
+        floor: 每主机并发下限
+        ceiling: 每主机并发上限
+        initial: 初始并发，默认 MAX_CONCURRENT_REQUESTS（限制在区间内）
+        adaptive: False 时固定使用初始并发
+        share: 任务在全局请求槽位池中的份额，None 为不参与全局分配
+    """
+
+    def __init__(
+        self,
+        floor: int = CONCURRENCY_FLOOR,
+        ceiling: int = CONCURRENCY_CEILING,
+        initial: int = None,
+        adaptive: bool = ADAPTIVE_CONCURRENCY,
+        share=None,
+    ):
+        self.floor = max(1, floor)
+        self.ceiling = max(self.floor, ceiling)
+        if initial is None:
+            initial = MAX_CONCURRENT_REQUESTS
+        self.initial = min(self.ceiling, max(self.floor, initial))
+        self.adaptive = adaptive
+        self.share = share
+        self._hosts: dict[str, HostLimiter] = {}
+
+    @classmethod
+    def from_project(cls, project: dict, share=None) -> "AdaptiveConcurrency":
+        """按项目文档中的 concurrency 配置创建，缺省项使用全局配置"""
+        config = (project or {}).get("concurrency") or {}
+        return cls(
+            floor=config.get("floor") or CONCURRENCY_FLOOR,
+            ceiling=config.get("ceiling") or CONCURRENCY_CEILING,
+            initial=config.get("initial"),
+            adaptive=config.get("adaptive", ADAPTIVE_CONCURRENCY),
+            share=share,
+        )
+
+    def limiter(self, host: str) -> HostLimiter:
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            limiter = self._hosts[host] = HostLimiter(
+                host, self.floor, self.ceiling, self.initial, self.adaptive
+            )
+        return limiter
+
+    @asynccontextmanager
+    async def slot(self, host: str) -> AsyncIterator[SlotOutcome]:
+        """占用目标主机的一个并发槽位，退出时按结果调整上限"""
+        limiter = self.limiter(host)
+        await limiter.acquire()
+        outcome = SlotOutcome()
+        if self.share is not None:
+            # 先取主机槽位再取全局份额，等待主机限流的请求不占用全局槽位
+            try:
+                await self.share.acquire()
+            except BaseException as e:
+                outcome.error = e
+                limiter.release(0.0, outcome)
+                raise
+        started = time.perf_counter()
+        try:
+            yield outcome
+        except BaseException as e:
+            outcome.error = e
+            raise
+        finally:
+            if self.share is not None:
+                self.share.release()
+            limiter.release(time.perf_counter() - started, outcome)
+
+    def snapshot(self) -> list[dict]:
+        """各主机当前并发状态（写入任务 stats.concurrency）"""
+        return [limiter.snapshot() for limiter in self._hosts.values()]
@@ -3,8 +3,12 @@
 在节点间传递的状态对象，携带 URL、响应内容、Session 信息等
 """
 
+import dataclasses
+import hashlib
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Any, Optional
+
+from app.utils import json_codec
 
 
 @dataclass
@@ -26,6 +30,8 @@ class CrawlContext:
         parent_data: 从父节点传递的数据
         depth: 当前递归/循环深度
         page_number: 当前页码（翻页用）
+        source_url: 原始来源 URL（url 为 data:// 时使用）
+        data: 结构化数据负载（data:// 条目直接携带解析后的 JSON 对象）
     """
     url: str = ""
     html: str = ""
@@ -41,10 +47,23 @@ class CrawlContext:
     depth: int = 0
     page_number: int = 1
     source_url: str = ""  # 原始来源 URL (当 url 为 data:// 时使用)
+    data: Any = None
 
     def clone(self, **overrides) -> "CrawlContext":
-        """克隆上下文并覆盖部分字段"""
-        import dataclasses
-        current = dataclasses.asdict(self)
-        current.update(overrides)
-        return CrawlContext(**current)
+        """
+        克隆上下文并覆盖部分字段
+
+        浅拷贝：dict 字段与父上下文共享，节点需要修改时应先复制
+        （如 merge_headers / IntermediateNode 的 parent_data）。
+        """
+        return dataclasses.replace(self, **overrides)
+
+
+def make_data_url(item: Any) -> str:
+    """
+    为 data:// 条目生成基于内容哈希的确定性 URL
+
+    相同内容在重跑时得到相同 URL，可直接用于 url 去重。
+    """
+    canonical = json_codec.canonical_bytes(item)
+    return f"data://{hashlib.sha1(canonical).hexdigest()}"
@@ -0,0 +1,243 @@
+"""
+采集数据统计
+每个项目在 data_stats 集合中缓存一份统计（_id 为项目 ID）：记录总数、各字段填充数与
+去重计数、每个任务入库条数、每小时入库条数。查询接口只读这一个文档，与数据量无关。
+
+统计按任务增量更新：任务结束（完成、失败或停止）后只读取该任务写入的记录，
+汇总为增量后合并进缓存文档，从不对整个项目重新计算：
+
+- 字段去重计数使用 HyperLogLog（可合并，误差约 3%），不保存取值本身
+- 变更检测模式下被后续任务更新的记录（first_seen 早于任务开始）不重复计入，
+  字段统计反映记录首次入库时的内容
+- 合并以 version 字段做 CAS，同一项目的多个任务同时结束也不会丢失更新
+- 清空数据 / 删除项目时丢弃缓存；旧项目（或统计不一致时）可调用 rebuild 全量重建一次
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+from datetime import datetime, timezone
+from typing import Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from app.database import get_db
+from app.utils import json_codec
+
+logger = logging.getLogger(__name__)
+
+# HyperLogLog 精度：2^10 个寄存器，标准误差约 1.04 / sqrt(1024) ≈ 3%
+_HLL_P = 10
+_HLL_M = 1 << _HLL_P
+# 缓存文档中保留的最近任务数与小时桶数
+MAX_TASKS = 200
+MAX_HOURS = 24 * 90
+# 合并时 CAS 冲突的重试次数
+_CAS_RETRIES = 10
+
+# 本进程中运行的重建作业（保持引用）
+_rebuilding: dict[str, asyncio.Task] = {}
+
+
+class DistinctSketch:
+    """HyperLogLog 去重计数器（寄存器可序列化为 hex 字符串保存）"""
+
+    def __init__(self, registers: str = None):
+        self.registers = bytearray.fromhex(registers) if registers else bytearray(_HLL_M)
+
+    def add(self, value):
+        digest = hashlib.blake2b(json_codec.canonical_bytes(value), digest_size=8).digest()
+        h = int.from_bytes(digest, "big")
+        index = h >> (64 - _HLL_P)
+        rest = h & ((1 << (64 - _HLL_P)) - 1)
+        rank = (64 - _HLL_P) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "DistinctSketch"):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self) -> int:
+        alpha = 0.7213 / (1 + 1.079 / _HLL_M)
+        estimate = alpha * _HLL_M * _HLL_M / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * _HLL_M and zeros:
+            # 小基数时改用线性计数
+            estimate = _HLL_M * math.log(_HLL_M / zeros)
+        return round(estimate)
+
+    def dumps(self) -> str:
+        return self.registers.hex()
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # MongoDB 默认返回不带时区的 UTC 时间
+    if value is None:
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _filled(value) -> bool:
+    return value not in (None, "", [], {})
+
+
+class StatsDelta:
+    """一批记录的统计增量"""
+
+    def __init__(self):
+        self.total = 0
+        self.filled: dict[str, int] = {}
+        self.sketches: dict[str, DistinctSketch] = {}
+        self.hours: dict[str, int] = {}
+        self.tasks: dict[str, int] = {}
+
+    def add(self, record: dict):
+        self.total += 1
+        for name, value in (record.get("data") or {}).items():
+            if not _filled(value):
+                continue
+            self.filled[name] = self.filled.get(name, 0) + 1
+            sketch = self.sketches.get(name)
+            if sketch is None:
+                sketch = self.sketches[name] = DistinctSketch()
+            sketch.add(value)
+        crawled_at = _as_utc(record.get("crawled_at"))
+        if crawled_at is not None:
+            hour = crawled_at.strftime("%Y-%m-%dT%H")
+            self.hours[hour] = self.hours.get(hour, 0) + 1
+        task_id = record.get("task_id")
+        if task_id:
+            self.tasks[task_id] = self.tasks.get(task_id, 0) + 1
+
+    def merge_into(self, doc: Optional[dict], project_id: str) -> dict:
+        """把增量合并进缓存文档，返回新文档"""
+        doc = doc or {"_id": project_id, "version": 0, "total_items": 0, "fields": [], "hours": {}, "tasks": []}
+        fields = {f["name"]: f for f in doc.get("fields") or []}
+        for name, count in self.filled.items():
+            field = fields.setdefault(name, {"name": name, "filled": 0, "sketch": None})
+            sketch = DistinctSketch(field.get("sketch"))
+            sketch.merge(self.sketches[name])
+            field["filled"] += count
+            field["sketch"] = sketch.dumps()
+            field["distinct"] = sketch.estimate()
+
+        hours = dict(doc.get("hours") or {})
+        for hour, count in self.hours.items():
+            hours[hour] = hours.get(hour, 0) + count
+        if len(hours) > MAX_HOURS:
+            hours = dict(sorted(hours.items())[-MAX_HOURS:])
+
+        tasks = [t for t in doc.get("tasks") or [] if t["task_id"] not in self.tasks]
+        tasks.extend({"task_id": tid, "items": n} for tid, n in self.tasks.items())
+
+        return {
+            "_id": project_id,
+            "version": doc.get("version", 0) + 1,
+            "total_items": doc.get("total_items", 0) + self.total,
+            "fields": sorted(fields.values(), key=lambda f: f["name"]),
+            "hours": hours,
+            "tasks": tasks[-MAX_TASKS:],
+            "updated_at": datetime.now(timezone.utc),
+        }
+
+
+async def _save(project_id: str, delta: StatsDelta, replace: bool = False):
+    """以 CAS 方式把增量合并进缓存文档（replace 时丢弃原有统计）"""
+    db = get_db()
+    for _ in range(_CAS_RETRIES):
+        doc = await db.data_stats.find_one({"_id": project_id})
+        merged = delta.merge_into(None if replace else doc, project_id)
+        if doc is None:
+            try:
+                await db.data_stats.insert_one(merged)
+                return
+            except DuplicateKeyError:
+                continue
+        if replace:
+            merged["version"] = doc.get("version", 0) + 1
+        merged.pop("_id")
+        result = await db.data_stats.update_one(
+            {"_id": project_id, "version": doc.get("version", 0)}, {"$set": merged}
+        )
+        if result.matched_count == 1:
+            return
+    raise RuntimeError(f"项目 {project_id} 的数据统计并发更新冲突")
+
+
+async def apply_task(project_id: str, task_id: str):
+    """任务结束后把该任务写入的记录合并进项目统计"""
+    db = get_db()
+    task = await db.tasks.find_one({"_id": task_id}, {"started_at": 1})
+    started_at = _as_utc((task or {}).get("started_at"))
+    delta = StatsDelta()
+    cursor = db.data_store.find(
+        {"task_id": task_id}, {"data": 1, "crawled_at": 1, "first_seen": 1, "task_id": 1}
+    )
+    async for record in cursor:
+        first_seen = _as_utc(record.get("first_seen"))
+        if first_seen is not None and started_at is not None and first_seen < started_at:
+            # 变更检测：之前任务入库、本任务更新的记录，已计入统计
+            continue
+        delta.add(record)
+    if delta.total:
+        await _save(project_id, delta)
+    logger.info("项目 %s 数据统计已合并任务 %s: %d 条", project_id, task_id, delta.total)
+
+
+async def discard(project_id: str):
+    """丢弃项目的统计缓存（清空数据 / 删除项目时）"""
+    await get_db().data_stats.delete_one({"_id": project_id})
+
+
+def start_rebuild(project_id: str) -> bool:
+    """在后台全量重建项目统计，已在重建中时返回 False"""
+    if project_id in _rebuilding:
+        return False
+    task = asyncio.get_running_loop().create_task(_rebuild(project_id))
+    _rebuilding[project_id] = task
+    task.add_done_callback(lambda _: _rebuilding.pop(project_id, None))
+    return True
+
+
+def is_rebuilding(project_id: str) -> bool:
+    return project_id in _rebuilding
+
+
+async def _rebuild(project_id: str):
+    db = get_db()
+    delta = StatsDelta()
+    try:
+        cursor = db.data_store.find(
+            {"project_id": project_id}, {"data": 1, "crawled_at": 1, "task_id": 1}
+        )
+        async for record in cursor:
+            delta.add(record)
+        await _save(project_id, delta, replace=True)
+        logger.info("项目 %s 数据统计已重建: %d 条", project_id, delta.total)
+    except Exception as e:
+        logger.error("项目 %s 数据统计重建失败: %s", project_id, e, exc_info=True)
+
+
+def render(doc: Optional[dict]) -> dict:
+    """把缓存文档整理为接口返回格式"""
+    doc = doc or {}
+    total = doc.get("total_items", 0)
+    return {
+        "total_items": total,
+        "fields": [
+            {
+                "name": f["name"],
+                "filled": f["filled"],
+                "fill_rate": round(f["filled"] / total, 4) if total else 0,
+                "distinct": f.get("distinct", 0),
+            }
+            for f in doc.get("fields") or []
+        ],
+        "per_task": doc.get("tasks") or [],
+        "per_hour": [
+            {"hour": f"{hour}:00:00Z", "items": count}
+            for hour, count in sorted((doc.get("hours") or {}).items())
+        ],
+        "updated_at": doc.get("updated_at"),
+    }
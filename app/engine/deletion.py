@@ -0,0 +1,203 @@
+"""
+后台批量删除
+清空项目数据（DELETE /projects/{id}/data）和删除项目（DELETE /projects/{id}）可能涉及
+数千万条记录，不在请求中同步执行，而是创建删除作业（deletion_jobs 集合）在后台完成：
+
+- 每批经 project_id 索引读取至多 DELETE_BATCH_SIZE 个 _id，再按 _id 删除；
+  批次之间暂停 DELETE_BATCH_PAUSE_SECONDS，不会用一次巨大的删除压垮数据库
+- 作业期间项目状态为 deleting，拒绝新的运行（手动、定时和恢复）
+- 每批完成后把进度写回作业文档（GET /projects/{id}/deletion 查询）
+- 服务停止时作业保持 running，下次启动时继续（删除是幂等的）
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Callable
+
+from app.config import DELETE_BATCH_SIZE, DELETE_BATCH_PAUSE_SECONDS
+from app.database import get_db
+from app.engine import data_stats
+from app.engine.admission import task_queue
+from app.engine.graph import invalidate_graph
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# 作业范围：data 只清空采集数据，project 删除项目及其全部关联数据
+SCOPES = ("data", "project")
+
+# 本进程中运行的删除作业（保持引用，停机时取消）
+_jobs: dict[str, asyncio.Task] = {}
+
+
+class DeletionConflictError(Exception):
+    """项目正在删除或仍有任务未结束，不能开始删除"""
+
+
+async def start_deletion(
+    project: dict,
+    scope: str,
+    is_active: Callable[[str], bool] = task_queue.is_active,
+) -> dict:
+    """
+    把项目置为 deleting 并创建后台删除作业
+
+    Args:
+        project: 项目文档
+        scope: data / project（见 SCOPES）
+        is_active: 判断项目是否仍有等待中或运行中的任务
+
+    Returns:
+        删除作业文档
+
+    Raises:
+        DeletionConflictError: 项目已在删除中，或还有任务未结束 / 正在重建数据统计
+    """
+    db = get_db()
+    project_id = project["_id"]
+    job_id = str(uuid.uuid4())
+
+    # 先以 CAS 方式占用项目状态，submit_run 看到 deleting 后不再提交运行
+    claim = await db.projects.update_one(
+        {"_id": project_id, "status": {"$ne": "deleting"}},
+        {"$set": {"status": "deleting", "deletion_job_id": job_id}},
+    )
+    if claim.matched_count != 1:
+        raise DeletionConflictError("项目正在删除中")
+    active = is_active(project_id)
+    if active or data_stats.is_rebuilding(project_id):
+        # 按当前任务情况恢复状态（调用方读到的项目文档可能已过时），且只撤销本次占用
+        await db.projects.update_one(
+            {"_id": project_id, "deletion_job_id": job_id},
+            {"$set": {
+                "status": "running" if active else "idle",
+                "deletion_job_id": project.get("deletion_job_id"),
+            }},
+        )
+        raise DeletionConflictError("项目有等待中或运行中的任务（或正在重建数据统计），请稍后再试")
+
+    now = datetime.now(timezone.utc)
+    job = {
+        "_id": job_id,
+        "project_id": project_id,
+        "scope": scope,
+        "status": "running",
+        "total": None,
+        "deleted": 0,
+        "error_message": None,
+        "created_at": now,
+        "updated_at": now,
+        "finished_at": None,
+    }
+    await db.deletion_jobs.insert_one(job)
+    _spawn(job_id)
+    logger.info("项目 %s 删除作业已开始: %s (范围: %s)", project_id, job_id, scope)
+    return job
+
+
+async def resume_deletions():
+    """服务启动时继续上次未完成的删除作业"""
+    db = get_db()
+    async for job in db.deletion_jobs.find({"status": "running"}, {"_id": 1}):
+        if job["_id"] not in _jobs:
+            logger.info("继续未完成的删除作业: %s", job["_id"])
+            _spawn(job["_id"])
+
+
+async def stop_deletions():
+    """服务停止时取消本进程的删除作业（作业保持 running，下次启动继续）"""
+    tasks = list(_jobs.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _spawn(job_id: str):
+    task = asyncio.get_running_loop().create_task(_run(job_id))
+    _jobs[job_id] = task
+    task.add_done_callback(lambda _: _jobs.pop(job_id, None))
+
+
+async def _targets(project_id: str, scope: str) -> list[tuple[str, dict]]:
+    """需要分批删除的 (集合, 查询)"""
+    db = get_db()
+    targets = [("data_store", {"project_id": project_id})]
+    if scope == "project":
+        targets.append(("task_frontier", {"project_id": project_id}))
+        async for seed_set in db.seed_sets.find({"project_id": project_id}, {"_id": 1}):
+            targets.append(("seed_chunks", {"seed_set_id": seed_set["_id"]}))
+    return targets
+
+
+async def _delete_batches(collection, query: dict, on_batch) -> None:
+    """按批删除 query 匹配的全部文档，每批完成后回调 on_batch(删除条数)"""
+    while True:
+        cursor = collection.find(query, {"_id": 1}).limit(DELETE_BATCH_SIZE).batch_size(DELETE_BATCH_SIZE)
+        ids = [doc["_id"] async for doc in cursor]
+        if not ids:
+            return
+        result = await collection.delete_many({"_id": {"$in": ids}})
+        await on_batch(result.deleted_count)
+        await asyncio.sleep(DELETE_BATCH_PAUSE_SECONDS)
+
+
+async def _run(job_id: str):
+    db = get_db()
+    job = await db.deletion_jobs.find_one({"_id": job_id})
+    if not job:
+        return
+    project_id, scope = job["project_id"], job["scope"]
+    deleted = job.get("deleted") or 0
+
+    async def on_batch(count: int):
+        nonlocal deleted
+        deleted += count
+        await db.deletion_jobs.update_one(
+            {"_id": job_id},
+            {"$set": {"deleted": deleted, "updated_at": datetime.now(timezone.utc)}},
+        )
+
+    try:
+        await data_stats.discard(project_id)
+        targets = await _targets(project_id, scope)
+        # 预估总数 = 已删除 + 剩余（恢复的作业重新统计剩余部分）
+        remaining = 0
+        for name, query in targets:
+            remaining += await db[name].count_documents(query)
+        await db.deletion_jobs.update_one({"_id": job_id}, {"$set": {"total": deleted + remaining}})
+
+        for name, query in targets:
+            await _delete_batches(db[name], query, on_batch)
+
+        if scope == "project":
+            await db.nodes.delete_many({"project_id": project_id})
+            await db.tasks.delete_many({"project_id": project_id})
+            await db.seed_sets.delete_many({"project_id": project_id})
+            await db.projects.delete_one({"_id": project_id})
+            invalidate_graph(project_id)
+            metrics.forget(project=project_id)
+        else:
+            await db.projects.update_one({"_id": project_id}, {"$set": {"status": "idle"}})
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error("删除作业 %s 失败: %s", job_id, e, exc_info=True)
+        await db.deletion_jobs.update_one(
+            {"_id": job_id},
+            {"$set": {
+                "status": "failed",
+                "error_message": str(e),
+                "finished_at": datetime.now(timezone.utc),
+            }},
+        )
+        # 恢复项目状态，可再次发起删除
+        await db.projects.update_one({"_id": project_id}, {"$set": {"status": "idle"}})
+        return
+
+    await db.deletion_jobs.update_one(
+        {"_id": job_id},
+        {"$set": {"status": "completed", "finished_at": datetime.now(timezone.utc)}},
+    )
+    logger.info("删除作业 %s 已完成: 项目 %s 共删除 %d 条记录", job_id, project_id, deleted)
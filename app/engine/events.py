@@ -0,0 +1,135 @@
+"""
+任务事件推送
+FlowManager 在内存中维护任务的状态、统计计数和最近的错误（FlowManager.events），
+SSE 接口（GET /tasks/{id}/events）订阅后按间隔推送变化，不再查询数据库。
+
+推送经过节流与合并：每个订阅者两次推送之间至少间隔 EVENTS_INTERVAL 秒，
+期间的多次变化合并为一次（统计只发送有变化的计数），
+推送频率与抓取速度无关。
+
+事件类型：
+- status: 状态变化，如 {"status": "stopping"}
+- stats: 有变化的统计计数（累计值）及运行时状态（frontier 大小、预算用量）
+- node_error: 新增的错误，如 {"node_type": "detail", "message": "...", "at": ...}
+  （不使用 error，避免与浏览器 EventSource 的连接错误事件重名）
+- end: 任务已结束，之后连接关闭
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Optional
+
+from app.config import EVENTS_INTERVAL, EVENTS_KEEPALIVE_SECONDS
+
+# 每个任务保留的最近错误数（新订阅者连接时一并推送）
+RECENT_ERRORS = 20
+# 任务状态终态
+FINAL_STATUSES = ("completed", "failed", "stopped")
+
+
+class TaskEvents:
+    """
+    单个任务的内存事件源
+
+    Args:
+        task_id: 任务 ID
+        runtime: 返回运行时状态的回调（随 stats 事件推送），可选
+    """
+
+    def __init__(self, task_id: str, runtime: Callable[[], dict] = None):
+        self.task_id = task_id
+        self.runtime = runtime
+        self.status = "pending"
+        self.stats: dict[str, float] = {}
+        self.version = 0
+        self.closed = False
+        self._errors: deque[tuple[int, dict]] = deque(maxlen=RECENT_ERRORS)
+        self._error_seq = 0
+        self._changed: Optional[asyncio.Event] = None
+
+    def _notify(self):
+        self.version += 1
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+
+    def inc(self, **increments):
+        """累加统计计数（与任务文档 stats 的 $inc 对应）"""
+        for key, value in increments.items():
+            self.stats[key] = self.stats.get(key, 0) + value
+        self._notify()
+
+    def set_status(self, status: str):
+        if status != self.status:
+            self.status = status
+            self._notify()
+
+    def error(self, node_type: str, message: str):
+        self._error_seq += 1
+        self._errors.append((self._error_seq, {
+            "node_type": node_type,
+            "message": message,
+            "at": time.time(),
+        }))
+        self._notify()
+
+    def close(self, status: str = None):
+        """任务结束：推送最终状态后订阅者收到 end 事件"""
+        if status:
+            self.status = status
+        self.closed = True
+        self._notify()
+
+    async def _wait(self, seen: int, timeout: float) -> bool:
+        """等待新的变化，超时返回 False"""
+        if self.version != seen or self.closed:
+            return True
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def subscribe(
+        self, interval: float = EVENTS_INTERVAL, keepalive: float = EVENTS_KEEPALIVE_SECONDS
+    ) -> AsyncIterator[tuple[str, dict]]:
+        """
+        订阅事件，产出 (事件类型, 数据)
+
+        连接后先推送当前状态、全部统计和最近的错误；长时间无变化时产出 ("keepalive", {})。
+        """
+        sent_status = None
+        sent_stats: dict[str, float] = {}
+        error_seq = 0
+        seen = -1
+        while True:
+            if not await self._wait(seen, keepalive):
+                yield "keepalive", {}
+                continue
+            seen = self.version
+
+            if self.status != sent_status:
+                sent_status = self.status
+                yield "status", {"status": self.status}
+
+            changed = {k: v for k, v in self.stats.items() if sent_stats.get(k) != v}
+            if changed:
+                sent_stats.update(changed)
+                data = {"stats": changed}
+                if self.runtime is not None and not self.closed:
+                    data.update(self.runtime())
+                yield "stats", data
+
+            for seq, error in self._errors:
+                if seq > error_seq:
+                    yield "node_error", error
+            error_seq = self._error_seq
+
+            if self.closed:
+                yield "end", {"status": self.status}
+                return
+            # 节流：间隔内的变化合并到下一次推送
+            await asyncio.sleep(interval)
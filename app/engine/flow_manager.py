@@ -4,22 +4,31 @@
 """
 
 import asyncio
-import json
 import logging
-import uuid
+import time
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from typing import Optional
 
 from app.database import get_db
-from app.engine.context import CrawlContext
+from app.engine.budget import TaskBudget
+from app.engine.concurrency import AdaptiveConcurrency
+from app.engine.context import CrawlContext, make_data_url
+from app.engine.events import TaskEvents
+from app.engine.frontier import Frontier, WorkItem, dump_item, load_item
+from app.engine.graph import CompiledGraph, load_graph
+from app.engine.seeds import iter_seed_batches
+from app.storage.records import RecordWriter, bind_record_writer
 from app.engine.nodes.base import BaseNode, NodeResult
 from app.engine.nodes.start import StartNode
 from app.engine.nodes.intermediate import IntermediateNode
 from app.engine.nodes.list_page import ListPageNode
-from app.engine.nodes.next_page import NextPageNode
+from app.engine.nodes.next_page import NextPageNode, TemplatePager
 from app.engine.nodes.detail import DetailNode
-from app.utils.http_client import fetch
-from app.config import MAX_CONCURRENT_REQUESTS
+from app.utils.http_client import fetch, bind_request_gate, bind_request_budget
+from app.utils import metrics
+from app.utils.tracing import TaskTracer
+from app.config import TRACE_SAMPLE_RATE, CRAWL_ORDER, MAX_FRONTIER_SIZE, STOP_GRACE_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +41,13 @@ NODE_CLASS_MAP = {
     "detail": DetailNode,
 }
 
+# 运行时状态（并发、frontier）写入任务 stats 的最短间隔（秒）
+RUNTIME_STATS_FLUSH_INTERVAL = 5.0
+# 停止时取消工作协程后，等待保存 frontier 和写入最终状态的最长时间（秒）
+STOP_FINALIZE_TIMEOUT = 30.0
+# 保存 frontier 时每个 task_frontier 文档包含的工作项数
+SAVED_CHUNK_SIZE = 500
+
 
 class FlowManager:
     """
@@ -40,29 +56,81 @@ class FlowManager:
     职责：
     1. 从数据库加载项目的所有节点配置
     2. 构建节点执行图
-    3. 从 StartNode 开始，按 callback 链调度执行
+    3. 从 StartNode 开始，按 callback 链把后续节点加入 frontier，由工作协程按排序策略执行
     4. 处理列表页"分裂"和下一页"循环"
     """
 
-    def __init__(self, project_id: str, task_id: str):
+    def __init__(
+        self,
+        project_id: str,
+        task_id: str,
+        trace_sample_rate: float = None,
+        resume_from: str = None,
+        budget: dict = None,
+    ):
         self.project_id = project_id
         self.task_id = task_id
-        self.nodes: dict[str, dict] = {}  # node_id → node_config
+        # 恢复来源：被停止的任务 ID，从其保存的 frontier 继续执行
+        self.resume_from = resume_from
+        # 单次运行的预算覆盖项（与项目 budget 配置合并，见 TaskBudget.from_project）
+        self.budget_override = budget
+        self.budget = TaskBudget()
+        self.graph: Optional[CompiledGraph] = None
+        self.nodes: dict[str, dict] = {}  # node_id → node_config（编译图中的只读配置）
         self._stop_flag = False
+        self.tracer = TaskTracer(
+            TRACE_SAMPLE_RATE if trace_sample_rate is None else trace_sample_rate
+        )
+        # 任务在全局请求槽位池中的份额（由任务队列分配，单独运行时为 None）
+        self.fetch_share = None
+        # 按主机自适应并发，load_project() 后替换为项目配置
+        self.concurrency = AdaptiveConcurrency()
+        # 待处理工作项队列，load_project() 时按项目的爬取顺序配置创建
+        self.frontier: Optional[Frontier] = None
+        self._seed: Optional[WorkItem] = None
+        self._seed_error: Optional[Exception] = None
+        self._stats_flushed_at = 0.0
+        # 停止与排空
+        self._workers: list[asyncio.Task] = []
+        self._stop_requested_at: Optional[float] = None
+        self._stop_reason = "user"  # user: 停止指令；budget: 预算耗尽
+        self._budget_shutdown: Optional[asyncio.Task] = None
+        self._cancelled_items = 0
+        self._finished = asyncio.Event()
+        self.drain: Optional[dict] = None  # 排空结果，停止后写入任务 drain 字段
+        # 内存中的任务状态与统计，供 SSE 推送（GET /tasks/{id}/events）
+        self.events = TaskEvents(task_id, runtime=self._live_runtime)
+        # 种子源：恢复时跳过的数量与本次已放入 frontier 的数量
+        self._seed_skip = 0
+        self._seeds_enqueued = 0
 
     async def load_nodes(self):
-        """从数据库加载项目所有节点"""
+        """加载项目的编译节点图（按项目图版本缓存，未变化时不重新查询节点）"""
+        self.graph = await load_graph(self.project_id)
+        self.nodes = self.graph.nodes
+
+    async def load_project(self):
+        """加载项目级运行配置（并发上下限、爬取顺序等）"""
         db = get_db()
-        cursor = db.nodes.find({"project_id": self.project_id})
-        async for node_doc in cursor:
-            self.nodes[node_doc["_id"]] = node_doc
+        project = await db.projects.find_one({"_id": self.project_id})
+        self.concurrency = AdaptiveConcurrency.from_project(project, share=self.fetch_share)
+
+        self.budget = TaskBudget.from_project(
+            project, self.budget_override, on_exceeded=self._on_budget_exceeded
+        )
+
+        scheduling = (project or {}).get("scheduling") or {}
+        max_frontier = scheduling.get("max_frontier")
+        self.frontier = Frontier(
+            policy=scheduling.get("crawl_order") or CRAWL_ORDER,
+            max_size=MAX_FRONTIER_SIZE if max_frontier is None else max_frontier,
+            # 工作协程数即同时执行的节点数，各主机的请求并发仍由闸门自适应控制
+            workers=self.concurrency.ceiling,
+        )
 
     def get_start_node(self) -> Optional[dict]:
         """获取起始节点（类型为 start 的节点）"""
-        for node in self.nodes.values():
-            if node["node_type"] == "start":
-                return node
-        return None
+        return self.graph.start_node if self.graph else None
 
     def create_node_instance(self, node_config: dict) -> BaseNode:
         """根据配置创建节点实例"""
@@ -73,8 +141,50 @@ class FlowManager:
         return cls(node_config)
 
     def stop(self):
-        """停止执行"""
-        self._stop_flag = True
+        """标记停止：工作协程不再取出新工作项（等待排空见 shutdown）"""
+        if not self._stop_flag:
+            self._stop_flag = True
+            self._stop_requested_at = time.perf_counter()
+
+    def _on_budget_exceeded(self, limit: str):
+        """预算耗尽：与停止指令相同地收尾（进行中的工作项有宽限时间，剩余工作项保存以便恢复）"""
+        if self._stop_flag:
+            return
+        logger.info("任务 %s 预算 %s 已耗尽，停止任务", self.task_id, limit)
+        self._stop_reason = "budget"
+        self.stop()
+        self._budget_shutdown = asyncio.ensure_future(self.shutdown())
+
+    async def shutdown(self, grace: float = STOP_GRACE_SECONDS) -> Optional[dict]:
+        """
+        停止任务并等待排空
+
+        1. 不再取出新工作项，frontier 中剩余的工作项转入 leftover
+        2. 进行中的工作项最多再执行 grace 秒，之后取消其工作协程，进行中的请求随之中断
+        3. 由 _run 保存未执行的工作项、写入最终统计并把任务置为 stopped
+
+        停止耗时上限约为 grace + 保存耗时，实际耗时记入 drain.stop_latency_ms
+        和指标 rulecrawl_task_stop_seconds。
+
+        Returns:
+            排空结果（同任务文档 drain 字段）；任务已正常结束或未在限定时间内结束时为 None
+        """
+        self.stop()
+        if not self.events.closed:
+            self.events.set_status("stopping")
+        if self.frontier is not None:
+            await self.frontier.close()
+        running = [task for task in self._workers if not task.done()]
+        if running:
+            _, pending = await asyncio.wait(running, timeout=grace)
+            for task in pending:
+                task.cancel()
+        try:
+            await asyncio.wait_for(self._finished.wait(), timeout=STOP_FINALIZE_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("任务 %s 未能在限定时间内完成排空", self.task_id)
+            return None
+        return self.drain
 
     async def execute(self):
         """
@@ -82,10 +192,19 @@ class FlowManager:
 
         流程：
         1. 找到 StartNode 并执行
-        2. 根据 callback_node_id 链式调度后续节点
-        3. 列表页产生的多个 URL 并行分发到回调节点
+        2. 根据 callback_node_id 把后续节点加入 frontier
+        3. 列表页产生的多个 URL 作为工作项并行执行
         4. 下一页节点产生的 URL 循环回目标节点
         """
+        # 绑定指标标签，fetch() 等底层调用及其派生的子协程自动继承
+        with metrics.bind_labels(project=self.project_id, task=self.task_id):
+            try:
+                await self._run()
+            finally:
+                metrics.forget(task=self.task_id)
+
+    async def _run(self):
+        """执行工作流主体（见 execute）"""
         db = get_db()
 
         # 更新任务状态为运行中
@@ -93,9 +212,11 @@ class FlowManager:
             {"_id": self.task_id},
             {"$set": {"status": "running", "started_at": datetime.now(timezone.utc)}},
         )
+        self.events.set_status("running")
 
         try:
             await self.load_nodes()
+            await self.load_project()
 
             start_node_config = self.get_start_node()
             if not start_node_config:
@@ -107,8 +228,35 @@ class FlowManager:
                 task_id=self.task_id,
             )
 
-            # 从起始节点开始执行
-            await self._execute_node(start_node_config["_id"], context)
+            # 从起始节点（恢复时为来源任务保存的 frontier）开始，由工作协程按排序策略
+            # 消费 frontier；所有请求经过按主机的并发闸门
+            if self.resume_from:
+                await self._load_resume_state()
+                self._seed = WorkItem(start_node_config["_id"], context, kind="resume")
+            else:
+                self._seed = WorkItem(start_node_config["_id"], context)
+            deadline = None
+            if self.budget.max_duration_seconds:
+                deadline = asyncio.get_running_loop().call_later(
+                    self.budget.max_duration_seconds, self.budget.expire
+                )
+            records = RecordWriter(db.data_store)
+            try:
+                with bind_request_gate(self.concurrency), bind_request_budget(self.budget):
+                    with bind_record_writer(records):
+                        await self.frontier.put(self._seed)
+                        await self._drain()
+            finally:
+                if deadline is not None:
+                    deadline.cancel()
+                # 完成、失败和停止都先写入缓冲区中的剩余记录，再更新任务状态
+                await records.close()
+                await self._report_record_failures(records)
+            if self._stop_flag:
+                await self._finish_stopped()
+                return
+            if self._seed_error is not None:
+                raise self._seed_error
 
             # 更新任务状态为完成
             await db.tasks.update_one(
@@ -116,8 +264,11 @@ class FlowManager:
                 {"$set": {
                     "status": "completed",
                     "finished_at": datetime.now(timezone.utc),
+                    **self._runtime_stats(),
+                    **self._trace_fields(),
                 }},
             )
+            self.events.close("completed")
 
         except Exception as e:
             logger.error("工作流执行异常: %s", e, exc_info=True)
@@ -127,11 +278,192 @@ class FlowManager:
                     "status": "failed",
                     "finished_at": datetime.now(timezone.utc),
                     "error_message": str(e),
+                    **self._runtime_stats(),
+                    **self._trace_fields(),
                 }},
             )
+            self.events.error("task", str(e))
+            self.events.close("failed")
+        finally:
+            if not self.events.closed:
+                self.events.close()
+            self._finished.set()
+
+    async def _finish_stopped(self):
+        """停止后的收尾：保存未执行的工作项，写入排空结果和最终统计"""
+        db = get_db()
+        leftover = list(self.frontier.leftover)
+        inherited = 0
+        if self._seed is not None and self._seed.kind == "resume" and any(
+            item is self._seed for item in leftover
+        ):
+            # 来源任务保存的工作项尚未全部放回：剩余部分直接转给本任务
+            leftover = [item for item in leftover if item is not self._seed]
+            async for chunk in db.task_frontier.find(
+                {"task_id": self.resume_from}, {"count": 1}
+            ):
+                inherited += chunk["count"]
+            await db.task_frontier.update_many(
+                {"task_id": self.resume_from}, {"$set": {"task_id": self.task_id}}
+            )
+
+        saved = await self._save_frontier(leftover)
+        latency = time.perf_counter() - (self._stop_requested_at or time.perf_counter())
+        metrics.STOP_SECONDS.observe(latency)
+        self.drain = {
+            "saved_items": saved + inherited,
+            "cancelled_items": self._cancelled_items,
+            "stop_latency_ms": round(latency * 1000, 1),
+            "reason": self._stop_reason,
+        }
+        start_config = self.get_start_node() or {}
+        if (start_config.get("request_config") or {}).get("seed_source"):
+            self.drain["seed_offset"] = self._seed_skip + self._seeds_enqueued
+
+        await db.tasks.update_one(
+            {"_id": self.task_id},
+            {"$set": {
+                "status": "stopped",
+                "finished_at": datetime.now(timezone.utc),
+                "drain": self.drain,
+                **self._runtime_stats(),
+                **self._trace_fields(),
+            }},
+        )
+        self.events.close("stopped")
+        logger.info(
+            "任务 %s 已停止: 保存 %d 个工作项，取消 %d 个，耗时 %.0fms",
+            self.task_id, self.drain["saved_items"], self._cancelled_items, latency * 1000,
+        )
+
+    async def _save_frontier(self, items: list[WorkItem]) -> int:
+        """把未执行的工作项分块写入 task_frontier，供恢复任务使用"""
+        db = get_db()
+        for seq, offset in enumerate(range(0, len(items), SAVED_CHUNK_SIZE)):
+            chunk = [dump_item(item) for item in items[offset:offset + SAVED_CHUNK_SIZE]]
+            await db.task_frontier.insert_one({
+                "task_id": self.task_id,
+                "project_id": self.project_id,
+                "seq": seq,
+                "count": len(chunk),
+                "items": chunk,
+            })
+        return len(items)
+
+    async def _load_resume_state(self):
+        """读取来源任务的排空结果（种子源已放入的数量）"""
+        db = get_db()
+        source = await db.tasks.find_one({"_id": self.resume_from}, {"drain": 1})
+        self._seed_skip = ((source or {}).get("drain") or {}).get("seed_offset") or 0
+
+    async def _enqueue_saved(self):
+        """
+        恢复任务：按块读取来源任务保存的工作项放回 frontier
 
-    async def _execute_node(self, node_id: str, context: CrawlContext):
-        """递归执行节点"""
+        每块放回后即删除，停止时未读取的块由 _finish_stopped 转给本任务。
+        模板翻页的页面只抓取自身，不再生成后续页。
+        """
+        db = get_db()
+        cursor = db.task_frontier.find({"task_id": self.resume_from}).sort("seq", 1)
+        async for chunk in cursor:
+            if self._stop_flag:
+                self.frontier.defer(self._seed)
+                return
+            for doc in chunk["items"]:
+                item = load_item(doc, self.project_id, self.task_id)
+                if item.kind == "page":
+                    next_config = self.graph.next_for_list.get(item.node_id)
+                    if not next_config:
+                        continue
+                    item.pager = TemplatePager.detached(
+                        self.create_node_instance(next_config), item.context
+                    )
+                await self.frontier.put(item)
+            await db.task_frontier.delete_one({"_id": chunk["_id"]})
+
+    def _trace_fields(self) -> dict:
+        """任务文档中的追踪摘要字段（未开启追踪时为空）"""
+        if not self.tracer.enabled:
+            return {}
+        return {"trace_summary": self.tracer.summary()}
+
+    def _runtime_stats(self) -> dict:
+        """任务 stats 中的运行时状态：各主机并发与 frontier 大小"""
+        fields = {
+            "stats.concurrency": self.concurrency.snapshot(),
+            "stats.budget": self.budget.snapshot(),
+        }
+        if self.frontier is not None:
+            fields["stats.frontier"] = self.frontier.snapshot()
+        return fields
+
+    def _live_runtime(self) -> dict:
+        """随 stats 事件推送的运行时状态"""
+        runtime = {"budget": self.budget.snapshot()}
+        if self.frontier is not None:
+            runtime["frontier"] = self.frontier.snapshot()
+        return runtime
+
+    async def _drain(self):
+        """启动工作协程消费 frontier，直到没有待处理和进行中的工作项（或被停止）"""
+        self._workers = [
+            asyncio.ensure_future(self._worker()) for _ in range(self.frontier.workers)
+        ]
+        # 停止时被取消的工作协程视为正常结束
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    async def _worker(self):
+        """工作协程：按策略取出工作项执行，执行中产生的后续工作项放回 frontier"""
+        frontier = self.frontier
+        while True:
+            item = await frontier.get()
+            if item is None:
+                return
+            try:
+                if self._stop_flag:
+                    frontier.defer(item)
+                    await frontier.close()
+                    return
+                queue_wait = time.perf_counter() - item.enqueued
+                if item.kind == "resume":
+                    await self._enqueue_saved()
+                elif item.kind == "paginate":
+                    await self._paginate(item.node_id, item.context)
+                elif item.kind == "page":
+                    await self._fetch_template_page(item.node_id, item.context, item.pager)
+                else:
+                    await self._execute_node(item.node_id, item.context, queue_wait)
+            except asyncio.CancelledError:
+                # 停止宽限期结束后被取消：工作项未执行完，保存以便恢复
+                frontier.defer(item)
+                self._cancelled_items += 1
+                raise
+            except Exception as e:
+                if item is self._seed:
+                    self._seed_error = e
+                else:
+                    logger.warning("工作项 [%s] 执行异常: %s", item.node_id, e, exc_info=True)
+                    self.events.error(item.kind, f"工作项 [{item.node_id}] 执行异常: {e}")
+            finally:
+                await frontier.task_done()
+
+    async def _enqueue(self, node_id: str, context: CrawlContext, kind: str = "node"):
+        """把工作项加入 frontier（frontier 已满时等待，对扇出施加背压）"""
+        node_config = self.nodes.get(node_id)
+        terminal = bool(node_config) and node_config["node_type"] == "detail"
+        await self.frontier.put(WorkItem(node_id, context, kind=kind, terminal=terminal))
+
+    async def _execute_node(
+        self, node_id: str, context: CrawlContext, queue_wait: float = 0.0
+    ):
+        """
+        执行单个节点，并把后续节点作为工作项加入 frontier
+
+        Args:
+            node_id: 节点 ID
+            context: 爬取上下文
+            queue_wait: 在 frontier 中的等待耗时（秒），记入追踪 Span
+        """
         if self._stop_flag:
             return
 
@@ -140,178 +472,371 @@ class FlowManager:
             return
 
         node = self.create_node_instance(node_config)
-        result = await node.execute(context)
 
-        db = get_db()
+        if isinstance(node, StartNode) and node.seed_source() and not context.url:
+            # 种子模式：本工作项只负责把种子逐批放入 frontier，每个种子再执行一次起始页
+            await self._enqueue_seeds(node, context)
+            return
+
+        # 起始页直连流式列表页：跳过整页下载，由列表页边读边分发
+        if isinstance(node, StartNode):
+            stream_list = self._get_stream_list_node(node.callback_node_id)
+            if stream_list is not None:
+                await self._execute_stream_list(node, stream_list, context, queue_wait)
+                return
+
+        result = await self._run_node(node, context, queue_wait)
 
         if not result.success:
             # 记录错误但不中断整个流程
-            await db.tasks.update_one(
-                {"_id": self.task_id},
-                {"$inc": {"stats.errors": 1}},
-            )
-            logger.warning("节点 [%s] 执行失败: %s", node.name, result.error)
+            await self._report_error(node.node_type, f"节点 [{node.name}] 执行失败: {result.error}")
             return
 
         # 更新请求计数
-        await db.tasks.update_one(
-            {"_id": self.task_id},
-            {"$inc": {"stats.total_requests": 1}},
-        )
+        await self._inc_stats(node.node_type, total_requests=1)
 
         updated_context = result.context or context
 
         # 根据节点类型处理后续逻辑
         if node_config["node_type"] == "detail":
             # 详情页是终点，数据已入库
-            await db.tasks.update_one(
-                {"_id": self.task_id},
-                {"$inc": {"stats.total_items": 1}},
-            )
+            increments = {"total_items": 1}
+            if result.record_change:
+                # 变更检测：分别统计新增 / 变化 / 未变化的记录
+                increments[f"items_{result.record_change}"] = 1
+            await self._inc_stats(node.node_type, **increments)
+            if result.stored:
+                # max_items 计量实际写入的记录，去重跳过和内容未变化的不计
+                self.budget.charge_item()
             return
 
         if node_config["node_type"] == "list":
-            # 列表页：分裂出多个子任务（使用循环翻页，避免递归栈溢出）
+            # 列表页：分裂出多个子工作项，并登记翻页
             await self._handle_list_result(result, updated_context, node_config)
             return
 
         if node_config["node_type"] == "next":
             # 下一页：循环回调
-            await self._handle_next_result(result, updated_context)
+            await self._handle_next_result(node, result, updated_context)
             return
 
-        # 其他节点（start / intermediate）：直接流转到回调节点
+        # 其他节点（start / intermediate）：流转到回调节点
         if result.callback_node_id:
-            await self._execute_node(result.callback_node_id, updated_context)
+            await self._enqueue(result.callback_node_id, updated_context)
+
+    async def _enqueue_seeds(self, start_node: StartNode, context: CrawlContext):
+        """
+        按批读取种子源并放入 frontier
+
+        frontier 满时 put 等待，读取随之暂停，内存中只保留一批种子；
+        首批放入后工作协程即开始抓取，无需等待全部读完。
+        """
+        batches = iter_seed_batches(start_node.seed_source(), skip=self._seed_skip)
+        try:
+            async for batch in batches:
+                if self._stop_flag:
+                    # 未读完：保留本工作项，恢复时从 seed_offset 继续读取
+                    self.frontier.defer(WorkItem(start_node.node_id, context))
+                    return
+                for url in batch:
+                    await self._enqueue(start_node.node_id, context.clone(url=url))
+                    self._seeds_enqueued += 1
+                await self._inc_stats(start_node.node_type, seeds=len(batch))
+        finally:
+            await batches.aclose()
+            logger.info(
+                "种子读取结束，共放入 frontier %d 个 (任务: %s)", self._seeds_enqueued, self.task_id
+            )
 
     async def _handle_list_result(
         self, result: NodeResult, context: CrawlContext, list_node_config: dict
     ):
         """
-        处理列表页结果：并行处理子链接 + 迭代翻页
+        处理列表页结果：登记翻页工作项，再把子链接 / 数据项加入 frontier
 
-        使用 while 循环替代递归调用，避免深度翻页时栈溢出。
+        翻页作为独立工作项而非递归调用，深度翻页不会导致栈溢出。
+        先登记翻页再登记子项：dfs 下子项先出队（逐页处理），bfs 下翻页先出队（先展开列表）。
+        模板翻页只由首页生成后续各页，后续页本身不再翻页。
+        停止后加入的工作项进入 frontier.leftover 一并保存。
         """
-        current_result = result
-        current_context = context
-        db = get_db()
+        next_node_config = self._find_next_node_for_list(list_node_config)
+        if next_node_config:
+            next_node = self.create_node_instance(next_node_config)
+            if not next_node.is_template():
+                await self._enqueue(list_node_config["_id"], context, kind="paginate")
+            elif context.page_number == 1:
+                await self._start_template_pages(list_node_config["_id"], next_node, context)
+        await self._dispatch_children(result, context)
+
+    async def _start_template_pages(
+        self, list_node_id: str, next_node: NextPageNode, context: CrawlContext
+    ):
+        """模板翻页：一次性把后续各页（或前 window 页）加入 frontier，并发抓取"""
+        target_id = next_node.callback_node_id or list_node_id
+        pager = TemplatePager(next_node, context)
+        issued = 0
+        while pager.burst is None or issued < pager.burst:
+            if not await self._issue_template_page(target_id, pager):
+                break
+            issued += 1
+
+    async def _issue_template_page(self, list_node_id: str, pager: TemplatePager) -> bool:
+        """生成下一页并加入 frontier，翻页已结束时返回 False"""
+        page_context = pager.issue()
+        if page_context is None:
+            return False
+        await self.frontier.put(WorkItem(list_node_id, page_context, kind="page", pager=pager))
+        return True
+
+    async def _fetch_template_page(
+        self, list_node_id: str, context: CrawlContext, pager: TemplatePager
+    ):
+        """抓取一个模板生成的列表页；非空则分发子项并补充下一页，为空则结束翻页"""
+        list_node_config = self.nodes.get(list_node_id)
+        if not list_node_config:
+            return
+        if pager.skips(context.page_number):
+            # 更靠前的页已为空：已调度的后续页不再请求
+            return
 
-        while True:
-            if self._stop_flag:
-                return
+        next_node = pager.node
+        try:
+            with metrics.bind_labels(node_type="next"):
+                response = await fetch(
+                    url=context.url,
+                    method=context.method,
+                    headers=context.headers,
+                    cookies=context.cookies,
+                    body=context.body,
+                    content_type=next_node.request_config.get("content_type"),
+                    **next_node.fetch_limits(),
+                )
+        except Exception as e:
+            logger.warning("模板翻页请求失败（第 %d 页）: %s", context.page_number, e)
+            pager.stop(context.page_number)
+            return
+        page_context = context.clone(
+            html=response.text,
+            content_type="json" if "json" in response.headers.get("content-type", "") else "html",
+        )
 
-            # 1. 并行处理当前页的子链接 / 数据项
-            if (current_result.urls or current_result.items) and current_result.callback_node_id:
-                semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
-
-                async def process_url(url: str):
-                    async with semaphore:
-                        if self._stop_flag:
-                            return
-                        # 将列表页提取的附加字段（如作者）注入到子上下文的 parent_data
-                        extra_fields = current_result.url_data.get(url, {})
-                        if extra_fields:
-                            logger.info("FlowManager 传递透传数据: URL=%s, Data=%s", url, extra_fields)
-
-                        child_context = current_context.clone(
-                            url=url, html="", parent_data=extra_fields
-                        )
-                        await self._execute_node(current_result.callback_node_id, child_context)
-
-                async def process_item(item: dict):
-                    async with semaphore:
-                        if self._stop_flag:
-                            return
-                        # 生成虚拟 URL 和 JSON 内容
-                        virtual_url = f"data://{uuid.uuid4()}"
-                        content = json.dumps(item, ensure_ascii=False)
-
-                        child_context = current_context.clone(
-                            url=virtual_url,
-                            html=content,  # 将 JSON 数据作为页面内容
-                            content_type="json",
-                            source_url=current_context.url  # 记录来源
-                        )
-                        await self._execute_node(current_result.callback_node_id, child_context)
-
-                tasks = []
-                if current_result.urls:
-                    tasks.extend([process_url(url) for url in current_result.urls])
-                if current_result.items:
-                    tasks.extend([process_item(item) for item in current_result.items])
-
-                await asyncio.gather(*tasks, return_exceptions=True)
-
-            # 2. 查找是否有 NextPage 节点进行翻页
-            next_node_config = self._find_next_node_for_list(list_node_config)
-            if not next_node_config:
-                break  # 无翻页节点，结束循环
+        list_node = self.create_node_instance(list_node_config)
+        result = await self._run_node(list_node, page_context)
+        if not result.success:
+            await self._report_error(
+                list_node.node_type,
+                f"翻页后列表页执行失败（第 {context.page_number} 页）: {result.error}",
+            )
+            pager.stop(context.page_number)
+            return
+        await self._inc_stats(list_node.node_type, total_requests=1)
 
-            next_node = self.create_node_instance(next_node_config)
-            next_result = await next_node.execute(current_context)
+        if not (result.urls or result.items):
+            logger.info("模板翻页第 %d 页为空，停止生成后续页", context.page_number)
+            pager.stop(context.page_number)
+            return
 
-            if not next_result.success or not next_result.next_url:
-                break  # 翻页结束（无下一页或翻页失败）
+        # 先补充下一页再分发子项，让翻页请求与子项处理重叠
+        if pager.burst is not None:
+            await self._issue_template_page(list_node_id, pager)
+        await self._handle_list_result(result, result.context or page_context, list_node_config)
 
-            # 3. 获取下一页内容
-            try:
-                headers = current_context.headers
-                cookies = current_context.cookies
+    async def _paginate(self, list_node_id: str, context: CrawlContext):
+        """对一个已解析的列表页执行下一页节点，抓取下一页并重新执行列表页"""
+        list_node_config = self.nodes.get(list_node_id)
+        next_node_config = self._find_next_node_for_list(list_node_config)
+        if not next_node_config:
+            return
+
+        next_node = self.create_node_instance(next_node_config)
+        next_result = await self._run_node(next_node, context)
+
+        if not next_result.success or not next_result.next_url:
+            return  # 翻页结束（无下一页或翻页失败）
+
+        # 获取下一页内容
+        try:
+            with metrics.bind_labels(node_type="next"):
                 response = await fetch(
                     url=next_result.next_url,
-                    headers=headers,
-                    cookies=cookies,
-                )
-                next_context = (next_result.context or current_context).clone(
-                    url=next_result.next_url,
-                    html=response.text,
+                    headers=context.headers,
+                    cookies=context.cookies,
+                    **next_node.fetch_limits(),
                 )
-            except Exception as e:
-                logger.warning("翻页请求失败: %s", e)
-                break  # 翻页请求异常，结束循环
+            next_context = (next_result.context or context).clone(
+                url=next_result.next_url,
+                html=response.text,
+            )
+        except Exception as e:
+            logger.warning("翻页请求失败: %s", e)
+            return
 
-            # 4. 在新的页面上重新执行 ListNode，得到新结果
-            callback_id = next_node_config.get("callback_node_id") or list_node_config["_id"]
-            callback_config = self.nodes.get(callback_id)
-            if not callback_config:
-                break
+        # 在新的页面上重新执行 ListNode
+        callback_id = next_node_config.get("callback_node_id") or list_node_id
+        callback_config = self.nodes.get(callback_id)
+        if not callback_config:
+            return
 
-            list_node_instance = self.create_node_instance(callback_config)
-            new_list_result = await list_node_instance.execute(next_context)
+        list_node_instance = self.create_node_instance(callback_config)
+        new_list_result = await self._run_node(list_node_instance, next_context)
 
-            if not new_list_result.success:
-                await db.tasks.update_one(
-                    {"_id": self.task_id},
-                    {"$inc": {"stats.errors": 1}},
-                )
-                logger.warning("翻页后列表页执行失败: %s", new_list_result.error)
-                break
+        if not new_list_result.success:
+            await self._report_error(
+                list_node_instance.node_type, f"翻页后列表页执行失败: {new_list_result.error}"
+            )
+            return
 
-            # 更新请求计数
-            await db.tasks.update_one(
-                {"_id": self.task_id},
-                {"$inc": {"stats.total_requests": 1}},
+        # 更新请求计数
+        await self._inc_stats(list_node_instance.node_type, total_requests=1)
+
+        await self._handle_list_result(
+            new_list_result, new_list_result.context or next_context, list_node_config
+        )
+
+    async def _run_node(
+        self, node: BaseNode, context: CrawlContext, queue_wait: float = 0.0
+    ) -> NodeResult:
+        """执行单个节点（绑定指标标签并按采样率记录追踪 Span）"""
+        url = context.url or node.request_config.get("url", "")
+        with self._node_scope(node, url, queue_wait):
+            return await node.execute(context)
+
+    @contextmanager
+    def _node_scope(self, node: BaseNode, url: str, queue_wait: float = 0.0):
+        """节点执行的指标标签、追踪 Span 与 NODE_SECONDS 计时"""
+        with metrics.bind_labels(node_type=node.node_type):
+            with self.tracer.span(node.node_id, node.node_type, url, queue_wait):
+                with metrics.NODE_SECONDS.time():
+                    yield
+
+    async def _inc_stats(self, node_type: str, **increments):
+        """累加任务统计计数（记录数据库写入耗时），并按间隔附带刷新运行时状态"""
+        db = get_db()
+        self.events.inc(**increments)
+        update = {"$inc": {f"stats.{k}": v for k, v in increments.items()}}
+        now = time.monotonic()
+        if now - self._stats_flushed_at >= RUNTIME_STATS_FLUSH_INTERVAL:
+            self._stats_flushed_at = now
+            update["$set"] = self._runtime_stats()
+        with metrics.DB_WRITE_SECONDS.time(node_type=node_type):
+            await db.tasks.update_one({"_id": self.task_id}, update)
+
+    async def _report_error(self, node_type: str, message: str):
+        """记录节点错误（不中断整个流程）：累加错误计数、推送错误事件并写日志"""
+        await self._inc_stats(node_type, errors=1)
+        self.events.error(node_type, message)
+        logger.warning(message)
+
+    async def _report_record_failures(self, records: RecordWriter):
+        """
+        把批量写入失败的记录计入任务统计：从 total_items / items_new 中扣除未入库的记录，
+        计为错误并写入 error_message（任务仍按自身结果结束）
+        """
+        lost = records.failed + records.failed_touches
+        if not lost:
+            return
+        increments = {"errors": lost}
+        if records.failed:
+            increments["total_items"] = -records.failed
+        if records.failed_new:
+            increments["items_new"] = -records.failed_new
+        await self._inc_stats("detail", **increments)
+        message = f"{lost} 条采集记录写入数据库失败: {records.last_error}"
+        await get_db().tasks.update_one(
+            {"_id": self.task_id}, {"$set": {"error_message": message}}
+        )
+        self.events.error("detail", message)
+        logger.error("任务 %s %s", self.task_id, message)
+
+    def _get_stream_list_node(self, node_id: Optional[str]) -> Optional[ListPageNode]:
+        """若目标节点是开启流式解析的列表页，返回其实例"""
+        node_config = self.nodes.get(node_id) if node_id else None
+        if not node_config or node_config["node_type"] != "list":
+            return None
+        node = self.create_node_instance(node_config)
+        return node if node.stream_prefix() else None
+
+    async def _execute_stream_list(
+        self,
+        start_node: StartNode,
+        list_node: ListPageNode,
+        context: CrawlContext,
+        queue_wait: float = 0.0,
+    ):
+        """
+        流式列表：起始请求的响应体由列表页增量解析，每批条目解析完即加入 frontier
+
+        frontier 满时暂停读取下一批，读取速度受下游处理速度约束，
+        内存占用与 STREAM_BATCH_SIZE 和 frontier 上限相关而与响应大小无关。
+        流式模式不支持翻页（图校验拒绝带下一页节点的流式列表页）。
+        起始页和列表页各记一个 Span / NODE_SECONDS，列表页的耗时包含整个响应的读取。
+        """
+        with self._node_scope(start_node, start_node.target_url(context), queue_wait):
+            request_context = start_node.prepare(context)
+        if not request_context.url:
+            await self._report_error(
+                start_node.node_type, f"节点 [{start_node.name}] 执行失败: 起始页未配置 URL"
             )
+            return
+        # 子项不继承起始请求的方法、请求体和 Content-Type
+        parent_context = start_node.callback_context(context)
+
+        batches = list_node.iter_batches(request_context)
+        try:
+            with self._node_scope(list_node, request_context.url):
+                async for batch in batches:
+                    if self._stop_flag:
+                        break
+                    await self._dispatch_children(batch, parent_context)
+        except Exception as e:
+            await self._report_error(list_node.node_type, f"流式列表页 [{list_node.name}] 执行失败: {e}")
+            return
+        finally:
+            await batches.aclose()
 
-            # 5. 以新结果进入下一轮循环
-            current_result = new_list_result
-            current_context = new_list_result.context or next_context
+        await self._inc_stats(start_node.node_type, total_requests=1)
+
+    async def _dispatch_children(self, result: NodeResult, context: CrawlContext):
+        """把列表页结果中的子链接 / 数据项作为工作项加入 frontier"""
+        if not ((result.urls or result.items) and result.callback_node_id):
+            return
+
+        # 子项深度 = 列表页深度 + 1，超出预算的整批丢弃
+        depth = context.depth + 1
+        if not self.budget.allows_depth(depth, len(result.urls or ()) + len(result.items or ())):
+            return
+
+        for url in result.urls or ():
+            # 将列表页提取的附加字段（如作者）注入到子上下文的 parent_data
+            extra_fields = result.url_data.get(url, {})
+            if extra_fields:
+                logger.debug("FlowManager 传递透传数据: URL=%s, Data=%s", url, extra_fields)
+
+            child_context = context.clone(
+                url=url, html="", parent_data=extra_fields, depth=depth
+            )
+            await self._enqueue(result.callback_node_id, child_context)
+
+        for item in result.items or ():
+            # 虚拟 URL 取内容哈希，数据项以对象形式直接传递，不再序列化
+            child_context = context.clone(
+                url=make_data_url(item),
+                html="",
+                data=item,
+                depth=depth,
+                content_type="json",
+                source_url=context.url  # 记录来源
+            )
+            await self._enqueue(result.callback_node_id, child_context)
 
     def _find_next_node_for_list(self, list_node_config: dict) -> Optional[dict]:
-        """查找与列表页关联的下一页节点"""
-        for node in self.nodes.values():
-            if node["node_type"] == "next":
-                # 下一页节点的回调指向当前列表页，或者就在同一个项目中
-                if node.get("callback_node_id") == list_node_config["_id"]:
-                    return node
-        # 如果没有明确的回调指向，查找项目中的下一页节点
-        for node in self.nodes.values():
-            if node["node_type"] == "next":
-                return node
-        return None
-
-    async def _handle_next_result(self, result: NodeResult, context: CrawlContext):
-        """处理下一页结果：循环回调"""
+        """查找与列表页关联的下一页节点（编译图中预先计算）"""
+        return self.graph.next_for_list.get(list_node_config["_id"])
+
+    async def _handle_next_result(
+        self, node: BaseNode, result: NodeResult, context: CrawlContext
+    ):
+        """处理下一页结果：抓取下一页后回调目标节点"""
         if self._stop_flag:
             return
 
@@ -319,51 +844,28 @@ class FlowManager:
             try:
                 headers = context.headers
                 cookies = context.cookies
-                response = await fetch(
-                    url=result.next_url,
-                    headers=headers,
-                    cookies=cookies,
-                )
+                with metrics.bind_labels(node_type="next"):
+                    response = await fetch(
+                        url=result.next_url,
+                        headers=headers,
+                        cookies=cookies,
+                        **node.fetch_limits(),
+                    )
                 next_context = context.clone(
                     url=result.next_url,
                     html=response.text,
                 )
-                await self._execute_node(result.callback_node_id, next_context)
             except Exception as e:
                 logger.warning("下一页请求失败: %s", e)
+                return
+            await self._enqueue(result.callback_node_id, next_context)
 
     async def validate(self) -> list[str]:
         """
-        验证工作流合法性
+        验证工作流合法性（校验在编译节点图时完成并随之缓存）
 
         Returns:
             错误信息列表，空列表表示合法
         """
-        errors = []
         await self.load_nodes()
-
-        if not self.nodes:
-            errors.append("项目没有配置任何节点")
-            return errors
-
-        # 检查起始节点
-        start_node = self.get_start_node()
-        if not start_node:
-            errors.append("缺少起始页节点")
-
-        # 检查悬空的 callback 引用
-        for node in self.nodes.values():
-            cb_id = node.get("callback_node_id")
-            if cb_id and cb_id not in self.nodes:
-                errors.append(
-                    f"节点 [{node['name']}] 的回调目标 {cb_id} 不存在"
-                )
-
-        # 检查详情页节点是否有 callback（不应该有）
-        for node in self.nodes.values():
-            if node["node_type"] == "detail" and node.get("callback_node_id"):
-                errors.append(
-                    f"详情页节点 [{node['name']}] 不应配置回调目标"
-                )
-
-        return errors
+        return list(self.graph.errors)
@@ -0,0 +1,223 @@
+"""
+爬取前沿（Frontier）
+FlowManager 的待处理工作项队列，决定节点的执行顺序并对扇出施加背压。
+
+排序策略：
+- dfs（默认）：后进先出。列表页的子项先于翻页处理，与原先"处理完一页再翻页"的顺序一致
+- bfs：先进先出，按层展开，翻页和列表扩展优先
+- terminal_first：终点节点（详情页）优先，尽早入库并释放内存，其余先进先出
+
+容量上限为软上限：队列满时生产者（列表页扩展、翻页、流式列表）等待，
+但始终保留至少一个工作协程不被阻塞，保证消费不停顿、不会死锁。
+
+关闭（停止任务）后，队列中剩余的、关闭后才加入的以及被取消的工作项都收集在
+leftover 中，由 FlowManager 序列化保存（dump_item / load_item），用于恢复任务。
+"""
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from app.engine.context import CrawlContext
+from app.utils import metrics
+
+
+@dataclass
+class WorkItem:
+    """一个待执行的工作项"""
+    node_id: str
+    context: CrawlContext
+    kind: str = "node"  # node: 执行节点；paginate: 对列表页翻页；page: 抓取模板翻页生成的列表页
+    terminal: bool = False  # 目标节点是否为终点（详情页）
+    pager: Any = None  # kind="page" 时所属的 TemplatePager
+    enqueued: float = field(default_factory=time.perf_counter)
+
+
+class _Policy(ABC):
+    """排序策略基类：维护待处理工作项"""
+
+    def __init__(self):
+        self._items: deque[WorkItem] = deque()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def push(self, item: WorkItem):
+        self._items.append(item)
+
+    @abstractmethod
+    def pop(self) -> WorkItem:
+        """取出下一个工作项（调用方保证非空）"""
+        pass
+
+    def drain(self) -> list[WorkItem]:
+        """取出全部工作项（不保证顺序）"""
+        items = list(self._items)
+        self._items.clear()
+        return items
+
+
+class BreadthFirst(_Policy):
+    def pop(self) -> WorkItem:
+        return self._items.popleft()
+
+
+class DepthFirst(_Policy):
+    def pop(self) -> WorkItem:
+        return self._items.pop()
+
+
+class TerminalFirst(_Policy):
+    def __init__(self):
+        super().__init__()
+        self._terminal: deque[WorkItem] = deque()
+
+    def __len__(self) -> int:
+        return len(self._items) + len(self._terminal)
+
+    def push(self, item: WorkItem):
+        (self._terminal if item.terminal else self._items).append(item)
+
+    def pop(self) -> WorkItem:
+        return (self._terminal or self._items).popleft()
+
+    def drain(self) -> list[WorkItem]:
+        items = list(self._terminal) + super().drain()
+        self._terminal.clear()
+        return items
+
+
+# 策略名 → 实现，新增策略在此注册
+POLICIES: dict[str, type[_Policy]] = {
+    "bfs": BreadthFirst,
+    "dfs": DepthFirst,
+    "terminal_first": TerminalFirst,
+}
+
+
+class Frontier:
+    """
+    带软上限的工作项队列
+
+    Args:
+        policy: 排序策略名（见 POLICIES）
+        max_size: 软上限，0 为不限制
+        workers: 消费该队列的工作协程数（用于判断是否还能阻塞生产者）
+    """
+
+    def __init__(self, policy: str, max_size: int, workers: int):
+        if policy not in POLICIES:
+            raise ValueError(f"未知的爬取顺序策略: {policy}")
+        self.policy = policy
+        self.max_size = max_size
+        self.workers = workers
+        self.peak = 0
+        self._queue = POLICIES[policy]()
+        self._cond = asyncio.Condition()
+        self._unfinished = 0
+        self._blocked = 0
+        self._closed = False
+        self.leftover: list[WorkItem] = []  # 关闭后未执行的工作项
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    async def put(self, item: WorkItem):
+        """加入工作项；队列已满时等待，除非其余工作协程都已阻塞在 put 上"""
+        async with self._cond:
+            while (
+                self.max_size
+                and len(self._queue) >= self.max_size
+                and self._blocked + 1 < self.workers
+                and not self._closed
+            ):
+                self._blocked += 1
+                try:
+                    await self._cond.wait()
+                finally:
+                    self._blocked -= 1
+            if self._closed:
+                self.leftover.append(item)
+                return
+            item.enqueued = time.perf_counter()
+            self._queue.push(item)
+            self._unfinished += 1
+            self.peak = max(self.peak, len(self._queue))
+            metrics.QUEUE_DEPTH.inc()
+            self._cond.notify_all()
+
+    async def get(self) -> Optional[WorkItem]:
+        """取出下一个工作项；队列为空且没有进行中的工作项（或已关闭）时返回 None"""
+        async with self._cond:
+            while not len(self._queue):
+                if self._unfinished == 0 or self._closed:
+                    return None
+                await self._cond.wait()
+            if self._closed:
+                return None
+            item = self._queue.pop()
+            metrics.QUEUE_DEPTH.dec()
+            self._cond.notify_all()
+            return item
+
+    async def task_done(self):
+        """标记一个工作项处理完毕（其派生的工作项应在此之前 put）"""
+        async with self._cond:
+            self._unfinished -= 1
+            if self._unfinished == 0:
+                self._cond.notify_all()
+
+    async def close(self):
+        """停止：剩余工作项移入 leftover，并唤醒所有等待方"""
+        async with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            metrics.QUEUE_DEPTH.dec(len(self._queue))
+            self.leftover.extend(self._queue.drain())
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def defer(self, item: WorkItem):
+        """记录一个已取出但未执行完的工作项（停止时被跳过或取消）"""
+        self.leftover.append(item)
+
+    def snapshot(self) -> dict:
+        return {
+            "policy": self.policy,
+            "size": len(self._queue),
+            "peak": self.peak,
+            "max_size": self.max_size,
+        }
+
+
+# 保存时保留的上下文字段；html 只有翻页工作项需要（从列表页提取下一页链接）
+_SAVED_CONTEXT_FIELDS = (
+    "url", "method", "headers", "cookies", "body", "content_type",
+    "parent_data", "depth", "page_number", "source_url", "data",
+)
+
+
+def dump_item(item: WorkItem) -> dict:
+    """序列化工作项（用于停止时保存 frontier）"""
+    context = {name: getattr(item.context, name) for name in _SAVED_CONTEXT_FIELDS}
+    if item.kind == "paginate":
+        context["html"] = item.context.html
+    return {
+        "node_id": item.node_id,
+        "kind": item.kind,
+        "terminal": item.terminal,
+        "context": context,
+    }
+
+
+def load_item(doc: dict, project_id: str, task_id: str) -> WorkItem:
+    """反序列化工作项，归属到新任务（kind="page" 的 pager 需由调用方重建）"""
+    context = CrawlContext(project_id=project_id, task_id=task_id, **doc["context"])
+    return WorkItem(doc["node_id"], context, kind=doc["kind"], terminal=doc["terminal"])
@@ -0,0 +1,169 @@
+"""
+工作流图编译与缓存
+把项目的节点配置编译为带索引的只读结构：起始节点、回调邻接表、列表页 → 下一页映射，
+同时完成合法性校验（含回调环检测）。
+
+编译结果按项目的 graph_version 缓存：节点的增删改和回调设置都会通过
+bump_graph_version() 递增版本号，重复运行和预览只需一次轻量查询即可复用缓存。
+"""
+
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.database import get_db
+from app.engine.nodes.list_page import ListPageNode
+
+logger = logging.getLogger(__name__)
+
+# 最多缓存的项目图数量
+GRAPH_CACHE_SIZE = 256
+
+
+@dataclass
+class CompiledGraph:
+    """
+    编译后的项目节点图（只读，多个任务共享，请勿修改其中的节点配置）
+
+    Attributes:
+        nodes: node_id → 节点配置
+        start_node: 起始节点配置
+        callbacks: node_id → 回调节点 ID
+        next_for_list: 列表页 node_id → 对应的下一页节点配置
+        errors: 校验错误，空列表表示合法
+    """
+    project_id: str
+    version: int
+    nodes: dict[str, dict]
+    start_node: Optional[dict] = None
+    callbacks: dict[str, Optional[str]] = field(default_factory=dict)
+    next_for_list: dict[str, dict] = field(default_factory=dict)
+    errors: list[str] = field(default_factory=list)
+
+
+def compile_graph(project_id: str, version: int, node_docs: list[dict]) -> CompiledGraph:
+    """编译节点列表并校验"""
+    nodes = {doc["_id"]: doc for doc in node_docs}
+    graph = CompiledGraph(project_id=project_id, version=version, nodes=nodes)
+    graph.callbacks = {node_id: doc.get("callback_node_id") for node_id, doc in nodes.items()}
+
+    next_nodes = [doc for doc in nodes.values() if doc["node_type"] == "next"]
+    for doc in nodes.values():
+        if doc["node_type"] == "start" and graph.start_node is None:
+            graph.start_node = doc
+        if doc["node_type"] == "list" and next_nodes:
+            # 回调指向该列表页的下一页节点优先，否则取项目中任意一个下一页节点
+            graph.next_for_list[doc["_id"]] = next(
+                (n for n in next_nodes if n.get("callback_node_id") == doc["_id"]),
+                next_nodes[0],
+            )
+
+    graph.errors = _validate(graph)
+    return graph
+
+
+def _validate(graph: CompiledGraph) -> list[str]:
+    errors = []
+    if not graph.nodes:
+        errors.append("项目没有配置任何节点")
+        return errors
+
+    # 检查起始节点
+    if graph.start_node is None:
+        errors.append("缺少起始页节点")
+
+    # 检查悬空的 callback 引用
+    for node in graph.nodes.values():
+        cb_id = node.get("callback_node_id")
+        if cb_id and cb_id not in graph.nodes:
+            errors.append(f"节点 [{node['name']}] 的回调目标 {cb_id} 不存在")
+
+    # 检查详情页节点：不应有 callback，开启变更检测时需要去重键
+    for node in graph.nodes.values():
+        if node["node_type"] == "detail" and node.get("callback_node_id"):
+            errors.append(f"详情页节点 [{node['name']}] 不应配置回调目标")
+        rules = node.get("parse_rules") or {}
+        if rules.get("change_detection") and rules.get("deduplication_type", "none") == "none":
+            errors.append(f"详情页节点 [{node['name']}] 开启变更检测时必须设置去重策略")
+
+    # 流式列表页（起始页直连、开启 stream_items）不翻页：配置的下一页节点不会生效
+    start_callback = graph.nodes.get((graph.start_node or {}).get("callback_node_id"))
+    if (
+        start_callback is not None
+        and start_callback["node_type"] == "list"
+        and start_callback["_id"] in graph.next_for_list
+        and ListPageNode(start_callback).stream_prefix()
+    ):
+        errors.append(
+            f"列表页节点 [{start_callback['name']}] 开启了流式解析，不支持翻页："
+            "请关闭流式解析或移除下一页节点"
+        )
+
+    errors.extend(_find_cycles(graph))
+    return errors
+
+
+def _find_cycles(graph: CompiledGraph) -> list[str]:
+    """
+    检测回调环（下一页节点的回调是受 max_pages 约束的翻页循环，不计入）
+
+    每个节点至多一条回调边，沿回调链行走即可找出所有环。
+    """
+    errors = []
+    state: dict[str, int] = {}  # 1: 当前路径上；2: 已确认无环
+    for node_id in graph.nodes:
+        path = []
+        current = node_id
+        while current in graph.nodes:
+            if state.get(current) == 2:
+                break
+            if state.get(current) == 1:
+                cycle = path[path.index(current):] + [current]
+                names = " → ".join(graph.nodes[n]["name"] for n in cycle)
+                errors.append(f"节点回调存在循环: {names}")
+                break
+            state[current] = 1
+            path.append(current)
+            if graph.nodes[current]["node_type"] == "next":
+                break
+            current = graph.callbacks.get(current)
+        for visited in path:
+            state[visited] = 2
+    return errors
+
+
+_cache: "OrderedDict[str, CompiledGraph]" = OrderedDict()
+
+
+async def load_graph(project_id: str) -> CompiledGraph:
+    """获取项目的编译图（版本号未变化时直接复用缓存）"""
+    db = get_db()
+    project = await db.projects.find_one({"_id": project_id}, {"graph_version": 1})
+    version = (project or {}).get("graph_version", 0)
+
+    cached = _cache.get(project_id)
+    if cached is not None and cached.version == version:
+        _cache.move_to_end(project_id)
+        return cached
+
+    node_docs = [doc async for doc in db.nodes.find({"project_id": project_id})]
+    graph = compile_graph(project_id, version, node_docs)
+    _cache[project_id] = graph
+    _cache.move_to_end(project_id)
+    while len(_cache) > GRAPH_CACHE_SIZE:
+        _cache.popitem(last=False)
+    logger.debug("项目 %s 节点图已编译（版本 %s，%d 个节点）", project_id, version, len(node_docs))
+    return graph
+
+
+async def bump_graph_version(project_id: str):
+    """节点配置变更后递增项目图版本，使各进程的缓存失效"""
+    db = get_db()
+    await db.projects.update_one({"_id": project_id}, {"$inc": {"graph_version": 1}})
+    _cache.pop(project_id, None)
+
+
+def invalidate_graph(project_id: str):
+    """丢弃本进程中的缓存（如项目被删除）"""
+    _cache.pop(project_id, None)
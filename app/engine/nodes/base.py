@@ -22,6 +22,8 @@ class NodeResult:
         callback_node_id: 下一步流转到的节点 ID
         context: 更新后的上下文
         error: 错误信息
+        record_change: 变更检测结果 new / changed / unchanged（DetailPage 用）
+        stored: 是否写入了记录（新增或内容变化；去重跳过、内容未变化为 False）
     """
     success: bool = True
     urls: list[str] = field(default_factory=list)
@@ -32,6 +34,8 @@ class NodeResult:
     callback_node_id: Optional[str] = None
     context: Optional[CrawlContext] = None
     error: Optional[str] = None
+    record_change: Optional[str] = None
+    stored: bool = False
 
 
 class BaseNode(ABC):
@@ -70,6 +74,13 @@ class BaseNode(ABC):
             cookies.update(self.request_config.get("cookies"))
         return cookies
 
+    def fetch_limits(self) -> dict:
+        """节点级响应体限制，作为 fetch() 的关键字参数（未配置时使用全局默认）"""
+        return {
+            "max_bytes": self.request_config.get("max_body_size"),
+            "allowed_content_types": self.request_config.get("allowed_content_types"),
+        }
+
     @abstractmethod
     async def execute(self, context: CrawlContext) -> NodeResult:
         pass
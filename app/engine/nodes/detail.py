@@ -1,3 +1,4 @@
+import hashlib
 import uuid
 import logging
 from datetime import datetime, timezone
@@ -8,9 +9,19 @@ from app.engine.context import CrawlContext
 from app.engine.parser import UniversalParser
 from app.utils.http_client import fetch
 from app.database import get_db
+from app.storage.records import current_record_writer
+from app.utils import json_codec, logs, metrics, tracing
 
 logger = logging.getLogger(__name__)
 
+# 变更检测读取已有记录时只需要的字段
+_CHANGE_PROJECTION = {"content_hash": 1, "first_seen": 1, "crawled_at": 1}
+
+
+def content_digest(data: dict) -> str:
+    """提取结果的稳定哈希（键排序后序列化，与字段顺序无关）"""
+    return hashlib.sha1(json_codec.canonical_bytes(data)).hexdigest()
+
 
 class DetailNode(BaseNode):
     async def execute(self, context: CrawlContext) -> NodeResult:
@@ -18,10 +29,12 @@ class DetailNode(BaseNode):
         
         # 1. 请求页面
         content_type = "html"
+        data = None
         if context.url.startswith("data://"):
             html = context.html
+            data = context.data
             content_type = "json"
-            logger.info("处理 data:// 协议，跳过网络请求: %s", context.url)
+            logger.debug("处理 data:// 协议，跳过网络请求: %s", context.url)
         else:
             try:
                 response = await fetch(
@@ -29,25 +42,26 @@ class DetailNode(BaseNode):
                     method=self.request_config.get("method", "GET"),
                     headers=self.merge_headers(context.headers),
                     cookies=self.merge_cookies(context.cookies),
-                    body=self.request_config.get("body")
+                    body=self.request_config.get("body"),
+                    **self.fetch_limits(),
                 )
                 html = response.text
             except Exception as e:
                 return NodeResult(success=False, error=str(e), context=context)
 
         # 2. 解析数据
-        parser = UniversalParser(html, content_type=content_type)
         extracted_data = {}
-        
-        field_rules = self.parse_rules.get("fields", [])
-        for rule in field_rules:
-            name = rule.get("name")
-            selector = rule.get("selector")
-            selector_type = rule.get("selector_type", "xpath")
-            if name and selector:
-                value = parser.extract_first(selector, selector_type)
-                if value:
-                    extracted_data[name] = value
+        with tracing.measure(metrics.PARSE_SECONDS, "parse"):
+            parser = UniversalParser(html, content_type=content_type, data=data)
+            field_rules = self.parse_rules.get("fields", [])
+            for rule in field_rules:
+                name = rule.get("name")
+                selector = rule.get("selector")
+                selector_type = rule.get("selector_type", "xpath")
+                if name and selector:
+                    value = parser.extract_first(selector, selector_type)
+                    if value:
+                        extracted_data[name] = value
 
         # 合并父节点传递的数据
         if context.parent_data:
@@ -61,7 +75,11 @@ class DetailNode(BaseNode):
             return NodeResult(success=False, error="数据库未连接", context=context)
 
         should_save = True
+        existing = None
+        writer = current_record_writer()
         dedup_type = self.parse_rules.get("deduplication_type", "none")
+        # 变更检测：去重键命中已有记录时按内容哈希决定是否更新，而不是跳过
+        change_detection = bool(self.parse_rules.get("change_detection")) and dedup_type != "none"
         
         if dedup_type != "none":
             query = {"project_id": context.project_id}
@@ -73,25 +91,84 @@ class DetailNode(BaseNode):
                     query[f"data.{field}"] = extracted_data[field]
             
             if len(query) > 1:
-                existing = await db.data_store.find_one(query)
-                if existing:
+                # 尚在写入缓冲区中的记录也参与去重（本任务内已经处理过）
+                if writer is not None and writer.pending(query):
                     should_save = False
-                    logger.info(f"Duplicate found for {context.url}")
+                else:
+                    projection = _CHANGE_PROJECTION if change_detection else None
+                    with tracing.measure(phase="persist"):
+                        existing = await db.data_store.find_one(query, projection)
+                    if existing and not change_detection:
+                        should_save = False
+                if not should_save:
+                    metrics.DEDUP_SKIPPED.inc()
+                    logs.trace("record.duplicate", url=context.url)
 
-        if should_save:
+        record_change = None
+        now = datetime.now(timezone.utc)
+        if should_save and existing:
+            # 变更检测：更新已有记录
+            content_hash = content_digest(extracted_data)
+            if existing.get("content_hash") == content_hash:
+                record_change = "unchanged"
+                if writer is not None:
+                    with tracing.measure(phase="persist"):
+                        await writer.touch(existing["_id"])
+                else:
+                    with tracing.measure(metrics.DB_WRITE_SECONDS, "persist"):
+                        await db.data_store.update_one(
+                            {"_id": existing["_id"]}, {"$set": {"last_seen": now}}
+                        )
+            else:
+                record_change = "changed"
+                update = {
+                    "task_id": context.task_id,
+                    "node_id": self.config.get("_id"),
+                    "source_url": context.url,
+                    "crawled_at": now,
+                    "data": extracted_data,
+                    "content_hash": content_hash,
+                    "last_seen": now,
+                    "changed_at": now,
+                }
+                if "first_seen" not in existing:
+                    # 开启变更检测之前入库的记录
+                    update["first_seen"] = existing.get("crawled_at") or now
+                with tracing.measure(metrics.DB_WRITE_SECONDS, "persist"):
+                    await db.data_store.update_one({"_id": existing["_id"]}, {"$set": update})
+                logs.trace("record.changed", url=context.url)
+        elif should_save:
             record = {
                 "project_id": context.project_id,
                 "task_id": context.task_id,
                 "node_id": self.config.get("_id"),
                 "source_url": context.url,
-                "crawled_at": datetime.now(timezone.utc),
+                "crawled_at": now,
                 "data": extracted_data,
             }
-            await db.data_store.insert_one(record)
-            logger.info("详情页数据入库: URL=%s, Keys=%s", context.url, list(extracted_data.keys()))
+            if change_detection:
+                record_change = "new"
+                record.update(
+                    content_hash=content_digest(extracted_data),
+                    first_seen=now,
+                    last_seen=now,
+                    changed_at=now,
+                )
+            if writer is not None:
+                # 批量写入：缓冲区满时由本次调用写入，耗时计入 DB_WRITE_SECONDS
+                with tracing.measure(phase="persist"):
+                    await writer.add(record)
+            else:
+                with tracing.measure(metrics.DB_WRITE_SECONDS, "persist"):
+                    await db.data_store.insert_one(record)
+            logs.trace("record.saved", url=context.url, keys=list(extracted_data))
+        if record_change:
+            metrics.RECORD_CHANGES.inc(result=record_change)
 
         return NodeResult(
             success=True,
-            extracted_data=extracted_data,
-            context=context
+            data=extracted_data,
+            context=context,
+            record_change=record_change,
+            stored=should_save and record_change != "unchanged",
         )
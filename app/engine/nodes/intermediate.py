@@ -7,6 +7,7 @@ from app.engine.nodes.base import BaseNode, NodeResult
 from app.engine.context import CrawlContext
 from app.engine.parser import UniversalParser
 from app.utils.http_client import fetch
+from app.utils import metrics, tracing
 
 
 class IntermediateNode(BaseNode):
@@ -38,6 +39,7 @@ class IntermediateNode(BaseNode):
             response = await fetch(
                 url=url, method=method,
                 headers=headers, cookies=cookies, body=body,
+                **self.fetch_limits(),
             )
 
             resp_content_type = response.headers.get("content-type", "")
@@ -54,15 +56,16 @@ class IntermediateNode(BaseNode):
 
             # 如果配置了解析规则，提取中间数据存入 parent_data
             if self.parse_rules.get("fields"):
-                parser = UniversalParser(response.text, ct)
                 parent_data = dict(context.parent_data)
-                for field_rule in self.parse_rules["fields"]:
-                    value = parser.extract_first(
-                        field_rule["selector"],
-                        field_rule.get("selector_type", "xpath"),
-                    )
-                    if value:
-                        parent_data[field_rule["name"]] = value
+                with tracing.measure(metrics.PARSE_SECONDS, "parse"):
+                    parser = UniversalParser(response.text, ct)
+                    for field_rule in self.parse_rules["fields"]:
+                        value = parser.extract_first(
+                            field_rule["selector"],
+                            field_rule.get("selector_type", "xpath"),
+                        )
+                        if value:
+                            parent_data[field_rule["name"]] = value
                 new_context = new_context.clone(parent_data=parent_data)
 
             return NodeResult(
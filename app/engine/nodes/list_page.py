@@ -4,10 +4,14 @@
 支持从列表项中提取非链接字段（如作者），通过 url_data 透传给详情页
 """
 
+from typing import AsyncIterator, Optional
 from urllib.parse import urljoin
+from app.config import STREAM_BATCH_SIZE
 from app.engine.nodes.base import BaseNode, NodeResult
 from app.engine.context import CrawlContext
-from app.engine.parser import UniversalParser
+from app.engine.parser import UniversalParser, jsonpath_to_stream_prefix, stream_json_items
+from app.utils import metrics, tracing
+from app.utils.http_client import open_stream
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,47 +33,41 @@ class ListPageNode(BaseNode):
         if not html:
             return NodeResult(success=False, error="列表页没有收到 HTML 内容")
 
+        with tracing.measure(metrics.PARSE_SECONDS, "parse"):
+            return self._parse(context)
+
+    def _parse(self, context: CrawlContext) -> NodeResult:
+        """解析列表页，提取子链接 / 数据项"""
+        html = context.html
         parser = UniversalParser(html, context.content_type)
         parser_type = self.parse_rules.get("parser_type", "xpath")
 
         item_selector = self.parse_rules.get("item_selector", "")
         link_selector = self.parse_rules.get("link_selector", "")
-        link_selector_type = self.parse_rules.get("link_selector_type", parser_type)
+        link_selector_type = self.parse_rules.get("link_selector_type") or parser_type
 
         urls = []
         url_data = {}   # URL → {field_name: value, ...}
         node_items = []
+        seen = set()
 
         if item_selector:
             # 模式 1：先选中列表项容器
-            item_selector_type = self.parse_rules.get("item_selector_type", parser_type)
+            item_selector_type = self.parse_rules.get("item_selector_type") or parser_type
             items = parser.extract_items(item_selector, item_selector_type)
 
             for item_parser in items:
-                # ── 提取链接 ──
-                if link_selector:
-                    links = item_parser.extract(link_selector, link_selector_type)
-                    for link in links:
-                        full_url = urljoin(context.url, link)
-                        if full_url not in urls:
-                            urls.append(full_url)
-
-                            # ── 提取非链接字段（如作者、日期等），绑定到该 URL ──
-                            extra_fields = self._extract_non_link_fields(item_parser, parser_type)
-                            if extra_fields:
-                                url_data[full_url] = extra_fields
-                                logger.info("列表页透传数据提取成功: URL=%s, Data=%s", full_url, extra_fields)
-                else:
-                    # 如果没有配置 link_selector，且是 JSON 模式，则视为数据透传
-                    if item_selector_type == "jsonpath" and item_parser._json_data:
-                        node_items.append(item_parser._json_data)
+                self._collect_item(
+                    item_parser, item_selector_type, context, seen, urls, url_data, node_items
+                )
 
         elif link_selector:
             # 模式 2：直接用 link_selector 提取所有链接（无 item 容器，无法提取附加字段）
             links = parser.extract(link_selector, link_selector_type)
             for link in links:
                 full_url = urljoin(context.url, link)
-                if full_url not in urls:
+                if full_url not in seen:
+                    seen.add(full_url)
                     urls.append(full_url)
 
         # 同时处理 fields 中 is_link=True 的字段
@@ -81,7 +79,8 @@ class ListPageNode(BaseNode):
                 )
                 for link in links:
                     full_url = urljoin(context.url, link)
-                    if full_url not in urls:
+                    if full_url not in seen:
+                        seen.add(full_url)
                         urls.append(full_url)
 
         return NodeResult(
@@ -93,6 +92,93 @@ class ListPageNode(BaseNode):
             context=context,
         )
 
+    def _collect_item(
+        self,
+        item_parser: UniversalParser,
+        item_selector_type: str,
+        context: CrawlContext,
+        seen: set,
+        urls: list,
+        url_data: dict,
+        node_items: list,
+    ):
+        """处理单个列表项：提取链接及透传字段，或作为 data:// 数据项"""
+        parser_type = self.parse_rules.get("parser_type", "xpath")
+        link_selector = self.parse_rules.get("link_selector", "")
+        link_selector_type = self.parse_rules.get("link_selector_type") or parser_type
+
+        # ── 提取链接 ──
+        if link_selector:
+            links = item_parser.extract(link_selector, link_selector_type)
+            for link in links:
+                full_url = urljoin(context.url, link)
+                if full_url not in seen:
+                    seen.add(full_url)
+                    urls.append(full_url)
+
+                    # ── 提取非链接字段（如作者、日期等），绑定到该 URL ──
+                    extra_fields = self._extract_non_link_fields(item_parser, parser_type)
+                    if extra_fields:
+                        url_data[full_url] = extra_fields
+                        logger.debug("列表页透传数据提取成功: URL=%s, Data=%s", full_url, extra_fields)
+        else:
+            # 如果没有配置 link_selector，且是 JSON 模式，则视为数据透传
+            if item_selector_type == "jsonpath" and item_parser._json_data:
+                node_items.append(item_parser._json_data)
+
+    def stream_prefix(self) -> Optional[str]:
+        """
+        流式模式下的 ijson prefix
+
+        仅当开启 stream_items 且列表项选择器为可流式解析的 JsonPath 时返回，
+        否则返回 None（按普通模式整页解析）。
+        """
+        if not self.parse_rules.get("stream_items"):
+            return None
+        parser_type = self.parse_rules.get("parser_type", "xpath")
+        item_selector = self.parse_rules.get("item_selector") or ""
+        item_selector_type = self.parse_rules.get("item_selector_type") or parser_type
+        if item_selector_type != "jsonpath":
+            return None
+        return jsonpath_to_stream_prefix(item_selector)
+
+    async def iter_batches(self, context: CrawlContext) -> AsyncIterator[NodeResult]:
+        """
+        流式模式：边下载边解析列表项，按批产出 NodeResult
+
+        context 需携带请求信息（url / method / headers / cookies / body），
+        响应体由本节点直接从网络流读取，不经过 context.html。
+        每批结果只包含该批的链接 / 数据项，内存占用与批大小相关。
+        """
+        prefix = self.stream_prefix()
+        seen = set()
+        async with open_stream(
+            context.url,
+            method=context.method,
+            headers=context.headers,
+            cookies=context.cookies,
+            body=context.body,
+            allowed_content_types=self.request_config.get("allowed_content_types"),
+        ) as response:
+            async for batch in stream_json_items(
+                response.aiter_bytes(), prefix, STREAM_BATCH_SIZE
+            ):
+                urls, url_data, node_items = [], {}, []
+                with tracing.measure(metrics.PARSE_SECONDS, "parse"):
+                    for item in batch:
+                        self._collect_item(
+                            UniversalParser(data=item), "jsonpath",
+                            context, seen, urls, url_data, node_items,
+                        )
+                yield NodeResult(
+                    success=True,
+                    urls=urls,
+                    url_data=url_data,
+                    items=node_items,
+                    callback_node_id=self.callback_node_id,
+                    context=context,
+                )
+
     def _extract_non_link_fields(self, item_parser: UniversalParser, default_type: str) -> dict:
         """
         从单个列表项中提取非链接字段（如作者、日期等）
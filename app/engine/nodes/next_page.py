@@ -1,12 +1,17 @@
 """
 下一页节点（NextPage）
 负责提取翻页 URL，实现"递归"或"循环"回目标节点
+
+template 模式下不提取链接，由 TemplatePager 按模板生成后续各页的请求，
+FlowManager 并发抓取这些页面（见 PaginationConfig）。
 """
 
+from typing import Optional
 from urllib.parse import urljoin
 from app.engine.nodes.base import BaseNode, NodeResult
 from app.engine.context import CrawlContext
 from app.engine.parser import UniversalParser
+from app.utils import metrics, tracing
 
 
 class NextPageNode(BaseNode):
@@ -19,11 +24,47 @@ class NextPageNode(BaseNode):
     3. 返回下一页 URL，FlowManager 将其回调到目标节点（通常是 ListPage）
     """
 
+    def is_template(self) -> bool:
+        """是否为模板翻页"""
+        return (self.pagination or {}).get("mode") == "template"
+
+    def template_context(self, context: CrawlContext, page_number: int) -> Optional[CrawlContext]:
+        """
+        按模板生成第 page_number 页（首页为 1）的请求上下文
+
+        Returns:
+            带 url / method / body 的上下文；超出 end 或 max_pages 时返回 None
+        """
+        pagination = self.pagination or {}
+        if page_number > pagination.get("max_pages", 10):
+            return None
+        value = pagination.get("start", 2) + (page_number - 2) * pagination.get("step", 1)
+        end = pagination.get("end")
+        if end is not None and value > end:
+            return None
+
+        # 模板常含 JSON 花括号，只替换 {page} 占位符，不使用 str.format
+        def render(template: str) -> str:
+            return template.replace("{page}", str(value))
+
+        body_template = pagination.get("body_template")
+        return context.clone(
+            url=render(pagination.get("url_template") or context.url),
+            html="",
+            method="POST" if body_template else "GET",
+            body=render(body_template) if body_template else None,
+            page_number=page_number,
+        )
+
     async def execute(self, context: CrawlContext) -> NodeResult:
         html = context.html
         if not html:
             return NodeResult(success=False, error="下一页节点没有收到 HTML 内容")
 
+        if self.is_template():
+            # 模板翻页由 TemplatePager 生成，不从页面提取链接
+            return NodeResult(success=True, next_url=None, context=context)
+
         pagination = self.pagination or {}
         selector = pagination.get("selector", "")
         selector_type = pagination.get("selector_type", "xpath")
@@ -37,8 +78,9 @@ class NextPageNode(BaseNode):
         if context.page_number >= max_pages:
             return NodeResult(success=True, next_url=None, context=context)
 
-        parser = UniversalParser(html, context.content_type)
-        next_links = parser.extract(selector, selector_type)
+        with tracing.measure(metrics.PARSE_SECONDS, "parse"):
+            parser = UniversalParser(html, context.content_type)
+            next_links = parser.extract(selector, selector_type)
 
         if next_links:
             next_url = urljoin(context.url, next_links[0])
@@ -54,3 +96,48 @@ class NextPageNode(BaseNode):
 
         # 没有找到下一页链接，翻页结束
         return NodeResult(success=True, next_url=None, context=context)
+
+
+class TemplatePager:
+    """
+    模板翻页的调度状态（每个首页列表页对应一个）
+
+    设置了 end 时总页数已知，所有页面一次性调度；否则先调度 window 页，
+    之后每完成一个非空页再生成一页。任一页为空（或失败）后不再生成更靠后的页，
+    已调度但尚未抓取的更靠后的页也直接跳过（见 skips）。
+    """
+
+    def __init__(self, node: NextPageNode, context: CrawlContext):
+        self.node = node
+        self.context = context.clone(html="", data=None)  # 只保留请求信息，不持有首页内容
+        self.next_page_number = 2
+        self.stop_at: Optional[int] = None
+        self.self_only = False  # 恢复的页面：只抓取自身，不生成后续页
+        pagination = node.pagination or {}
+        self.burst = None if pagination.get("end") is not None else pagination.get("window", 10)
+
+    @classmethod
+    def detached(cls, node: NextPageNode, context: CrawlContext) -> "TemplatePager":
+        """恢复任务时使用：页面只抓取自身，不再生成后续页"""
+        pager = cls(node, context)
+        pager.self_only = True
+        return pager
+
+    def issue(self) -> Optional[CrawlContext]:
+        """生成下一页的请求上下文，已结束时返回 None"""
+        page_number = self.next_page_number
+        if self.self_only or self.skips(page_number):
+            return None
+        page_context = self.node.template_context(self.context, page_number)
+        if page_context is not None:
+            self.next_page_number += 1
+        return page_context
+
+    def skips(self, page_number: int) -> bool:
+        """第 page_number 页位于已知的空页之后，无需抓取"""
+        return self.stop_at is not None and page_number > self.stop_at
+
+    def stop(self, page_number: int):
+        """第 page_number 页为空：不再生成其后的页"""
+        if self.stop_at is None or page_number < self.stop_at:
+            self.stop_at = page_number
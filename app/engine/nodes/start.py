@@ -3,6 +3,8 @@
 系统入口，初始化 Session 并发起首次请求
 """
 
+from typing import Optional
+
 from app.engine.nodes.base import BaseNode, NodeResult
 from app.engine.context import CrawlContext
 from app.utils.http_client import fetch
@@ -17,10 +19,56 @@ class StartNode(BaseNode):
     2. 注入用户配置的 Headers / Cookies
     3. 发起首次 HTTP 请求
     4. 将响应传递给回调节点
+
+    配置了种子源（request_config.seed_source）时，由 FlowManager 读取种子，
+    每个种子 URL 以 context.url 传入并各自执行一次本节点。
     """
 
+    def seed_source(self) -> Optional[dict]:
+        """种子源配置，未配置时为 None"""
+        return self.request_config.get("seed_source")
+
+    def target_url(self, context: CrawlContext) -> str:
+        """本次请求的 URL：种子模式下为传入的种子，否则为配置的 url"""
+        if self.seed_source():
+            return context.url
+        return self.request_config.get("url", "") or context.url
+
+    def prepare(self, context: CrawlContext) -> CrawlContext:
+        """
+        构造起始请求的上下文但不发起请求
+
+        用于流式列表页：响应体由列表页直接从网络流读取。
+        请求的 Content-Type 合并进 headers。
+        """
+        headers = self._merge_headers(context)
+        content_type = self.request_config.get("content_type")
+        if content_type:
+            headers["Content-Type"] = content_type
+        return context.clone(
+            url=self.target_url(context),
+            method=self.request_config.get("method", "GET"),
+            headers=headers,
+            cookies=self._merge_cookies(context),
+            body=self.request_config.get("body"),
+        )
+
+    def callback_context(self, context: CrawlContext) -> CrawlContext:
+        """
+        流式列表页分发子项时使用的上下文
+
+        与 execute 交给回调节点的上下文一致：只传递 URL、Headers 和 Cookies，
+        起始请求的方法、请求体和 Content-Type 不带给下游节点。
+        """
+        return context.clone(
+            url=self.target_url(context),
+            headers=self._merge_headers(context),
+            cookies=self._merge_cookies(context),
+            content_type="json",
+        )
+
     async def execute(self, context: CrawlContext) -> NodeResult:
-        url = self.request_config.get("url", "") or context.url
+        url = self.target_url(context)
         if not url:
             return NodeResult(success=False, error="起始页未配置 URL")
 
@@ -38,6 +86,7 @@ class StartNode(BaseNode):
                 cookies=cookies,
                 body=body,
                 content_type=content_type,
+                **self.fetch_limits(),
             )
 
             # 判断响应内容类型
@@ -4,12 +4,88 @@
 """
 
 import re
-import json
-from typing import Any
+from typing import Any, AsyncIterator, Optional
+import ijson
 from lxml import etree
 from parsel import Selector
 from jsonpath_ng import parse as jsonpath_parse
 
+from app.utils import metrics, json_codec
+
+# 编译后的选择器缓存：(selector_type, selector) → 编译结果
+# jsonpath-ng 的编译开销远大于求值，同一规则会在每个页面上反复使用
+_SELECTOR_CACHE: dict[tuple[str, str], Any] = {}
+_SELECTOR_CACHE_SIZE = 1024
+
+_SELECTOR_COMPILERS = {
+    "xpath": etree.XPath,
+    "jsonpath": jsonpath_parse,
+    "regex": re.compile,
+}
+
+
+def compile_selector(selector: str, selector_type: str) -> Any:
+    """获取编译后的选择器（带缓存），编译失败时抛出原始异常"""
+    key = (selector_type, selector)
+    compiled = _SELECTOR_CACHE.get(key)
+    if compiled is not None:
+        metrics.SELECTOR_CACHE.inc(result="hit")
+        return compiled
+    metrics.SELECTOR_CACHE.inc(result="miss")
+    compiled = _SELECTOR_COMPILERS[selector_type](selector)
+    if len(_SELECTOR_CACHE) >= _SELECTOR_CACHE_SIZE:
+        _SELECTOR_CACHE.clear()
+    _SELECTOR_CACHE[key] = compiled
+    return compiled
+
+
+# 可流式解析的 JsonPath：$ 之后只包含 .name / ['name'] / [*] 段，且以 [*] 结尾
+_STREAM_SEGMENT = re.compile(r"\.([A-Za-z_][\w-]*)|\['([^']+)'\]|\[\*\]")
+
+
+def jsonpath_to_stream_prefix(selector: str) -> Optional[str]:
+    """
+    将简单 JsonPath（如 $.data.list[*]）转换为 ijson 的 prefix（data.list.item）
+
+    Returns:
+        ijson prefix；表达式不支持流式解析时返回 None
+    """
+    selector = selector.strip()
+    if not selector.startswith("$") or not selector.endswith("[*]"):
+        return None
+    parts = []
+    pos = 1
+    while pos < len(selector):
+        match = _STREAM_SEGMENT.match(selector, pos)
+        if not match:
+            return None
+        name = match.group(1) or match.group(2)
+        parts.append(name if name is not None else "item")
+        pos = match.end()
+    return ".".join(parts)
+
+
+async def stream_json_items(
+    chunks: AsyncIterator[bytes], prefix: str, batch_size: int
+) -> AsyncIterator[list]:
+    """
+    增量解析 JSON 字节流，按批产出 prefix 处的数组元素
+
+    内存占用与批大小相关，与文档总大小无关。数字按 float 解析，
+    避免 Decimal 无法写入 MongoDB。
+    """
+    pending = ijson.sendable_list()
+    coro = ijson.items_coro(pending, prefix, use_float=True)
+    async for chunk in chunks:
+        coro.send(chunk)
+        while len(pending) >= batch_size:
+            yield pending[:batch_size]
+            del pending[:batch_size]
+    coro.close()
+    while pending:
+        yield pending[:batch_size]
+        del pending[:batch_size]
+
 
 class UniversalParser:
     """
@@ -22,29 +98,40 @@ class UniversalParser:
     - regex: 正则表达式（基于 re）
     """
 
-    def __init__(self, content: str, content_type: str = "html"):
+    def __init__(self, content: str = "", content_type: str = "html", data: Any = None):
         """
         初始化解析器
 
         Args:
             content: 原始内容（HTML 或 JSON 字符串）
             content_type: 内容类型 html / json / text
+            data: 已解析的 JSON 对象；传入时跳过字符串解析，content_type 视为 json
         """
-        self.raw_content = content
+        self._raw_content = content
         self.content_type = content_type
         self._selector = None
         self._tree = None
         self._json_data = None
 
-        if content_type == "html":
+        if data is not None:
+            self.content_type = "json"
+            self._json_data = data
+        elif content_type == "html":
             self._tree = etree.HTML(content)
             self._selector = Selector(text=content)
         elif content_type == "json":
             try:
-                self._json_data = json.loads(content)
-            except json.JSONDecodeError:
+                self._json_data = json_codec.loads(content)
+            except json_codec.DecodeError:
                 self._json_data = {}
 
+    @property
+    def raw_content(self) -> str:
+        """原始文本（由 JSON 对象构造时按需序列化，仅正则提取会用到）"""
+        if not self._raw_content and self._json_data is not None:
+            self._raw_content = json_codec.dumps(self._json_data)
+        return self._raw_content
+
     def extract(self, selector: str, selector_type: str = "xpath") -> list[str]:
         """
         通用提取方法，返回匹配结果列表
@@ -89,7 +176,7 @@ class UniversalParser:
         """
         if selector_type == "xpath":
             if self._tree is not None:
-                elements = self._tree.xpath(item_selector)
+                elements = compile_selector(item_selector, "xpath")(self._tree)
                 return [
                     UniversalParser(
                         etree.tostring(el, encoding="unicode", method="html"),
@@ -105,11 +192,10 @@ class UniversalParser:
                 ]
         elif selector_type == "jsonpath":
             if self._json_data is not None:
-                expr = jsonpath_parse(item_selector)
+                expr = compile_selector(item_selector, "jsonpath")
                 matches = expr.find(self._json_data)
-                return [
-                    UniversalParser(json.dumps(m.value), "json") for m in matches
-                ]
+                # 直接基于内存对象构造子解析器，避免 dumps → loads 往返
+                return [UniversalParser(content_type="json", data=m.value) for m in matches]
         return []
 
     def _extract_xpath(self, selector: str) -> list[str]:
@@ -117,7 +203,7 @@ class UniversalParser:
         if self._tree is None:
             return []
         try:
-            results = self._tree.xpath(selector)
+            results = compile_selector(selector, "xpath")(self._tree)
             return [str(r).strip() for r in results if str(r).strip()]
         except Exception:
             return []
@@ -137,7 +223,7 @@ class UniversalParser:
         if self._json_data is None:
             return []
         try:
-            expr = jsonpath_parse(selector)
+            expr = compile_selector(selector, "jsonpath")
             matches = expr.find(self._json_data)
             # 兼容性处理：去除可能存在的首尾引号
             return [str(m.value).strip("'\"") for m in matches]
@@ -147,7 +233,7 @@ class UniversalParser:
     def _extract_regex(self, selector: str) -> list[str]:
         """正则表达式提取"""
         try:
-            results = re.findall(selector, self.raw_content)
+            results = compile_selector(selector, "regex").findall(self.raw_content)
             if results and isinstance(results[0], tuple):
                 # 如果有分组，返回第一个分组
                 return [r[0] for r in results]
@@ -0,0 +1,387 @@
+"""
+规则预览
+在样例页面上试运行单个节点的解析规则，不创建任务、不写 data_store。
+
+- 样例页面只请求一次，按 (方法, URL, 请求头, Cookies, 请求体) 缓存在进程内（TTL + LRU），
+  反复调整选择器时不会再访问目标站点
+- 解析逻辑与各节点一致（列表页 / 下一页 / 其余按详情页字段提取），
+  并返回每个选择器的匹配数、耗时和语法错误
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+from urllib.parse import urljoin
+
+from parsel.csstranslator import css2xpath
+
+from app.config import PREVIEW_CACHE_TTL, PREVIEW_CACHE_MAX_ENTRIES
+from app.engine.context import CrawlContext
+from app.engine.nodes.next_page import NextPageNode
+from app.engine.parser import UniversalParser, compile_selector
+from app.utils import metrics
+from app.utils.http_client import fetch
+
+logger = logging.getLogger(__name__)
+
+# 预览结果中最多返回的列表项 / 链接数（计数和耗时仍按整页统计）
+PREVIEW_LIMIT = 20
+
+
+@dataclass
+class SampleRequest:
+    """获取样例页面所需的请求参数"""
+    url: str
+    method: str = "GET"
+    headers: dict = field(default_factory=dict)
+    cookies: dict = field(default_factory=dict)
+    body: Optional[str] = None
+    content_type: Optional[str] = None
+    max_bytes: Optional[int] = None
+    allowed_content_types: Optional[list[str]] = None
+
+    def cache_key(self) -> tuple:
+        return (
+            self.method.upper(),
+            self.url,
+            tuple(sorted((str(k).lower(), str(v)) for k, v in self.headers.items())),
+            tuple(sorted((str(k), str(v)) for k, v in self.cookies.items())),
+            self.body,
+            self.content_type,
+        )
+
+
+@dataclass
+class SamplePage:
+    """缓存的样例页面"""
+    url: str
+    text: str
+    content_type: str  # html / json
+    status: int
+    fetch_ms: float
+    fetched_at: float = field(default_factory=time.monotonic)
+
+    def describe(self, cached: bool) -> dict:
+        return {
+            "url": self.url,
+            "status": self.status,
+            "content_type": self.content_type,
+            "size": len(self.text),
+            "fetch_ms": self.fetch_ms,
+            "cached": cached,
+            "age_seconds": round(time.monotonic() - self.fetched_at, 1),
+        }
+
+
+class PageCache:
+    """样例页面缓存（进程内 TTL + LRU）"""
+
+    def __init__(self, ttl: float = PREVIEW_CACHE_TTL, max_entries: int = PREVIEW_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._pages: "OrderedDict[tuple, SamplePage]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def get(self, key: tuple) -> Optional[SamplePage]:
+        page = self._pages.get(key)
+        if page is None:
+            return None
+        if time.monotonic() - page.fetched_at > self.ttl:
+            del self._pages[key]
+            return None
+        self._pages.move_to_end(key)
+        return page
+
+    def put(self, key: tuple, page: SamplePage):
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        self._pages[key] = page
+        self._pages.move_to_end(key)
+        while len(self._pages) > self.max_entries:
+            self._pages.popitem(last=False)
+
+    def clear(self) -> int:
+        count = len(self._pages)
+        self._pages.clear()
+        return count
+
+
+page_cache = PageCache()
+
+
+def sample_request(node_config: dict, start_config: Optional[dict], url: str = None) -> SampleRequest:
+    """
+    确定节点的样例页面请求
+
+    节点自身配置了 URL 时使用节点的请求配置，否则使用起始页的（列表页等节点通常
+    直接处理起始页的响应）。请求头和 Cookies 按运行时的方式合并：起始页的作为上下文，
+    节点配置优先。指定 url 时改为 GET 该地址。
+
+    Raises:
+        ValueError: 无法确定样例页面 URL
+    """
+    node_rc = node_config.get("request_config") or {}
+    start_rc = (start_config or {}).get("request_config") or {}
+    source = node_rc if node_rc.get("url") else start_rc
+
+    target = url or source.get("url")
+    if not target:
+        raise ValueError("未指定样例页面 URL，节点和起始页也都没有配置 URL")
+    if target.startswith("data://"):
+        raise ValueError("data:// 数据项不支持预览，请指定样例页面 URL")
+    own = not url or url == source.get("url")
+
+    return SampleRequest(
+        url=target,
+        method=source.get("method", "GET") if own else "GET",
+        headers={**(start_rc.get("headers") or {}), **(node_rc.get("headers") or {})},
+        cookies={**(start_rc.get("cookies") or {}), **(node_rc.get("cookies") or {})},
+        body=source.get("body") if own else None,
+        content_type=source.get("content_type") if own else None,
+        max_bytes=source.get("max_body_size"),
+        allowed_content_types=source.get("allowed_content_types"),
+    )
+
+
+async def load_sample(request: SampleRequest, refresh: bool = False) -> tuple[SamplePage, bool]:
+    """
+    获取样例页面（优先使用缓存）
+
+    Returns:
+        (页面, 是否命中缓存)
+    """
+    key = request.cache_key()
+    if not refresh:
+        page = page_cache.get(key)
+        if page is not None:
+            metrics.PREVIEW_PAGE_CACHE.inc(result="hit")
+            return page, True
+    metrics.PREVIEW_PAGE_CACHE.inc(result="miss")
+
+    started = time.perf_counter()
+    response = await fetch(
+        request.url,
+        method=request.method,
+        headers=request.headers,
+        cookies=request.cookies,
+        body=request.body,
+        content_type=request.content_type,
+        max_bytes=request.max_bytes,
+        allowed_content_types=request.allowed_content_types,
+    )
+    page = SamplePage(
+        url=str(response.url) or request.url,
+        text=response.text,
+        content_type="json" if "json" in response.headers.get("content-type", "") else "html",
+        status=response.status_code,
+        fetch_ms=round((time.perf_counter() - started) * 1000, 1),
+    )
+    page_cache.put(key, page)
+    logger.info("规则预览样例页面已缓存: %s (%d 字节)", request.url, len(page.text))
+    return page, False
+
+
+def _selector_error(selector: str, selector_type: str) -> Optional[str]:
+    """选择器语法检查（解析器在提取时会吞掉异常，预览需要把错误显示出来）"""
+    try:
+        if selector_type == "css":
+            css2xpath(selector)
+        else:
+            compile_selector(selector, selector_type)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+class _SelectorTiming:
+    """单个选择器在整页上的累计匹配数与耗时"""
+
+    def __init__(self, target: str, selector: str, selector_type: str):
+        self.target = target
+        self.selector = selector
+        self.selector_type = selector_type
+        self.error = _selector_error(selector, selector_type)
+        self.calls = 0
+        self.matches = 0
+        self.seconds = 0.0
+
+    def run(self, extract: Callable[[], list]) -> list:
+        started = time.perf_counter()
+        results = extract()
+        self.seconds += time.perf_counter() - started
+        self.calls += 1
+        self.matches += len(results)
+        return results
+
+    def to_dict(self) -> dict:
+        return {
+            "target": self.target,
+            "selector": self.selector,
+            "selector_type": self.selector_type,
+            "calls": self.calls,
+            "matches": self.matches,
+            "ms": round(self.seconds * 1000, 3),
+            "error": self.error,
+        }
+
+
+class _Preview:
+    def __init__(self, page: SamplePage, parse_rules: dict, pagination: dict, limit: int):
+        self.page = page
+        self.rules = parse_rules or {}
+        self.pagination = pagination or {}
+        self.limit = limit
+        self.timings: list[_SelectorTiming] = []
+
+    def _timing(self, target: str, selector: str, selector_type: str) -> _SelectorTiming:
+        timing = _SelectorTiming(target, selector, selector_type)
+        self.timings.append(timing)
+        return timing
+
+    def fields(self, parser: UniversalParser) -> dict[str, Any]:
+        """详情页 / 中间页 / 起始页：每个字段取第一个匹配"""
+        parser_type = self.rules.get("parser_type", "xpath")
+        fields = {}
+        for rule in self.rules.get("fields", []):
+            selector_type = rule.get("selector_type", parser_type)
+            timing = self._timing(f"fields.{rule['name']}", rule["selector"], selector_type)
+            values = timing.run(lambda: parser.extract(rule["selector"], selector_type))
+            fields[rule["name"]] = values[0].strip() if values else None
+        return {"fields": fields}
+
+    def list_page(self, parser: UniversalParser) -> dict:
+        """列表页：与 ListPageNode._parse 的提取顺序一致"""
+        parser_type = self.rules.get("parser_type", "xpath")
+        item_selector = self.rules.get("item_selector") or ""
+        link_selector = self.rules.get("link_selector") or ""
+        link_selector_type = self.rules.get("link_selector_type") or parser_type
+        field_rules = self.rules.get("fields", [])
+
+        urls, seen, items = [], set(), []
+        item_count = 0
+
+        def collect(links: list[str]) -> list[str]:
+            collected = []
+            for link in links:
+                full_url = urljoin(self.page.url, link)
+                collected.append(full_url)
+                if full_url not in seen:
+                    seen.add(full_url)
+                    urls.append(full_url)
+            return collected
+
+        if item_selector:
+            item_selector_type = self.rules.get("item_selector_type") or parser_type
+            item_timing = self._timing("item_selector", item_selector, item_selector_type)
+            item_parsers = item_timing.run(
+                lambda: parser.extract_items(item_selector, item_selector_type)
+            )
+            item_count = len(item_parsers)
+            link_timing = (
+                self._timing("link_selector", link_selector, link_selector_type)
+                if link_selector else None
+            )
+            field_timings = [
+                (rule, self._timing(f"fields.{rule['name']}", rule["selector"],
+                                    rule.get("selector_type", parser_type)))
+                for rule in field_rules if not rule.get("is_link")
+            ]
+            for item_parser in item_parsers:
+                links = []
+                if link_timing is not None:
+                    links = collect(link_timing.run(
+                        lambda: item_parser.extract(link_selector, link_selector_type)
+                    ))
+                fields = {}
+                for rule, timing in field_timings:
+                    values = timing.run(
+                        lambda: item_parser.extract(rule["selector"], timing.selector_type)
+                    )
+                    fields[rule["name"]] = values[0].strip() if values else None
+                if len(items) < self.limit:
+                    entry = {"links": links, "fields": fields}
+                    if link_timing is None and item_selector_type == "jsonpath":
+                        # 无链接选择器的 JsonPath 列表项作为 data:// 数据项透传
+                        entry["data"] = item_parser._json_data
+                    items.append(entry)
+        elif link_selector:
+            timing = self._timing("link_selector", link_selector, link_selector_type)
+            collect(timing.run(lambda: parser.extract(link_selector, link_selector_type)))
+
+        for rule in field_rules:
+            if rule.get("is_link"):
+                selector_type = rule.get("selector_type", parser_type)
+                timing = self._timing(f"fields.{rule['name']}", rule["selector"], selector_type)
+                collect(timing.run(lambda: parser.extract(rule["selector"], selector_type)))
+
+        return {
+            "item_count": item_count,
+            "items": items,
+            "link_count": len(urls),
+            "links": urls[:self.limit],
+        }
+
+    def next_page(self, parser: UniversalParser) -> dict:
+        """下一页：取第一个匹配作为下一页 URL；模板翻页列出生成的前几页请求"""
+        node = NextPageNode({"node_type": "next", "pagination": self.pagination})
+        if node.is_template():
+            context = CrawlContext(url=self.page.url)
+            pages = []
+            for page_number in range(2, self.limit + 2):
+                page_context = node.template_context(context, page_number)
+                if page_context is None:
+                    break
+                pages.append({
+                    "page_number": page_number,
+                    "url": page_context.url,
+                    "method": page_context.method,
+                    "body": page_context.body,
+                })
+            return {"next_url": pages[0]["url"] if pages else None, "pages": pages}
+
+        selector = self.pagination.get("selector") or ""
+        if not selector:
+            return {"next_url": None}
+        timing = self._timing(
+            "pagination.selector", selector, self.pagination.get("selector_type", "xpath")
+        )
+        links = timing.run(lambda: parser.extract(selector, timing.selector_type))
+        return {"next_url": urljoin(self.page.url, links[0]) if links else None}
+
+
+def preview_rules(
+    page: SamplePage,
+    node_type: str,
+    parse_rules: dict,
+    pagination: dict = None,
+    limit: int = PREVIEW_LIMIT,
+) -> dict:
+    """
+    在样例页面上运行解析规则
+
+    Returns:
+        提取结果（fields / items / links / next_url，视节点类型而定），
+        以及 document_ms（构建解析树）、selectors（每个选择器的匹配数与耗时）、total_ms
+    """
+    preview = _Preview(page, parse_rules, pagination, limit)
+    started = time.perf_counter()
+    parser = UniversalParser(page.text, page.content_type)
+    document_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    if node_type == "list":
+        result = preview.list_page(parser)
+    elif node_type == "next":
+        result = preview.next_page(parser)
+    else:
+        result = preview.fields(parser)
+
+    result.update(
+        document_ms=document_ms,
+        selectors=[timing.to_dict() for timing in preview.timings],
+        total_ms=round((time.perf_counter() - started) * 1000, 3),
+    )
+    return result
@@ -0,0 +1,178 @@
+"""
+定时调度器
+按项目的 schedule 配置（cron 表达式或固定间隔）周期性提交任务：
+
+- 每次计算下一次运行时间时叠加 [0, jitter_seconds) 的随机偏移，
+  同一时刻到期的多个项目错开启动，平滑对目标站点和本机的负载
+- 上一次运行（等待中或运行中）尚未结束时跳过本次，只推进下一次运行时间
+- 服务停机错过的运行不补跑，恢复后按当前时间重新计算
+- 到期后先以 CAS 方式更新 next_run_at 再提交，多 worker 部署时同一次运行只会被一个进程认领
+
+任务经由 submit 回调进入任务队列（见 admission.py），时间来源可注入以便测试。
+"""
+
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from app.config import SCHEDULER_POLL_SECONDS
+from app.database import get_db
+from app.engine.admission import task_queue
+from app.utils.cron import CronSpec
+
+logger = logging.getLogger(__name__)
+
+
+class Clock:
+    """调度器的时间来源（测试时可替换为手动推进的时钟）"""
+
+    def now(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # MongoDB 默认返回不带时区的 UTC 时间
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def next_run_time(
+    schedule: dict, after: datetime, rng: random.Random = random
+) -> datetime:
+    """
+    计算 after 之后的下一次运行时间（含抖动）
+
+    Args:
+        schedule: 项目的 schedule 配置（cron 或 interval_seconds，及 jitter_seconds）
+        after: 起算时间
+        rng: 随机数来源
+    """
+    if schedule.get("cron"):
+        base = CronSpec(schedule["cron"]).next_after(after)
+    else:
+        base = after + timedelta(seconds=schedule["interval_seconds"])
+    jitter = schedule.get("jitter_seconds") or 0
+    if jitter > 0:
+        base += timedelta(seconds=rng.uniform(0, jitter))
+    return base
+
+
+class Scheduler:
+    """
+    项目定时调度器
+
+    Args:
+        submit: 提交任务的回调，参数为项目文档，返回任务 ID
+        is_active: 判断项目是否仍有等待中或运行中的任务
+        clock: 时间来源
+        poll_interval: 检查到期项目的间隔（秒）
+        rng: 抖动使用的随机数来源
+    """
+
+    def __init__(
+        self,
+        submit: Callable[[dict], Awaitable[Optional[str]]],
+        is_active: Callable[[str], bool] = task_queue.is_active,
+        clock: Clock = None,
+        poll_interval: float = SCHEDULER_POLL_SECONDS,
+        rng: random.Random = None,
+    ):
+        self.submit = submit
+        self.is_active = is_active
+        self.clock = clock or Clock()
+        self.poll_interval = poll_interval
+        self.rng = rng or random.Random()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """在后台启动调度循环"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+            logger.info("定时调度器已启动（检查间隔 %ss）", self.poll_interval)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("定时调度器已停止")
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error("定时调度检查失败: %s", e, exc_info=True)
+            await self.clock.sleep(self.poll_interval)
+
+    async def tick(self) -> list[str]:
+        """
+        检查一次所有启用了调度的项目，提交到期的运行
+
+        Returns:
+            本次提交的任务 ID 列表
+        """
+        db = get_db()
+        now = self.clock.now()
+        submitted = []
+        async for project in db.projects.find({"schedule.enabled": True}):
+            task_id = await self._check_project(project, now)
+            if task_id:
+                submitted.append(task_id)
+        return submitted
+
+    async def _check_project(self, project: dict, now: datetime) -> Optional[str]:
+        db = get_db()
+        schedule = project["schedule"]
+        state = project.get("schedule_state") or {}
+        due_at = state.get("next_run_at")
+
+        if due_at is None:
+            # 新配置或配置已修改：只计算首次运行时间
+            await db.projects.update_one(
+                {"_id": project["_id"]},
+                {"$set": {"schedule_state.next_run_at": next_run_time(schedule, now, self.rng)}},
+            )
+            return None
+        if _as_utc(due_at) > now:
+            return None
+
+        # 认领本次运行：next_run_at 未被其他进程推进时才更新成功
+        claim = await db.projects.update_one(
+            {"_id": project["_id"], "schedule_state.next_run_at": due_at},
+            {"$set": {
+                "schedule_state.next_run_at": next_run_time(schedule, now, self.rng),
+                "schedule_state.last_run_at": now,
+            }},
+        )
+        if claim.modified_count != 1:
+            return None
+
+        if self.is_active(project["_id"]):
+            logger.info("项目 %s 上一次运行尚未结束，跳过本次定时运行", project["_id"])
+            await self._record(project["_id"], "skipped")
+            return None
+
+        try:
+            task_id = await self.submit(project)
+        except Exception as e:
+            logger.warning("项目 %s 定时运行提交失败: %s", project["_id"], e)
+            await self._record(project["_id"], "failed", error=str(e))
+            return None
+        logger.info("项目 %s 定时运行已提交: 任务 %s", project["_id"], task_id)
+        await self._record(project["_id"], "submitted", task_id=task_id)
+        return task_id
+
+    async def _record(self, project_id: str, result: str, task_id: str = None, error: str = None):
+        db = get_db()
+        fields = {"schedule_state.last_result": result, "schedule_state.last_error": error}
+        if task_id:
+            fields["schedule_state.last_task_id"] = task_id
+        await db.projects.update_one({"_id": project_id}, {"$set": fields})
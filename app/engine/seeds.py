@@ -0,0 +1,197 @@
+"""
+起始页种子源
+让起始页从一批 URL 出发，而不是只请求 request_config.url：
+
+- file: 上传的种子文件（逐行 URL 或 CSV），上传时流式解析并分块存入 seed_chunks 集合
+- collection: 任意集合中满足查询条件的文档，取指定字段
+- task: 之前某个任务的输出（data_store），默认取 source_url
+
+种子按批次惰性读取（数据库游标），由 FlowManager 逐批放入 frontier，
+frontier 满时暂停读取，整个种子集不会同时驻留内存，首批读出即开始抓取。
+"""
+
+import codecs
+import csv
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Optional
+
+from app.database import get_db
+
+logger = logging.getLogger(__name__)
+
+# 上传种子文件时每个 seed_chunks 文档保存的 URL 数
+SEED_CHUNK_SIZE = 1000
+# 读取种子的默认批大小
+SEED_BATCH_SIZE = 500
+
+
+def _get_path(doc: Any, path: str) -> Any:
+    """按点分路径取值（如 data.link）"""
+    for key in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(key)
+    return doc
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """把字节流增量解码为文本行（兼容 BOM 与 \\r\\n）"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def _parse_upload(
+    chunks: AsyncIterator[bytes], fmt: str, column: Optional[str]
+) -> AsyncIterator[str]:
+    """
+    从上传内容中逐个解析种子 URL
+
+    Args:
+        fmt: lines（每行一个 URL）/ csv
+        column: CSV 的列名（首行为表头）；为空时取第一列且不含表头
+    """
+    index = 0
+    header_pending = fmt == "csv" and column is not None
+    async for line in _lines(chunks):
+        if fmt == "csv":
+            row = next(csv.reader([line]), [])
+            if header_pending:
+                header_pending = False
+                if column not in row:
+                    raise ValueError(f"CSV 表头中没有列: {column}")
+                index = row.index(column)
+                continue
+            value = row[index] if index < len(row) else ""
+        else:
+            value = line
+        value = value.strip()
+        if value and not value.startswith("#"):
+            yield value
+
+
+async def store_upload(
+    project_id: str,
+    chunks: AsyncIterator[bytes],
+    name: str = "",
+    fmt: str = "lines",
+    column: Optional[str] = None,
+) -> dict:
+    """
+    流式保存上传的种子文件，每 SEED_CHUNK_SIZE 个 URL 写入一个 seed_chunks 文档
+
+    Returns:
+        种子集文档（seed_sets 集合）
+
+    Raises:
+        ValueError: CSV 表头中没有指定的列
+    """
+    db = get_db()
+    seed_set_id = str(uuid.uuid4())
+    seq = 0
+    count = 0
+    buffer: list[str] = []
+
+    async def flush():
+        nonlocal seq
+        await db.seed_chunks.insert_one(
+            {"seed_set_id": seed_set_id, "seq": seq, "urls": list(buffer)}
+        )
+        seq += 1
+        buffer.clear()
+
+    try:
+        async for url in _parse_upload(chunks, fmt, column):
+            buffer.append(url)
+            count += 1
+            if len(buffer) >= SEED_CHUNK_SIZE:
+                await flush()
+        if buffer:
+            await flush()
+    except BaseException:
+        # 解析失败或上传中断：清理已写入的分块
+        await db.seed_chunks.delete_many({"seed_set_id": seed_set_id})
+        raise
+
+    doc = {
+        "_id": seed_set_id,
+        "project_id": project_id,
+        "name": name,
+        "format": fmt,
+        "count": count,
+        "chunks": seq,
+        "created_at": datetime.now(timezone.utc),
+    }
+    await db.seed_sets.insert_one(doc)
+    logger.info("种子文件已保存: %s (%d 个 URL，%d 块)", seed_set_id, count, seq)
+    return doc
+
+
+async def delete_seed_set(seed_set_id: str) -> bool:
+    db = get_db()
+    result = await db.seed_sets.delete_one({"_id": seed_set_id})
+    await db.seed_chunks.delete_many({"seed_set_id": seed_set_id})
+    return result.deleted_count > 0
+
+
+async def _iter_urls(source: dict) -> AsyncIterator[str]:
+    db = get_db()
+    source_type = source.get("type")
+    batch_size = source.get("batch_size") or SEED_BATCH_SIZE
+
+    if source_type == "file":
+        cursor = db.seed_chunks.find(
+            {"seed_set_id": source.get("seed_set_id")}, {"urls": 1}
+        ).sort("seq", 1).batch_size(1)
+        async for chunk in cursor:
+            for url in chunk.get("urls", ()):
+                yield url
+        return
+
+    if source_type == "collection":
+        collection = db[source["collection"]]
+        query = source.get("query") or {}
+        field = source.get("field") or "url"
+    elif source_type == "task":
+        collection = db.data_store
+        query = {"task_id": source.get("task_id")}
+        field = source.get("field") or "source_url"
+    else:
+        raise ValueError(f"不支持的种子源类型: {source_type}")
+
+    cursor = collection.find(query, {field: 1}).batch_size(batch_size)
+    async for doc in cursor:
+        value = _get_path(doc, field)
+        if isinstance(value, str) and value.strip():
+            yield value.strip()
+
+
+async def iter_seed_batches(source: dict, skip: int = 0) -> AsyncIterator[list[str]]:
+    """
+    按批读取种子 URL
+
+    Args:
+        source: 起始页 request_config.seed_source 配置
+        skip: 跳过前 skip 个种子（恢复被停止的任务时使用）
+    """
+    batch_size = source.get("batch_size") or SEED_BATCH_SIZE
+    batch: list[str] = []
+    async for url in _iter_urls(source):
+        if skip > 0:
+            skip -= 1
+            continue
+        batch.append(url)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -9,22 +9,40 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
+from app.config import SCHEDULER_ENABLED
 from app.database import connect_db, close_db
+from app.engine.deletion import resume_deletions, stop_deletions
+from app.engine.scheduler import Scheduler
 from app.utils.http_client import init_client, close_client
+from app.utils.json_codec import FastJSONResponse
+from app.utils.logs import setup_logging, shutdown_logging
 from app.api.projects import router as projects_router
 from app.api.nodes import router as nodes_router
-from app.api.tasks import router as tasks_router
+from app.api.tasks import router as tasks_router, submit_scheduled_run
 from app.api.data import router as data_router
+from app.api.seeds import router as seeds_router
+from app.api.metrics import router as metrics_router
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
+    setup_logging()
     await connect_db()
     await init_client()
+    await resume_deletions()
+    if SCHEDULER_ENABLED:
+        scheduler.start()
     yield
+    await scheduler.stop()
+    await stop_deletions()
     await close_client()
     await close_db()
+    shutdown_logging()
+
+
+# 定时调度器：到期的项目经任务队列提交运行
+scheduler = Scheduler(submit=submit_scheduled_run)
 
 
 app = FastAPI(
@@ -32,6 +50,7 @@ app = FastAPI(
     description="基于规则的爬虫采集系统",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 # CORS 中间件
@@ -48,6 +67,8 @@ app.include_router(projects_router)
 app.include_router(nodes_router)
 app.include_router(tasks_router)
 app.include_router(data_router)
+app.include_router(seeds_router)
+app.include_router(metrics_router)
 
 
 from starlette.responses import Response
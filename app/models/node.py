@@ -3,7 +3,7 @@
 5 种节点类型：start / intermediate / list / next / detail
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, Literal
 from datetime import datetime
 
@@ -19,6 +19,26 @@ class FieldRule(BaseModel):
     attr: Optional[str] = Field(None, description="提取属性（如 href, src）")
 
 
+class SeedSource(BaseModel):
+    """起始页种子源：从一批 URL 出发（替代单个 url）"""
+    type: Literal["file", "collection", "task"] = Field(..., description="种子来源")
+    seed_set_id: Optional[str] = Field(None, description="上传的种子文件 ID（file）")
+    collection: Optional[str] = Field(None, description="集合名（collection）")
+    query: Optional[dict] = Field(None, description="查询条件（collection）")
+    task_id: Optional[str] = Field(None, description="输出作为种子的任务 ID（task）")
+    field: Optional[str] = Field(
+        None, description="URL 所在字段，支持点分路径；默认 collection 为 url，task 为 source_url"
+    )
+    batch_size: int = Field(500, ge=1, le=10000, description="每批读取的种子数")
+
+    @model_validator(mode="after")
+    def check_source(self):
+        required = {"file": "seed_set_id", "collection": "collection", "task": "task_id"}[self.type]
+        if not getattr(self, required):
+            raise ValueError(f"{self.type} 种子源需要设置 {required}")
+        return self
+
+
 class RequestConfig(BaseModel):
     """HTTP 请求配置"""
     url: Optional[str] = Field("", description="请求 URL（起始页必填）")
@@ -27,6 +47,15 @@ class RequestConfig(BaseModel):
     cookies: Optional[dict] = Field(default_factory=dict, description="自定义 Cookies")
     body: Optional[str] = Field(None, description="POST 请求体")
     content_type: Optional[str] = Field(None, description="Content-Type")
+    max_body_size: Optional[int] = Field(
+        None, ge=0, description="响应体大小上限（字节），为空使用全局配置，0 为不限制"
+    )
+    allowed_content_types: Optional[list[str]] = Field(
+        None, description="允许的响应 Content-Type，为空使用全局白名单"
+    )
+    seed_source: Optional[SeedSource] = Field(
+        None, description="种子源（起始页用），设置后忽略 url，逐个请求种子 URL"
+    )
 
 
 class ParseRules(BaseModel):
@@ -47,15 +76,48 @@ class ParseRules(BaseModel):
         "none", description="去重策略：none(不去重), url(按source_url), field(按特定字段)"
     )
     deduplication_field: Optional[str] = Field(None, description="去重字段名（当类型为Field时必填）")
+    change_detection: bool = Field(
+        False,
+        description="变更检测（需设置去重策略）：按去重键更新已有记录，内容哈希变化时才重写数据",
+    )
+    stream_items: bool = Field(
+        False,
+        description="流式解析列表项（仅限起始页直连的列表页，item_selector 为 $.a.b[*] 形式的 JsonPath）",
+    )
 
 
 class PaginationConfig(BaseModel):
-    """翻页配置"""
+    """
+    翻页配置
+
+    link 模式从当前页提取"下一页"链接，逐页串行；
+    template 模式按模板直接生成后续页的 URL / POST 请求体，各页并发抓取，
+    模板中的 {page} 依次替换为 start, start+step, ...（offset 类接口令 start/step 为偏移量即可）。
+    """
+    mode: Literal["link", "template"] = Field("link", description="翻页方式")
     selector: Optional[str] = Field(None, description="下一页链接选择器")
     selector_type: Literal["xpath", "css", "jsonpath", "regex"] = Field(
         "xpath", description="选择器类型"
     )
     max_pages: int = Field(10, description="最大翻页数")
+    url_template: Optional[str] = Field(
+        None, description="后续页 URL 模板（template 模式），为空时沿用首页 URL"
+    )
+    body_template: Optional[str] = Field(
+        None, description="后续页 POST 请求体模板（template 模式），设置后以 POST 请求"
+    )
+    start: int = Field(2, description="首页之后第一页的 {page} 取值")
+    step: int = Field(1, ge=1, description="{page} 的步长")
+    end: Optional[int] = Field(None, description="{page} 的最大取值（含），为空时直到空页或 max_pages")
+    window: int = Field(
+        10, ge=1, le=1000, description="未设置 end 时同时调度的页数（遇到空页后不再继续生成）"
+    )
+
+    @model_validator(mode="after")
+    def check_template(self):
+        if self.mode == "template" and not (self.url_template or self.body_template):
+            raise ValueError("template 翻页需要设置 url_template 或 body_template")
+        return self
 
 
 class NodeCreate(BaseModel):
@@ -87,6 +149,17 @@ class NodeUpdate(BaseModel):
     callback_node_id: Optional[str] = None
 
 
+class NodePreviewRequest(BaseModel):
+    """规则预览的请求体（未填写的部分使用节点已保存的配置）"""
+    url: Optional[str] = Field(
+        None, description="样例页面 URL，为空时使用节点或起始页配置的 URL"
+    )
+    parse_rules: Optional[ParseRules] = Field(None, description="待试用的解析规则（未保存）")
+    pagination: Optional[PaginationConfig] = Field(None, description="待试用的翻页配置（未保存）")
+    refresh: bool = Field(False, description="忽略缓存，重新请求样例页面")
+    limit: int = Field(20, ge=1, le=200, description="最多返回的列表项 / 链接数")
+
+
 class NodeResponse(BaseModel):
     """节点响应模型"""
     id: str = Field(..., alias="_id")
@@ -2,21 +2,86 @@
 项目数据模型
 """
 
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import Literal, Optional
 from datetime import datetime
 
+from app.utils.cron import CronSpec
+
+
+class ConcurrencyConfig(BaseModel):
+    """每主机并发配置（未填写的项使用全局配置）"""
+    floor: Optional[int] = Field(None, ge=1, description="每主机并发下限")
+    ceiling: Optional[int] = Field(None, ge=1, le=1000, description="每主机并发上限")
+    initial: Optional[int] = Field(None, ge=1, description="初始并发")
+    adaptive: bool = Field(True, description="是否根据延迟和 429/503/超时自动调整")
+
+    @model_validator(mode="after")
+    def check_range(self):
+        if self.floor and self.ceiling and self.floor > self.ceiling:
+            raise ValueError("并发下限不能大于上限")
+        return self
+
+
+class SchedulingConfig(BaseModel):
+    """任务调度配置"""
+    priority: int = Field(0, description="任务优先级，数值大者先出队")
+    weight: float = Field(1.0, gt=0, le=100, description="运行时分享全局请求槽位的权重")
+    max_running_tasks: Optional[int] = Field(None, ge=1, description="本项目同时运行的任务数")
+    crawl_order: Optional[Literal["dfs", "bfs", "terminal_first"]] = Field(
+        None, description="爬取顺序，terminal_first 为详情页优先"
+    )
+    max_frontier: Optional[int] = Field(None, ge=0, description="待处理工作项软上限，0 为不限制")
+
+
+class BudgetConfig(BaseModel):
+    """任务预算（未填写的项使用全局配置，0 为不限制）"""
+    max_requests: Optional[int] = Field(None, ge=0, description="最大请求数")
+    max_items: Optional[int] = Field(None, ge=0, description="最大入库条数")
+    max_bytes: Optional[int] = Field(None, ge=0, description="最大下载字节数")
+    max_duration_seconds: Optional[float] = Field(None, ge=0, description="最长运行时间（秒）")
+    max_depth: Optional[int] = Field(None, ge=0, description="最大深度（列表页分裂次数），超出的子项丢弃")
+
+
+class ScheduleConfig(BaseModel):
+    """定时运行配置：cron 与 interval_seconds 二选一（时间均为 UTC）"""
+    cron: Optional[str] = Field(None, description="Cron 表达式（分 时 日 月 周）")
+    interval_seconds: Optional[int] = Field(None, ge=60, description="固定运行间隔（秒）")
+    jitter_seconds: int = Field(0, ge=0, le=86400, description="启动时间随机偏移上限，用于错峰")
+    enabled: bool = True
+
+    @field_validator("cron")
+    @classmethod
+    def check_cron(cls, value):
+        if value:
+            CronSpec(value)
+        return value
+
+    @model_validator(mode="after")
+    def check_spec(self):
+        if bool(self.cron) == bool(self.interval_seconds):
+            raise ValueError("cron 与 interval_seconds 必须且只能设置一个")
+        return self
+
 
 class ProjectCreate(BaseModel):
     """创建项目的请求体"""
     name: str = Field(..., min_length=1, max_length=200, description="项目名称")
     description: Optional[str] = Field("", description="项目描述")
+    concurrency: Optional[ConcurrencyConfig] = None
+    scheduling: Optional[SchedulingConfig] = None
+    schedule: Optional[ScheduleConfig] = None
+    budget: Optional[BudgetConfig] = None
 
 
 class ProjectUpdate(BaseModel):
     """更新项目的请求体"""
     name: Optional[str] = Field(None, min_length=1, max_length=200)
     description: Optional[str] = None
+    concurrency: Optional[ConcurrencyConfig] = None
+    scheduling: Optional[SchedulingConfig] = None
+    schedule: Optional[ScheduleConfig] = None
+    budget: Optional[BudgetConfig] = None
 
 
 class ProjectResponse(BaseModel):
@@ -25,6 +90,11 @@ class ProjectResponse(BaseModel):
     name: str
     description: str = ""
     status: str = "idle"
+    concurrency: Optional[ConcurrencyConfig] = None
+    scheduling: Optional[SchedulingConfig] = None
+    schedule: Optional[ScheduleConfig] = None
+    budget: Optional[BudgetConfig] = None
+    schedule_state: Optional[dict] = None  # next_run_at / last_run_at / last_result / last_task_id
     created_at: datetime
     updated_at: datetime
 
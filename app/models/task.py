@@ -13,16 +13,26 @@ class TaskStats(BaseModel):
     total_items: int = 0
     errors: int = 0
     current_page: int = 0
+    seeds: int = 0  # 已放入 frontier 的种子 URL 数
+    concurrency: list[dict] = Field(default_factory=list)  # 各主机当前并发上限与延迟
+    frontier: Optional[dict] = None  # 爬取顺序策略与待处理工作项数
+    budget: Optional[dict] = None  # 预算上限、用量与触发的预算项（exceeded）
 
 
 class TaskResponse(BaseModel):
     """任务响应模型"""
     id: str = Field(..., alias="_id")
     project_id: str
-    status: str = "pending"  # pending / running / completed / failed / stopped
+    status: str = "pending"  # pending / running / stopping / completed / failed / stopped
+    priority: int = 0
+    queue_position: Optional[int] = None  # 等待中的任务在队列中的位置
     started_at: Optional[datetime] = None
     finished_at: Optional[datetime] = None
     stats: TaskStats = Field(default_factory=TaskStats)
     error_message: Optional[str] = None
+    trace_summary: Optional[dict] = None  # 节点追踪摘要（开启 TRACE_SAMPLE_RATE 时）
+    drain: Optional[dict] = None  # 停止时的排空结果：保存 / 取消的工作项数、停止耗时与原因
+    resumed_from: Optional[str] = None  # 恢复来源任务 ID
+    budget: Optional[dict] = None  # 本次运行的预算覆盖项（生效预算与用量见 stats.budget）
 
     model_config = {"populate_by_name": True}
@@ -0,0 +1,19 @@
+"""
+存储层
+API 与引擎统一通过 get_db() 获取数据库对象，按集合名访问（db.projects / db.nodes /
+db.tasks / db.data_store ...），只依赖 Motor 集合接口的以下子集：
+
+- find(filter, projection) → 游标：sort / skip / limit / batch_size / to_list / async for
+- find_one / insert_one / insert_many / update_one / update_many（$set / $inc / $unset /
+  $setOnInsert，upsert）/ delete_one / delete_many / count_documents / create_index
+- 查询条件：等值（含点分路径）、$eq / $ne / $gt / $gte / $lt / $lte / $in / $nin /
+  $exists / $regex / $and / $or
+
+后端由 STORAGE_BACKEND 选择（见 app/database.py）：
+
+- mongo（默认）：Motor + MongoDB
+- sqlite：嵌入式 SQLite（WAL），单机部署与 CI / 基准测试无需 MongoDB（sqlite.py）
+
+新增存储调用时请保持在上述子集内，两种后端即可通用。
+采集记录的写入经 RecordWriter 批量提交（records.py），与后端无关。
+"""
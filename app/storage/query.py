@@ -0,0 +1,110 @@
+"""
+Mongo 风格查询条件的内存匹配
+SQLite 后端中无法下推到 SQL 的条件、以及记录写入缓冲区的去重检查使用。
+"""
+
+import re
+from datetime import datetime, timezone
+from typing import Any
+
+from bson import ObjectId
+
+MISSING = object()
+
+
+def get_path(doc: Any, path: str) -> Any:
+    for key in path.split("."):
+        if isinstance(doc, dict):
+            doc = doc.get(key, MISSING)
+        elif isinstance(doc, list) and key.isdigit() and int(key) < len(doc):
+            doc = doc[int(key)]
+        else:
+            return MISSING
+        if doc is MISSING:
+            return MISSING
+    return doc
+
+
+def normalize(value: Any) -> Any:
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    if isinstance(value, ObjectId):
+        return str(value)
+    return value
+
+
+def _compare(op: str, actual: Any, expected: Any) -> bool:
+    actual, expected = normalize(actual), normalize(expected)
+    try:
+        if op == "$gt":
+            return actual > expected
+        if op == "$gte":
+            return actual >= expected
+        if op == "$lt":
+            return actual < expected
+        if op == "$lte":
+            return actual <= expected
+    except TypeError:
+        return False
+    raise ValueError(f"不支持的查询操作符: {op}")
+
+
+def _match_value(actual: Any, condition: Any) -> bool:
+    """单个字段的条件匹配（数组字段按 Mongo 语义匹配任一元素）"""
+    if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+        return _match_operators(actual, condition)
+    if isinstance(actual, list) and not isinstance(condition, list):
+        return any(normalize(item) == normalize(condition) for item in actual)
+    if actual is MISSING:
+        return condition is None
+    return normalize(actual) == normalize(condition)
+
+
+def _match_operators(actual: Any, condition: dict) -> bool:
+    values = actual if isinstance(actual, list) else [actual]
+    for op, expected in condition.items():
+        if op == "$options":
+            continue
+        if op == "$eq":
+            ok = _match_value(actual, expected)
+        elif op == "$ne":
+            ok = not _match_value(actual, expected)
+        elif op == "$in":
+            ok = any(_match_value(actual, item) for item in expected)
+        elif op == "$nin":
+            ok = not any(_match_value(actual, item) for item in expected)
+        elif op == "$exists":
+            ok = (actual is not MISSING) == bool(expected)
+        elif op == "$regex":
+            flags = 0
+            for flag in condition.get("$options", ""):
+                flags |= {"i": re.I, "m": re.M, "s": re.S, "x": re.X}.get(flag, 0)
+            pattern = re.compile(expected, flags)
+            ok = any(isinstance(v, str) and pattern.search(v) for v in values)
+        elif op == "$not":
+            ok = not _match_value(actual, expected)
+        elif op in ("$gt", "$gte", "$lt", "$lte"):
+            ok = any(v is not MISSING and _compare(op, v, expected) for v in values)
+        else:
+            raise ValueError(f"不支持的查询操作符: {op}")
+        if not ok:
+            return False
+    return True
+
+
+def match(doc: dict, query: dict) -> bool:
+    """判断文档是否满足 Mongo 风格的查询条件"""
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            ok = all(match(doc, sub) for sub in condition)
+        elif key == "$or":
+            ok = any(match(doc, sub) for sub in condition)
+        elif key == "$nor":
+            ok = not any(match(doc, sub) for sub in condition)
+        elif key.startswith("$"):
+            raise ValueError(f"不支持的查询操作符: {key}")
+        else:
+            ok = _match_value(get_path(doc, key), condition)
+        if not ok:
+            return False
+    return True
@@ -0,0 +1,163 @@
+"""
+采集记录批量写入
+详情页的记录先进入任务级缓冲区，满 RECORD_BATCH_SIZE 条或每隔 RECORD_FLUSH_SECONDS
+秒以 insert_many 批量写入 data_store，任务结束（完成、失败或停止）时写入剩余记录。
+变更检测模式下内容未变化的记录只需刷新 last_seen，同样缓冲后以一次 update_many 写入。
+
+FlowManager 通过 bind_record_writer 绑定写入器，DetailNode 经 current_record_writer()
+获取；未绑定时（如规则预览）直接 insert_one。写入失败的条数记在 failed / failed_new /
+failed_touches 中，由 FlowManager 在 close() 之后计入任务统计。
+"""
+
+import asyncio
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+from pymongo.errors import BulkWriteError
+
+from app.config import RECORD_BATCH_SIZE, RECORD_FLUSH_SECONDS
+from app.storage.query import match
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+_record_writer: ContextVar = ContextVar("record_writer", default=None)
+
+
+@contextmanager
+def bind_record_writer(writer: "RecordWriter"):
+    """在当前上下文及其派生的子协程中，让详情页记录经过指定写入器"""
+    token = _record_writer.set(writer)
+    try:
+        yield writer
+    finally:
+        _record_writer.reset(token)
+
+
+def current_record_writer() -> Optional["RecordWriter"]:
+    return _record_writer.get()
+
+
+class RecordWriter:
+    """
+    任务级的记录写入缓冲区
+
+    Args:
+        collection: 目标集合（data_store）
+        batch_size: 每批写入的记录数
+        flush_interval: 缓冲区中的记录最长等待时间（秒），0 为只按数量写入
+    """
+
+    def __init__(
+        self,
+        collection,
+        batch_size: int = RECORD_BATCH_SIZE,
+        flush_interval: float = RECORD_FLUSH_SECONDS,
+    ):
+        self.collection = collection
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.failed = 0  # 未能写入的记录数
+        self.failed_new = 0  # 其中变更检测的新记录数（stats.items_new 已计入）
+        self.failed_touches = 0  # 未能刷新 last_seen 的记录数
+        self.last_error: Optional[str] = None
+        self._buffer: list[dict] = []
+        self._inflight: list[list[dict]] = []  # 已取出、insert_many 尚未返回的批次
+        self._touched: list = []  # 待刷新 last_seen 的记录 _id
+        self._flushing: set[asyncio.Task] = set()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._closed = False
+
+    def pending(self, query: dict) -> bool:
+        """缓冲区或写入中的批次里是否有满足条件的记录（去重时与数据库查询一并检查）"""
+        return any(match(record, query) for record in self._buffer) or any(
+            match(record, query) for batch in self._inflight for record in batch
+        )
+
+    async def add(self, record: dict):
+        """加入一条记录；缓冲区满时写入（调用方在写入期间等待，对写入速度施加背压）"""
+        if self._closed:
+            # 任务已收尾（如停止后宽限期内完成的详情页）：直接写入
+            await self._write([record], [])
+            return
+        self._buffer.append(record)
+        await self._buffered()
+
+    async def touch(self, record_id):
+        """登记一条内容未变化的已有记录（变更检测），批量刷新其 last_seen"""
+        if self._closed:
+            await self._write([], [record_id])
+            return
+        self._touched.append(record_id)
+        await self._buffered()
+
+    async def _buffered(self):
+        if len(self._buffer) + len(self._touched) >= self.batch_size:
+            await self._write(*self._take())
+        elif self._timer is None and self.flush_interval:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._flush_later
+            )
+
+    def _take(self) -> tuple[list[dict], list]:
+        batch, self._buffer = self._buffer, []
+        touched, self._touched = self._touched, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch, touched
+
+    def _flush_later(self):
+        self._timer = None
+        if self._buffer or self._touched:
+            task = asyncio.ensure_future(self._write(*self._take()))
+            self._flushing.add(task)
+            task.add_done_callback(self._flushing.discard)
+
+    async def _write(self, batch: list[dict], touched: list):
+        if batch:
+            # 写入期间这些记录既不在缓冲区也不在库中，仍需让 pending() 看到
+            self._inflight.append(batch)
+            try:
+                with metrics.DB_WRITE_SECONDS.time(node_type="detail"):
+                    await self.collection.insert_many(batch, ordered=False)
+                self.written += len(batch)
+            except BulkWriteError as e:
+                # ordered=False：出错的记录之外，其余记录已写入
+                failed = {err["index"] for err in e.details.get("writeErrors", [])}
+                lost = [batch[i] for i in failed] if failed else batch
+                inserted = e.details.get("nInserted", len(batch) - len(lost))
+                self.written += inserted
+                self._record_failure(len(batch) - inserted, lost, e)
+            except Exception as e:
+                self._record_failure(len(batch), batch, e)
+            finally:
+                self._inflight = [b for b in self._inflight if b is not batch]
+        if touched:
+            try:
+                with metrics.DB_WRITE_SECONDS.time(node_type="detail"):
+                    await self.collection.update_many(
+                        {"_id": {"$in": touched}},
+                        {"$set": {"last_seen": datetime.now(timezone.utc)}},
+                    )
+            except Exception as e:
+                self.failed_touches += len(touched)
+                self.last_error = str(e)
+                logger.error("刷新记录 last_seen 失败（%d 条）: %s", len(touched), e)
+
+    def _record_failure(self, count: int, lost: list[dict], error: Exception):
+        self.failed += count
+        self.failed_new += sum(1 for record in lost if "content_hash" in record)
+        self.last_error = str(error)
+        logger.error("采集记录批量写入失败（%d 条）: %s", count, error)
+
+    async def close(self):
+        """写入剩余记录并等待进行中的写入完成"""
+        self._closed = True
+        await self._write(*self._take())
+        if self._flushing:
+            await asyncio.gather(*self._flushing, return_exceptions=True)
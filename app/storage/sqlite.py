@@ -0,0 +1,559 @@
+"""
+SQLite 嵌入式存储后端
+以 Motor 集合接口的子集（见 app/storage/__init__.py）实现文档存储，
+适用于单机部署和 CI / 基准测试，不需要 MongoDB。
+
+- 每个集合一张表 (id, doc)，文档以 JSON 保存；datetime 编码为 {"$date": ...}
+- create_index() 在 json_extract 表达式上建索引；查询中对已建索引字段（及 _id）的
+  标量等值条件、_id 的 $in 条件下推到 SQL，其余条件在 Python 中匹配
+- 数组字段按 Mongo 语义匹配任一元素，SQL 等值无法表达：出现过数组值的索引字段不再下推
+- WAL 模式，单连接 + 单线程执行器：所有操作串行执行，update_one 的读改写是原子的
+"""
+
+import asyncio
+import json
+import logging
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from app.storage.query import MISSING, get_path, match, normalize
+
+logger = logging.getLogger(__name__)
+
+_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_PATH_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+# 非下推查询每次从 SQLite 读取的行数
+_SCAN_BATCH = 500
+
+
+@dataclass
+class InsertOneResult:
+    inserted_id: Any
+
+
+@dataclass
+class InsertManyResult:
+    inserted_ids: list
+
+
+@dataclass
+class UpdateResult:
+    matched_count: int
+    modified_count: int
+    upserted_id: Any = None
+
+
+@dataclass
+class DeleteResult:
+    deleted_count: int
+
+
+# ============ 编解码 ============
+
+def _encode_default(obj: Any) -> Any:
+    if isinstance(obj, datetime):
+        if obj.tzinfo is not None:
+            obj = obj.astimezone(timezone.utc).replace(tzinfo=None)
+        return {"$date": obj.isoformat()}
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"无法保存类型: {type(obj).__name__}")
+
+
+def _decode_hook(obj: dict) -> Any:
+    # 与 Motor 默认行为一致：datetime 以 naive UTC 返回
+    if len(obj) == 1 and "$date" in obj:
+        return datetime.fromisoformat(obj["$date"])
+    return obj
+
+
+def _encode(doc: dict) -> str:
+    return json.dumps(doc, default=_encode_default, ensure_ascii=False, separators=(",", ":"))
+
+
+def _decode(text: str) -> dict:
+    return json.loads(text, object_hook=_decode_hook)
+
+
+def _row_id(value: Any) -> str:
+    return value if isinstance(value, str) else _encode(value)
+
+
+def _scalar_in(condition: Any) -> bool:
+    """条件是否为只含标量值的 {"$in": [...]}"""
+    return (
+        isinstance(condition, dict)
+        and list(condition) == ["$in"]
+        and isinstance(condition["$in"], (list, tuple))
+        and all(
+            isinstance(v, (str, int, float)) and not isinstance(v, bool)
+            for v in condition["$in"]
+        )
+    )
+
+
+# ============ 更新 ============
+
+def _set_path(doc: dict, path: str, value: Any):
+    keys = path.split(".")
+    for key in keys[:-1]:
+        child = doc.get(key)
+        if not isinstance(child, dict):
+            child = doc[key] = {}
+        doc = child
+    doc[keys[-1]] = value
+
+
+def _unset_path(doc: dict, path: str):
+    keys = path.split(".")
+    for key in keys[:-1]:
+        doc = doc.get(key)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(keys[-1], None)
+
+
+def _apply_update(doc: dict, update: dict, inserting: bool = False):
+    for op, fields in update.items():
+        if op == "$set":
+            for path, value in fields.items():
+                _set_path(doc, path, value)
+        elif op == "$setOnInsert":
+            if inserting:
+                for path, value in fields.items():
+                    _set_path(doc, path, value)
+        elif op == "$inc":
+            for path, value in fields.items():
+                current = get_path(doc, path)
+                _set_path(doc, path, (0 if current in (MISSING, None) else current) + value)
+        elif op == "$unset":
+            for path in fields:
+                _unset_path(doc, path)
+        else:
+            raise ValueError(f"不支持的更新操作符: {op}")
+
+
+# ============ 排序与投影 ============
+
+def _sort_key(value: Any) -> tuple:
+    """按 Mongo 的类型顺序排序：缺失/null < 数字 < 字符串 < 对象 < 数组 < 布尔 < 日期"""
+    value = normalize(value)
+    if value is MISSING or value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (5, value)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    if isinstance(value, dict):
+        return (3, _encode(value))
+    if isinstance(value, list):
+        return (4, _encode(value))
+    if isinstance(value, datetime):
+        return (6, value)
+    return (7, str(value))
+
+
+def _project(doc: dict, projection: Optional[dict]) -> dict:
+    if not projection:
+        return doc
+    include_id = bool(projection.get("_id", 1))
+    fields = {k: v for k, v in projection.items() if k != "_id"}
+    if fields and all(fields.values()):
+        result = {}
+        for path in fields:
+            value = get_path(doc, path)
+            if value is not MISSING:
+                _set_path(result, path, value)
+    else:
+        result = _decode(_encode(doc)) if fields else dict(doc)
+        for path in fields:
+            _unset_path(result, path)
+    if include_id and "_id" in doc:
+        result["_id"] = doc["_id"]
+    else:
+        result.pop("_id", None)
+    return result
+
+
+# ============ 数据库与集合 ============
+
+class SQLiteDatabase:
+    """
+    SQLite 文档数据库（接口与 Motor 的 AsyncIOMotorDatabase 子集一致）
+
+    Args:
+        path: 数据库文件路径，":memory:" 为内存库
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._collections: dict[str, SQLiteCollection] = {}
+
+    def __getattr__(self, name: str) -> "SQLiteCollection":
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name: str) -> "SQLiteCollection":
+        collection = self._collections.get(name)
+        if collection is None:
+            if not _NAME_RE.match(name):
+                raise ValueError(f"非法的集合名: {name}")
+            collection = self._collections[name] = SQLiteCollection(self, name)
+        return collection
+
+    async def run(self, fn, *args):
+        """在数据库线程中执行（所有操作串行）"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self._conn.close()
+
+
+@dataclass
+class _Plan:
+    """查询计划：下推到 SQL 的条件与是否完全下推"""
+    where: str = ""
+    params: list = field(default_factory=list)
+    exact: bool = True
+
+
+class SQLiteCollection:
+    def __init__(self, database: SQLiteDatabase, name: str):
+        self.database = database
+        self.name = name
+        self._table = f'"{name}"'
+        self._indexed: set[str] = set()
+        self._array_fields: set[str] = set()  # 出现过数组值的索引字段（不下推）
+        self._ready = False
+
+    # ---- 数据库线程中执行的同步实现 ----
+
+    def _ensure_table(self):
+        if self._ready:
+            return
+        conn = self.database._conn
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {self._table} (id TEXT PRIMARY KEY, doc TEXT NOT NULL)")
+        # 其他进程 / 上次运行创建的索引：恢复可下推的字段
+        for (sql,) in conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type='index' AND tbl_name=? AND sql IS NOT NULL",
+            (self.name,),
+        ):
+            self._indexed.update(re.findall(r"json_extract\(doc, '\$\.([A-Za-z0-9_.]+)'\)", sql))
+        self._ready = True
+        for path in self._indexed:
+            self._probe_arrays(path)
+
+    def _probe_arrays(self, path: str):
+        """检查已有数据中该字段是否有数组值（数组的 json_extract 结果以 [ 开头，走索引范围查询）"""
+        expr = f"json_extract(doc, '$.{path}')"
+        row = self.database._conn.execute(
+            f"SELECT 1 FROM {self._table} WHERE {expr} >= '[' AND {expr} < '\\' "
+            f"AND json_type(doc, '$.{path}') = 'array' LIMIT 1"
+        ).fetchone()
+        if row:
+            self._array_fields.add(path)
+
+    def _note_arrays(self, doc: dict):
+        """写入的文档在索引字段上是数组时，该字段不再下推"""
+        for path in self._indexed - self._array_fields:
+            if isinstance(get_path(doc, path), list):
+                self._array_fields.add(path)
+
+    def _plan(self, query: dict) -> _Plan:
+        plan = _Plan()
+        clauses = []
+        for key, condition in (query or {}).items():
+            scalar = isinstance(condition, (str, int, float)) and not isinstance(condition, bool)
+            if key == "_id" and scalar:
+                clauses.append("id = ?")
+                plan.params.append(_row_id(condition))
+            elif key == "_id" and _scalar_in(condition):
+                # 按 _id 批量删除 / 读取
+                values = condition["$in"]
+                clauses.append(f"id IN ({', '.join('?' * len(values))})" if values else "0")
+                plan.params.extend(_row_id(value) for value in values)
+            elif key in self._indexed and key not in self._array_fields and scalar:
+                clauses.append(f"json_extract(doc, '$.{key}') = ?")
+                plan.params.append(condition)
+            else:
+                plan.exact = False
+        plan.where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return plan
+
+    def _scan(self, query: dict, after: int = 0):
+        """按 rowid 顺序逐批读取并匹配 rowid > after 的文档，产出 (rowid, doc)"""
+        self._ensure_table()
+        plan = self._plan(query)
+        last = after
+        joiner = " AND " if plan.where else " WHERE "
+        while True:
+            rows = self.database._conn.execute(
+                f"SELECT rowid, doc FROM {self._table}{plan.where}{joiner}rowid > ? "
+                f"ORDER BY rowid LIMIT {_SCAN_BATCH}",
+                (*plan.params, last),
+            ).fetchall()
+            for rowid, text in rows:
+                doc = _decode(text)
+                if plan.exact or match(doc, query):
+                    yield rowid, doc
+            if len(rows) < _SCAN_BATCH:
+                return
+            last = rows[-1][0]
+
+    def _find(self, query, projection, sort, skip, limit) -> list[dict]:
+        self._ensure_table()
+        plan = self._plan(query)
+        if plan.exact and sort and all(_PATH_RE.match(k) for k, _ in sort):
+            # 完全下推：排序与分页交给 SQLite
+            order = ", ".join(
+                f"json_extract(doc, '$.{key}') {'DESC' if direction < 0 else 'ASC'}"
+                for key, direction in sort
+            )
+            sql = f"SELECT doc FROM {self._table}{plan.where} ORDER BY {order}, rowid"
+            sql += f" LIMIT {int(limit) if limit else -1} OFFSET {int(skip)}"
+            docs = [_decode(text) for (text,) in self.database._conn.execute(sql, plan.params)]
+        elif sort:
+            docs = [doc for _, doc in self._scan(query)]
+            for key, direction in reversed(sort):
+                docs.sort(key=lambda d: _sort_key(get_path(d, key)), reverse=direction < 0)
+            docs = docs[skip:skip + limit if limit else None]
+        else:
+            docs = []
+            for _, doc in self._scan(query):
+                if skip:
+                    skip -= 1
+                    continue
+                docs.append(doc)
+                if limit and len(docs) >= limit:
+                    break
+        return [_project(doc, projection) for doc in docs]
+
+    def _page(self, query, projection, after: int, size: int) -> tuple[list[dict], int, bool]:
+        """读取 rowid > after 的至多 size 个匹配文档，返回 (文档, 最后 rowid, 是否已读完)"""
+        docs = []
+        for rowid, doc in self._scan(query, after):
+            docs.append(_project(doc, projection))
+            after = rowid
+            if len(docs) >= size:
+                return docs, after, False
+        return docs, after, True
+
+    def _insert(self, docs: list[dict]) -> list:
+        self._ensure_table()
+        conn = self.database._conn
+        rows = []
+        for doc in docs:
+            if "_id" not in doc:
+                doc["_id"] = ObjectId()
+            self._note_arrays(doc)
+            rows.append((_row_id(normalize(doc["_id"])), _encode(doc)))
+        try:
+            conn.execute("BEGIN")
+            conn.executemany(f"INSERT INTO {self._table} (id, doc) VALUES (?, ?)", rows)
+            conn.execute("COMMIT")
+        except sqlite3.IntegrityError as e:
+            conn.execute("ROLLBACK")
+            raise DuplicateKeyError(str(e)) from e
+        return [doc["_id"] for doc in docs]
+
+    def _update(self, query: dict, update: dict, upsert: bool, many: bool) -> UpdateResult:
+        conn = self.database._conn
+        matched = modified = 0
+        changes = []
+        for rowid, doc in self._scan(query):
+            matched += 1
+            before = _encode(doc)
+            _apply_update(doc, update)
+            self._note_arrays(doc)
+            after = _encode(doc)
+            if after != before:
+                modified += 1
+                changes.append((after, rowid))
+            if not many:
+                break
+        if changes:
+            conn.execute("BEGIN")
+            conn.executemany(f"UPDATE {self._table} SET doc = ? WHERE rowid = ?", changes)
+            conn.execute("COMMIT")
+        if matched or not upsert:
+            return UpdateResult(matched, modified)
+
+        doc = {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+        _apply_update(doc, update, inserting=True)
+        return UpdateResult(0, 0, upserted_id=self._insert([doc])[0])
+
+    def _delete(self, query: dict, many: bool) -> int:
+        rowids = []
+        for rowid, _ in self._scan(query):
+            rowids.append((rowid,))
+            if not many:
+                break
+        if rowids:
+            conn = self.database._conn
+            conn.execute("BEGIN")
+            conn.executemany(f"DELETE FROM {self._table} WHERE rowid = ?", rowids)
+            conn.execute("COMMIT")
+        return len(rowids)
+
+    def _count(self, query: dict) -> int:
+        self._ensure_table()
+        plan = self._plan(query)
+        if plan.exact:
+            sql = f"SELECT COUNT(*) FROM {self._table}{plan.where}"
+            return self.database._conn.execute(sql, plan.params).fetchone()[0]
+        return sum(1 for _ in self._scan(query))
+
+    def _create_index(self, keys) -> str:
+        self._ensure_table()
+        if isinstance(keys, str):
+            keys = [(keys, 1)]
+        paths = [key for key, _ in keys]
+        for path in paths:
+            if not _PATH_RE.match(path):
+                raise ValueError(f"非法的索引字段: {path}")
+        name = f"{self.name}__{'_'.join(p.replace('.', '_') for p in paths)}"
+        columns = ", ".join(f"json_extract(doc, '$.{path}')" for path in paths)
+        self.database._conn.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON {self._table} ({columns})'
+        )
+        # 只有首个字段可单独下推（复合索引的前缀）
+        self._indexed.add(paths[0])
+        self._probe_arrays(paths[0])
+        return name
+
+    # ---- Motor 兼容的异步接口 ----
+
+    def find(self, filter: dict = None, projection: dict = None) -> "SQLiteCursor":
+        return SQLiteCursor(self, filter or {}, projection)
+
+    async def find_one(self, filter: dict = None, projection: dict = None) -> Optional[dict]:
+        docs = await self.database.run(self._find, filter or {}, projection, None, 0, 1)
+        return docs[0] if docs else None
+
+    async def insert_one(self, document: dict) -> InsertOneResult:
+        ids = await self.database.run(self._insert, [document])
+        return InsertOneResult(ids[0])
+
+    async def insert_many(self, documents: list[dict], ordered: bool = True) -> InsertManyResult:
+        documents = list(documents)
+        if not documents:
+            return InsertManyResult([])
+        return InsertManyResult(await self.database.run(self._insert, documents))
+
+    async def update_one(self, filter: dict, update: dict, upsert: bool = False) -> UpdateResult:
+        return await self.database.run(self._update, filter, update, upsert, False)
+
+    async def update_many(self, filter: dict, update: dict, upsert: bool = False) -> UpdateResult:
+        return await self.database.run(self._update, filter, update, upsert, True)
+
+    async def delete_one(self, filter: dict) -> DeleteResult:
+        return DeleteResult(await self.database.run(self._delete, filter, False))
+
+    async def delete_many(self, filter: dict) -> DeleteResult:
+        return DeleteResult(await self.database.run(self._delete, filter, True))
+
+    async def count_documents(self, filter: dict) -> int:
+        return await self.database.run(self._count, filter)
+
+    async def create_index(self, keys, **kwargs) -> str:
+        return await self.database.run(self._create_index, keys)
+
+
+class SQLiteCursor:
+    """
+    find() 返回的游标：链式设置排序 / 分页，迭代时执行查询
+
+    未排序时按 rowid 分批读取（每批 batch_size 条），大集合不会一次性载入内存；
+    排序时一次性读取（完全下推的查询由 SQLite 排序分页）。
+    """
+
+    def __init__(self, collection: SQLiteCollection, query: dict, projection: Optional[dict]):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort: list[tuple[str, int]] = []
+        self._skip = 0
+        self._limit = 0
+        self._batch_size = _SCAN_BATCH
+        self._buffer: list[dict] = []
+        self._offset = 0
+        self._after = 0  # 已读取的最大 rowid
+        self._returned = 0
+        self._exhausted = False
+
+    def sort(self, key, direction: int = None) -> "SQLiteCursor":
+        self._sort = [(key, direction or 1)] if isinstance(key, str) else list(key)
+        return self
+
+    def skip(self, count: int) -> "SQLiteCursor":
+        self._skip = count
+        return self
+
+    def limit(self, count: int) -> "SQLiteCursor":
+        self._limit = count
+        return self
+
+    def batch_size(self, size: int) -> "SQLiteCursor":
+        self._batch_size = max(1, size)
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        while self._offset >= len(self._buffer):
+            if self._exhausted:
+                raise StopAsyncIteration
+            await self._fetch()
+        doc = self._buffer[self._offset]
+        self._offset += 1
+        return doc
+
+    async def _fetch(self):
+        collection = self._collection
+        self._offset = 0
+        if self._sort:
+            self._buffer = await collection.database.run(
+                collection._find, self._query, self._projection, self._sort, self._skip, self._limit
+            )
+            self._exhausted = True
+            return
+
+        docs, self._after, self._exhausted = await collection.database.run(
+            collection._page, self._query, self._projection, self._after, self._batch_size
+        )
+        if self._skip:
+            dropped = min(self._skip, len(docs))
+            docs = docs[dropped:]
+            self._skip -= dropped
+        if self._limit:
+            docs = docs[:self._limit - self._returned]
+            self._returned += len(docs)
+            if self._returned >= self._limit:
+                self._exhausted = True
+        self._buffer = docs
+
+    async def to_list(self, length: Optional[int] = None) -> list[dict]:
+        docs = []
+        async for doc in self:
+            docs.append(doc)
+            if length and len(docs) >= length:
+                break
+        return docs
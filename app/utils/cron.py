@@ -0,0 +1,94 @@
+"""
+Cron 表达式解析
+支持标准 5 段格式：分 时 日 月 周（周日为 0 或 7），
+每段可使用 *、数字、范围 a-b、步长 */n 或 a-b/n 以及逗号列表。
+"""
+
+from datetime import datetime, timedelta
+
+# 各字段的取值范围（闭区间）
+_FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 7),
+)
+
+# 查找下一次触发时间的最大跨度，防止永不匹配的表达式（如 2 月 30 日）死循环
+_SEARCH_LIMIT = timedelta(days=366 * 5)
+
+
+def _parse_field(text: str, low: int, high: int) -> set[int]:
+    values = set()
+    for part in text.split(","):
+        step = 1
+        stepped = "/" in part
+        if stepped:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step <= 0:
+                raise ValueError(f"步长必须为正数: {text}")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(part)
+            end = high if stepped else start
+        if not (low <= start <= end <= high):
+            raise ValueError(f"取值超出范围 {low}-{high}: {text}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSpec:
+    """解析后的 Cron 表达式"""
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron 表达式应为 5 段（分 时 日 月 周）: {expression!r}")
+        try:
+            fields = [
+                _parse_field(text, low, high)
+                for text, (_, low, high) in zip(parts, _FIELDS)
+            ]
+        except ValueError as e:
+            raise ValueError(f"无效的 Cron 表达式 {expression!r}: {e}") from None
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = fields
+        # 周日可写作 0 或 7；转换为 Python 的 weekday()（周一为 0）
+        self.weekdays = {(d - 1) % 7 for d in weekdays}
+        # 与标准 cron 一致：日和周都被限定时，满足其一即可
+        self._day_any = parts[2] == "*"
+        self._weekday_any = parts[4] == "*"
+
+    def _day_matches(self, t: datetime) -> bool:
+        day_ok = t.day in self.days
+        weekday_ok = t.weekday() in self.weekdays
+        if self._day_any or self._weekday_any:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, after: datetime) -> datetime:
+        """返回严格晚于 after 的下一次触发时间（保留 after 的时区）"""
+        t = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + _SEARCH_LIMIT
+        while t < limit:
+            if t.month not in self.months:
+                year, month = (t.year + 1, 1) if t.month == 12 else (t.year, t.month + 1)
+                t = t.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(t):
+                t = (t + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if t.hour not in self.hours:
+                t = (t + timedelta(hours=1)).replace(minute=0)
+                continue
+            if t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+                continue
+            return t
+        raise ValueError(f"Cron 表达式在 5 年内没有触发时间: {self.expression!r}")
@@ -3,15 +3,82 @@ HTTP 请求客户端封装
 基于 httpx 异步客户端，复用连接池以提升性能
 """
 
+import asyncio
 import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from types import SimpleNamespace
+from typing import AsyncIterator
+from urllib.parse import urlsplit
+
 import httpx
-from app.config import DEFAULT_USER_AGENT, REQUEST_TIMEOUT
+from app.config import (
+    DEFAULT_USER_AGENT, REQUEST_TIMEOUT, MAX_RESPONSE_BYTES, ALLOWED_CONTENT_TYPES,
+    FETCH_COALESCE, FETCH_MEMO_TTL, FETCH_MEMO_MAX_ENTRIES,
+)
+from app.utils import logs, metrics, tracing
 
 logger = logging.getLogger(__name__)
 
+
+class ResponseRejected(Exception):
+    """响应在读取响应体前/过程中被拒绝（超限或类型不允许）"""
+
+
+class ResponseTooLarge(ResponseRejected):
+    """响应体超过大小上限"""
+
+
+class ContentTypeNotAllowed(ResponseRejected):
+    """响应 Content-Type 不在白名单中"""
+
 # 全局共享的 AsyncClient 实例（通过 lifespan 管理生命周期）
 _client: httpx.AsyncClient | None = None
 
+# 请求闸门：由调度层绑定（如按主机自适应并发），需提供 slot(host) 异步上下文管理器
+_request_gate: ContextVar = ContextVar("request_gate", default=None)
+# 请求预算：由 FlowManager 绑定，需提供 charge_request(nbytes)，每个实际发出的请求计量一次
+_request_budget: ContextVar = ContextVar("request_budget", default=None)
+
+
+@contextmanager
+def bind_request_gate(gate):
+    """在当前上下文及其派生的子协程中，让 fetch() / open_stream() 经过指定闸门"""
+    token = _request_gate.set(gate)
+    try:
+        yield gate
+    finally:
+        _request_gate.reset(token)
+
+
+@contextmanager
+def bind_request_budget(budget):
+    """在当前上下文及其派生的子协程中，把 fetch() / open_stream() 的请求数和下载字节数计入预算"""
+    token = _request_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _request_budget.reset(token)
+
+
+def _charge_budget(nbytes: int):
+    budget = _request_budget.get()
+    if budget is not None:
+        budget.charge_request(nbytes)
+
+
+@asynccontextmanager
+async def _gate_slot(host: str):
+    """占用闸门槽位；未绑定闸门时不限制。产出的对象用于回填响应状态码"""
+    gate = _request_gate.get()
+    if gate is None:
+        yield SimpleNamespace(status=None)
+        return
+    async with gate.slot(host) as outcome:
+        yield outcome
+
 
 async def init_client():
     """初始化全局 HTTP 客户端（在 FastAPI lifespan 中调用）"""
@@ -45,10 +112,19 @@ async def fetch(
     body: str = None,
     content_type: str = None,
     timeout: int = REQUEST_TIMEOUT,
+    max_bytes: int = None,
+    allowed_content_types: list[str] = None,
 ) -> httpx.Response:
     """
     发起 HTTP 请求（复用全局连接池）
 
+    响应体以流式读取：先检查 Content-Type 和 Content-Length，
+    读取过程中一旦超过 max_bytes 立即中止，单个请求的内存占用有上限。
+
+    同一任务内（同一请求闸门和预算）同一时刻完全相同的请求（方法、URL、请求体、
+    请求头、Cookies、读取限制）只发送一次，所有调用方共享同一个响应对象（调用方不应修改它）；
+    开启 FETCH_MEMO_TTL 时成功的 GET 响应还会在进程内短暂缓存，缓存在任务之间共享。
+
     Args:
         url: 请求目标 URL
         method: GET 或 POST
@@ -57,44 +133,318 @@ async def fetch(
         body: POST 请求体
         content_type: Content-Type
         timeout: 超时秒数
+        max_bytes: 响应体大小上限，None 使用全局配置，0 为不限制
+        allowed_content_types: 允许的响应类型，None 使用全局白名单
 
     Returns:
-        httpx.Response 响应对象
+        httpx.Response 响应对象（响应体已读取完毕）
+
+    Raises:
+        ResponseTooLarge: 响应体超过大小上限
+        ContentTypeNotAllowed: 响应类型不在白名单中
     """
-    # 合并默认请求头
-    final_headers = {"User-Agent": DEFAULT_USER_AGENT}
-    if headers:
-        final_headers.update(headers)
-    if content_type:
-        final_headers["Content-Type"] = content_type
+    if max_bytes is None:
+        max_bytes = MAX_RESPONSE_BYTES
+    if allowed_content_types is None:
+        allowed_content_types = ALLOWED_CONTENT_TYPES
+    args = (url, method, headers, cookies, body, content_type, timeout,
+            max_bytes, allowed_content_types)
+    if not FETCH_COALESCE:
+        return await _fetch_once(*args)
+
+    request_key = _flight_key(*args)
+    memoized = _memo_get(request_key)
+    if memoized is not None:
+        metrics.COALESCED_REQUESTS.inc(result="memo")
+        return memoized
+
+    # 共享的请求占用发起方的闸门槽位（含全局请求槽位份额）并计入其预算，
+    # 只在闸门和预算相同的调用方之间合并，一个任务结束不会拖住另一个任务
+    key = (request_key, id(_request_gate.get()), id(_request_budget.get()))
 
-    logger.info("HTTP 请求: %s %s", method, url)
-    client = _client
-    if client is None:
-        # 降级：若全局客户端未初始化，创建临时客户端
-        logger.warning("全局 HTTP 客户端未初始化，使用临时客户端（性能较低）")
-        client = httpx.AsyncClient(
-            timeout=timeout,
-            follow_redirects=True,
-            verify=False,
-        )
+    flight = _inflight.get(key)
+    follower = flight is not None
+    if follower:
+        metrics.COALESCED_REQUESTS.inc(result="shared")
+        logger.debug("合并到进行中的请求: %s %s", method, url)
+    else:
+        # 实际请求在独立 Task 中执行（继承当前上下文的指标标签和并发闸门），
+        # 任一等待方被取消都不会中断其他等待方共享的请求
+        flight = _inflight[key] = _Flight(asyncio.ensure_future(_fetch_once(*args)))
+        flight.task.add_done_callback(lambda task: _land(key, request_key, flight, method))
 
+    flight.waiters += 1
+    started = time.perf_counter()
     try:
-        if method.upper() == "POST":
-            response = await client.post(
-                url,
-                headers=final_headers,
-                cookies=cookies or {},
-                content=body,
-            )
-        else:
-            response = await client.get(
-                url,
-                headers=final_headers,
-                cookies=cookies or {},
-            )
+        return await asyncio.shield(flight.task)
+    except asyncio.CancelledError:
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.task.done():
+            # 已无等待方，放弃请求；先移出表，避免新调用方拿到被取消的结果
+            if _inflight.get(key) is flight:
+                del _inflight[key]
+            flight.task.cancel()
+        raise
+    finally:
+        if follower:
+            tracing.add_phase("network", time.perf_counter() - started)
+
+
+class _Flight:
+    """一个进行中的请求及其等待方数量"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+# 单飞：(请求键, 闸门, 预算) → 进行中的请求；短期缓存：请求键 → (过期时间, 响应)
+_inflight: dict[tuple, _Flight] = {}
+_memo: "OrderedDict[tuple, tuple[float, httpx.Response]]" = OrderedDict()
+
+
+def _flight_key(url, method, headers, cookies, body, content_type, timeout,
+                max_bytes, allowed_content_types) -> tuple:
+    """请求键：方法、URL、请求体以及会影响响应的请求头 / Cookies / 读取限制"""
+    return (
+        method.upper(),
+        url,
+        body if method.upper() == "POST" else None,
+        content_type,
+        tuple(sorted((str(k).lower(), str(v)) for k, v in (headers or {}).items())),
+        tuple(sorted((cookies or {}).items())),
+        max_bytes,
+        tuple(allowed_content_types or ()),
+    )
+
+
+def _land(key: tuple, request_key: tuple, flight: _Flight, method: str):
+    """请求结束：移出单飞表，成功的 GET 响应按配置以请求键写入短期缓存"""
+    if _inflight.get(key) is flight:
+        del _inflight[key]
+    task = flight.task
+    if task.cancelled() or task.exception() is not None:
+        return
+    response = task.result()
+    if FETCH_MEMO_TTL > 0 and method.upper() == "GET" and response.is_success:
+        _memo[request_key] = (time.monotonic() + FETCH_MEMO_TTL, response)
+        _memo.move_to_end(request_key)
+        while len(_memo) > FETCH_MEMO_MAX_ENTRIES:
+            _memo.popitem(last=False)
+
+
+def _memo_get(key: tuple) -> httpx.Response | None:
+    if not _memo:
+        return None
+    entry = _memo.get(key)
+    if entry is None:
+        return None
+    expires_at, response = entry
+    if expires_at < time.monotonic():
+        del _memo[key]
+        return None
+    _memo.move_to_end(key)
+    return response
+
+
+async def _fetch_once(
+    url: str,
+    method: str,
+    headers: dict,
+    cookies: dict,
+    body: str,
+    content_type: str,
+    timeout: int,
+    max_bytes: int,
+    allowed_content_types: list[str],
+) -> httpx.Response:
+    """实际发起一次请求（见 fetch）"""
+    logs.trace("fetch", method=method, url=url)
+    client = _get_client(timeout)
+
+    host = urlsplit(url).hostname or ""
+    started = time.perf_counter()
+    metrics.INFLIGHT_REQUESTS.inc()
+    downloaded = 0
+    try:
+        request = _build_request(client, url, method, headers, cookies, body, content_type)
+        async with _gate_slot(host) as slot:
+            streamed = await client.send(request, stream=True)
+            slot.status = streamed.status_code
+            try:
+                response = await _read_limited(streamed, max_bytes, allowed_content_types)
+            finally:
+                await streamed.aclose()
+                # 与 open_stream 一致按线上字节数计量（压缩响应不按解压后的大小）
+                downloaded = streamed.num_bytes_downloaded
+        metrics.RESPONSES.inc(host=host, code=response.status_code)
+        metrics.DOWNLOADED_BYTES.inc(downloaded, host=host)
         return response
+    except Exception as e:
+        metrics.RESPONSES.inc(host=host, code=type(e).__name__)
+        if isinstance(e, ResponseRejected):
+            logger.warning("响应已中止: %s %s (%s)", method, url, e)
+        raise
     finally:
+        _charge_budget(downloaded)
+        elapsed = time.perf_counter() - started
+        metrics.INFLIGHT_REQUESTS.dec()
+        metrics.FETCH_SECONDS.observe(elapsed)
+        tracing.add_phase("network", elapsed)
         # 仅关闭临时客户端
         if _client is None and client is not None:
             await client.aclose()
+
+
+@asynccontextmanager
+async def open_stream(
+    url: str,
+    method: str = "GET",
+    headers: dict = None,
+    cookies: dict = None,
+    body: str = None,
+    content_type: str = None,
+    timeout: int = REQUEST_TIMEOUT,
+    allowed_content_types: list[str] = None,
+) -> AsyncIterator[httpx.Response]:
+    """
+    以流式方式发起请求，响应体由调用方通过 response.aiter_bytes() 逐块消费
+
+    用于超大响应的增量解析：不做 max_bytes 限制（调用方负责有界消费），
+    但仍在读取前校验 Content-Type 白名单。
+
+    Raises:
+        ContentTypeNotAllowed: 响应类型不在白名单中
+    """
+    if allowed_content_types is None:
+        allowed_content_types = ALLOWED_CONTENT_TYPES
+
+    logs.trace("fetch", method=method, url=url, stream=True)
+    client = _get_client(timeout)
+    host = urlsplit(url).hostname or ""
+    started = time.perf_counter()
+    metrics.INFLIGHT_REQUESTS.inc()
+    response = None
+    try:
+        request = _build_request(client, url, method, headers, cookies, body, content_type)
+        try:
+            # 流式响应的消费时间由调用方决定，闸门只覆盖到收到响应头为止，
+            # 避免长时间读取占住槽位、阻塞同主机的子请求
+            async with _gate_slot(host) as slot:
+                response = await client.send(request, stream=True)
+                slot.status = response.status_code
+        except Exception as e:
+            metrics.RESPONSES.inc(host=host, code=type(e).__name__)
+            raise
+        # 流式请求的耗时按首字节计，响应体读取时间由调用方决定
+        elapsed = time.perf_counter() - started
+        metrics.FETCH_SECONDS.observe(elapsed)
+        tracing.add_phase("network", elapsed)
+        metrics.RESPONSES.inc(host=host, code=response.status_code)
+
+        resp_content_type = response.headers.get("content-type", "")
+        if not content_type_allowed(resp_content_type, allowed_content_types):
+            raise ContentTypeNotAllowed(f"不允许的响应类型: {resp_content_type}")
+        yield response
+    finally:
+        metrics.INFLIGHT_REQUESTS.dec()
+        if response is not None:
+            await response.aclose()
+            metrics.DOWNLOADED_BYTES.inc(response.num_bytes_downloaded, host=host)
+        _charge_budget(response.num_bytes_downloaded if response is not None else 0)
+        if _client is None:
+            await client.aclose()
+
+
+def _get_client(timeout: int) -> httpx.AsyncClient:
+    """获取全局客户端；未初始化时降级为临时客户端（由调用方负责关闭）"""
+    if _client is not None:
+        return _client
+    logger.warning("全局 HTTP 客户端未初始化，使用临时客户端（性能较低）")
+    return httpx.AsyncClient(
+        timeout=timeout,
+        follow_redirects=True,
+        verify=False,
+    )
+
+
+def _build_request(
+    client: httpx.AsyncClient,
+    url: str,
+    method: str,
+    headers: dict,
+    cookies: dict,
+    body: str,
+    content_type: str,
+) -> httpx.Request:
+    """合并默认请求头并构造请求"""
+    final_headers = {"User-Agent": DEFAULT_USER_AGENT}
+    if headers:
+        final_headers.update(headers)
+    if content_type:
+        final_headers["Content-Type"] = content_type
+
+    is_post = method.upper() == "POST"
+    return client.build_request(
+        "POST" if is_post else "GET",
+        url,
+        headers=final_headers,
+        cookies=cookies or {},
+        content=body if is_post else None,
+    )
+
+
+def content_type_allowed(content_type_header: str, allowed: list[str]) -> bool:
+    """判断响应 Content-Type 是否在白名单中（缺失 Content-Type 时放行）"""
+    mime = content_type_header.split(";", 1)[0].strip().lower()
+    if not mime or not allowed:
+        return True
+    for pattern in allowed:
+        pattern = pattern.lower()
+        if pattern == "*" or mime == pattern:
+            return True
+        if pattern.endswith("/") and mime.startswith(pattern):
+            return True
+        if pattern.startswith("+") and mime.endswith(pattern):
+            return True
+    return False
+
+
+async def _read_limited(
+    response: httpx.Response, max_bytes: int, allowed: list[str]
+) -> httpx.Response:
+    """
+    按大小上限流式读取响应体，超限或类型不允许时在读取前/读取中中止
+
+    Returns:
+        已读入内容的新 Response（.content / .text 可直接使用）
+    """
+    resp_content_type = response.headers.get("content-type", "")
+    if not content_type_allowed(resp_content_type, allowed):
+        raise ContentTypeNotAllowed(f"不允许的响应类型: {resp_content_type}")
+
+    if max_bytes:
+        declared = response.headers.get("content-length", "")
+        if declared.isdigit() and int(declared) > max_bytes:
+            raise ResponseTooLarge(f"Content-Length {declared} 超过上限 {max_bytes}")
+
+    chunks = []
+    size = 0
+    async for chunk in response.aiter_bytes():
+        size += len(chunk)
+        if max_bytes and size > max_bytes:
+            raise ResponseTooLarge(f"响应体超过上限 {max_bytes} 字节")
+        chunks.append(chunk)
+    # aiter_bytes 已解压：去掉 Content-Encoding / Content-Length，新 Response 按解压后的内容处理
+    headers = [
+        (name, value) for name, value in response.headers.multi_items()
+        if name.lower() not in ("content-encoding", "content-length")
+    ]
+    return httpx.Response(
+        response.status_code,
+        headers=headers,
+        content=b"".join(chunks),
+        request=response.request,
+    )
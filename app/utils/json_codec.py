@@ -0,0 +1,116 @@
+"""
+JSON 编解码
+统一解析器、data:// 哈希和 API 响应使用的 JSON 后端
+
+后端由环境变量 JSON_BACKEND 选择：
+- auto（默认）：已安装 orjson 时使用 orjson，否则使用标准库 json
+- orjson / stdlib：强制指定
+
+两种后端都支持 datetime 和 ObjectId，输出一致（不带时区的 datetime 按 UTC 输出
++00:00 偏移）；orjson 无法处理的对象（如超过 64 位的整数）会自动回退到标准库。
+
+内容哈希（data:// ID、change detection 摘要、去重计数）使用 canonical_bytes，
+固定走标准库序列化，结果与 JSON_BACKEND 和是否安装 orjson 无关。
+"""
+
+import json
+import logging
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+from app.config import JSON_BACKEND
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 取决于部署环境
+    orjson = None
+
+try:
+    from bson import ObjectId
+except ImportError:  # pragma: no cover - motor 会带上 bson
+    ObjectId = None
+
+if JSON_BACKEND == "orjson" and orjson is None:
+    logger.warning("JSON_BACKEND=orjson 但未安装 orjson，回退到标准库 json")
+
+_use_orjson = orjson is not None and JSON_BACKEND in ("auto", "orjson")
+
+BACKEND = "orjson" if _use_orjson else "stdlib"
+
+if _use_orjson:
+    _ORJSON_OPTS = orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+    DecodeError = orjson.JSONDecodeError  # json.JSONDecodeError 的子类
+else:
+    DecodeError = json.JSONDecodeError
+
+
+def _default(obj: Any) -> Any:
+    """序列化标准类型以外的对象"""
+    if ObjectId is not None and isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, datetime):
+        # 与 orjson 的 OPT_NAIVE_UTC 一致：不带时区的时间按 UTC 处理
+        if obj.tzinfo is None:
+            obj = obj.replace(tzinfo=timezone.utc)
+        return obj.isoformat()
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"无法序列化类型: {type(obj).__name__}")
+
+
+def loads(data: str | bytes) -> Any:
+    """解析 JSON 文本，失败时抛出 DecodeError（json.JSONDecodeError 的子类）"""
+    if _use_orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_bytes(obj: Any, sort_keys: bool = False) -> bytes:
+    """序列化为紧凑的 UTF-8 JSON 字节串"""
+    if _use_orjson:
+        try:
+            option = _ORJSON_OPTS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+            return orjson.dumps(obj, default=_default, option=option)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(
+        obj, default=_default, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys,
+    ).encode("utf-8")
+
+
+def canonical_bytes(obj: Any) -> bytes:
+    """
+    用于内容哈希的规范序列化（键排序、紧凑、UTF-8）
+
+    固定使用标准库 json，不随 JSON_BACKEND 变化：两个后端的浮点数格式不同
+    （1e16 / 1e+16），切换后端不能改变已有的 data:// ID 和内容摘要。
+    """
+    return json.dumps(
+        obj, default=_default, ensure_ascii=False, separators=(",", ":"), sort_keys=True,
+    ).encode("utf-8")
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> str:
+    """序列化为紧凑的 JSON 字符串"""
+    return dumps_bytes(obj, sort_keys=sort_keys).decode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    使用 json_codec 渲染的 JSON 响应
+
+    作为 FastAPI 的 default_response_class；大体量接口直接 return FastJSONResponse(...)
+    还可跳过 FastAPI 的 jsonable_encoder 逐字段遍历，datetime / ObjectId 由编解码器处理。
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
@@ -0,0 +1,171 @@
+"""
+日志管道
+热路径上的日志不在事件循环中做格式化和 I/O：
+
+- 根 logger 只挂一个 QueueHandler，记录放入有界队列后立即返回；
+  格式化（包括 %s 参数）和写出由 QueueListener 的后台线程完成，队列满时丢弃并计数
+- 按 (logger, 级别, 消息模板) 限速：每秒至多 LOG_RATE_LIMIT 条，
+  被抑制的条数附在下一条放行的同类日志上（suppressed 字段）
+- LOG_FORMAT=json 时每行一个 JSON 对象，extra={"fields": {...}} 中的字段原样输出；
+  text 格式把 fields 追加为 key=value
+- 逐 URL 的事件（请求、入库、透传数据）不写普通日志，改用 trace() 写入
+  rulecrawl.trace 通道，按 TRACE_LOG_SAMPLE_RATE 采样，默认关闭，关闭时只有一次比较
+"""
+
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Optional
+
+from app.config import (
+    LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE, LOG_RATE_LIMIT, TRACE_LOG_SAMPLE_RATE,
+)
+from app.utils import json_codec, metrics
+
+_trace_logger = logging.getLogger("rulecrawl.trace")
+
+# 每个请求写一条 INFO 的第三方 logger：LOG_LEVEL 不是 DEBUG 时提升到 WARNING
+_NOISY_LOGGERS = ("httpx",)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional["_NonBlockingQueueHandler"] = None
+
+
+def trace(event: str, **fields):
+    """
+    记录一条采样的结构化事件（逐 URL 的热路径使用）
+
+    Args:
+        event: 事件名，如 fetch / record.saved
+        fields: 事件字段，只在采中时才会被格式化
+    """
+    if TRACE_LOG_SAMPLE_RATE <= 0 or (
+        TRACE_LOG_SAMPLE_RATE < 1 and random.random() >= TRACE_LOG_SAMPLE_RATE
+    ):
+        return
+    _trace_logger.info(event, extra={"fields": fields})
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    按 (logger, 级别, 消息模板) 的令牌桶限速（不作用于 trace 通道）
+
+    Args:
+        rate: 每秒放行条数（同时是突发上限），0 为不限速
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self._buckets: dict[tuple, list] = {}  # key → [令牌, 上次时间, 已抑制条数]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0 or record.name == _trace_logger.name:
+            # trace 通道的量由采样率控制
+            return True
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= 10000:
+                    self._buckets.clear()
+                bucket = self._buckets[key] = [self.rate, now, 0]
+            bucket[0] = min(self.rate, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                metrics.LOGS_DROPPED.inc(reason="rate_limited")
+                return False
+            bucket[0] -= 1
+            if bucket[2]:
+                record.suppressed = bucket[2]
+                bucket[2] = 0
+        return True
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """不格式化、不阻塞的 QueueHandler：消息在监听线程中格式化，队列满时丢弃"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 只把异常栈提前转成文本（避免跨线程持有 traceback），%s 参数留给监听线程
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.LOGS_DROPPED.inc(reason="queue_full")
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            line += f" (已抑制 {suppressed} 条相同日志)"
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json_codec.dumps(entry)
+
+
+def setup_logging():
+    """为根 logger 安装队列日志管道（重复调用无副作用）"""
+    global _listener, _handler
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+
+    _handler = _NonBlockingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    _handler.addFilter(RateLimitFilter(LOG_RATE_LIMIT))
+    root = logging.getLogger()
+    root.addHandler(_handler)
+    root.setLevel(LOG_LEVEL)
+    if root.level > logging.DEBUG:
+        for name in _NOISY_LOGGERS:
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """写出队列中剩余的日志并卸下管道"""
+    global _listener, _handler
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_handler)
+    _listener.stop()
+    _listener = _handler = None
@@ -0,0 +1,249 @@
+"""
+引擎运行指标（Prometheus 文本格式）
+轻量实现 Counter / Gauge / Histogram，不依赖 prometheus_client
+
+project / task / node_type 标签通过 ContextVar 绑定：
+FlowManager 在任务和节点入口处绑定，fetch()、解析器等底层调用自动继承，
+无需层层传参。
+
+计数器和直方图只带 project 标签，序列数与任务数无关；task 标签只用于 Gauge
+（任务级的瞬时状态），任务结束时由 forget(task=...) 移除。
+"""
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable
+
+# 当前协程绑定的公共标签
+_bound_labels: ContextVar[dict] = ContextVar("metric_labels", default={})
+
+COMMON_LABELS = ("project",)
+# Gauge 额外带 task 标签
+TASK_LABELS = ("project", "task")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+FAST_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+@contextmanager
+def bind_labels(**labels):
+    """在当前上下文中绑定公共标签（可嵌套，退出时恢复）"""
+    token = _bound_labels.set({**_bound_labels.get(), **labels})
+    try:
+        yield
+    finally:
+        _bound_labels.reset(token)
+
+
+def current_labels() -> dict:
+    """获取当前上下文绑定的标签"""
+    return _bound_labels.get()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """指标基类：维护 标签值元组 → 数值 的映射"""
+
+    kind = ""
+    common_labels = COMMON_LABELS
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        # 公共标签在前，指标自有标签在后
+        self.labelnames = self.common_labels + tuple(labelnames)
+        self._values: dict[tuple, object] = {}
+        REGISTRY.register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        bound = _bound_labels.get()
+        return tuple(
+            labels.get(name, bound.get(name, "")) for name in self.labelnames
+        )
+
+    def clear(self):
+        self._values.clear()
+
+    def forget(self, labels: dict):
+        """移除匹配全部给定标签值的序列（指标没有其中某个标签时不做任何事）"""
+        try:
+            positions = [(self.labelnames.index(n), v) for n, v in labels.items()]
+        except ValueError:
+            return
+        for key in [k for k in self._values if all(k[i] == v for i, v in positions)]:
+            del self._values[key]
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for key, value in sorted(self._values.items()):
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key: tuple, value) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+    common_labels = TASK_LABELS
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (),
+                 buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            # [各桶计数..., +Inf 计数, 总和]
+            state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """计时上下文管理器"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_sample(self, key: tuple, state) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            labels = _format_labels(self.labelnames, key, f'le="{le}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {state[-1]}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        for metric in self._metrics:
+            metric.clear()
+
+    def forget(self, **labels):
+        for metric in self._metrics:
+            metric.forget(labels)
+
+
+REGISTRY = Registry()
+
+
+def forget(**labels):
+    """
+    移除带有指定标签值的全部序列
+
+    任务结束时 forget(task=...) 清理任务级 Gauge，删除项目时 forget(project=...)；
+    序列不会随任务和项目无限增长。
+    """
+    REGISTRY.forget(**labels)
+
+# ── 引擎指标 ──
+
+FETCH_SECONDS = Histogram(
+    "rulecrawl_fetch_seconds", "HTTP 请求耗时", ("node_type",),
+)
+PARSE_SECONDS = Histogram(
+    "rulecrawl_parse_seconds", "解析耗时", ("node_type",), buckets=FAST_BUCKETS,
+)
+DB_WRITE_SECONDS = Histogram(
+    "rulecrawl_db_write_seconds", "数据库写入耗时", ("node_type",), buckets=FAST_BUCKETS,
+)
+NODE_SECONDS = Histogram(
+    "rulecrawl_node_seconds", "节点执行总耗时", ("node_type",),
+)
+STOP_SECONDS = Histogram(
+    "rulecrawl_task_stop_seconds", "任务停止耗时（从停止指令到排空并保存完成）",
+)
+INFLIGHT_REQUESTS = Gauge(
+    "rulecrawl_inflight_requests", "进行中的 HTTP 请求数",
+)
+QUEUE_DEPTH = Gauge(
+    "rulecrawl_queue_depth", "frontier 中待处理的工作项数",
+)
+HOST_CONCURRENCY_LIMIT = Gauge(
+    "rulecrawl_host_concurrency_limit", "按主机自适应调整的当前并发上限", ("host",),
+)
+RESPONSES = Counter(
+    "rulecrawl_responses_total", "按主机和状态码统计的响应数", ("host", "code"),
+)
+COALESCED_REQUESTS = Counter(
+    "rulecrawl_coalesced_requests_total", "合并到进行中请求或命中短期缓存的请求数", ("result",),
+)
+DOWNLOADED_BYTES = Counter(
+    "rulecrawl_downloaded_bytes_total", "按主机统计的下载字节数", ("host",),
+)
+SELECTOR_CACHE = Counter(
+    "rulecrawl_selector_cache_total", "编译选择器缓存命中情况", ("result",),
+)
+PREVIEW_PAGE_CACHE = Counter(
+    "rulecrawl_preview_page_cache_total", "规则预览样例页面缓存命中情况", ("result",),
+)
+DEDUP_SKIPPED = Counter(
+    "rulecrawl_dedup_skipped_total", "因去重跳过入库的记录数",
+)
+LOGS_DROPPED = Counter(
+    "rulecrawl_logs_dropped_total", "被丢弃的日志条数（queue_full / rate_limited）", ("reason",),
+)
+RECORD_CHANGES = Counter(
+    "rulecrawl_record_changes_total", "变更检测模式下的记录（new / changed / unchanged）", ("result",),
+)
@@ -0,0 +1,177 @@
+"""
+运行时采样分析器
+对运行中的任务做 CPU 采样并可选采集 tracemalloc 快照，无需重启进程
+
+CPU 采样：后台线程按固定间隔读取事件循环线程的调用栈，
+仅统计栈中包含目标对象（如某个任务的 FlowManager）方法帧的样本，
+输出 flamegraph.pl / speedscope 可直接读取的折叠栈（folded stacks）格式。
+
+内存：tracemalloc 是进程级的，开启期间拖慢同一进程内的所有任务，分配热点也覆盖
+所有任务，因此默认关闭，需显式开启。
+"""
+
+import asyncio
+import inspect
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter as _Counter
+
+# 同一时刻只允许一个分析会话，避免叠加开销
+_session_lock = threading.Lock()
+
+_TOP_N = 30
+
+
+class ProfilerBusyError(RuntimeError):
+    """已有分析会话在运行"""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    filename = os.path.basename(code.co_filename)
+    return f"{name} ({filename}:{code.co_firstlineno})".replace(";", ",")
+
+
+def _owner_codes(target: object) -> set:
+    """目标对象所属类（含父类）中定义的所有函数的 code 对象"""
+    codes = set()
+    for cls in type(target).__mro__:
+        for attr in vars(cls).values():
+            func = getattr(attr, "__func__", attr)
+            if inspect.isfunction(func):
+                codes.add(func.__code__)
+    return codes
+
+
+class TaskProfiler:
+    """
+    针对单个目标对象的采样分析器
+
+    Args:
+        target: 用于归属样本的对象（栈帧中 self 为该对象即视为属于该任务）
+        interval: 采样间隔（秒）
+        trace_alloc: 是否同时采集 tracemalloc 分配热点（进程级开销，默认关闭）
+    """
+
+    def __init__(self, target: object, interval: float = 0.01, trace_alloc: bool = False):
+        self.target = target
+        self.interval = interval
+        self.trace_alloc = trace_alloc
+        self._codes = _owner_codes(target)
+        self._stacks: _Counter = _Counter()
+        self._self_time: _Counter = _Counter()
+        self._total_samples = 0
+        self._stop = threading.Event()
+        # id(最外层方法帧) → (帧, 是否属于目标)；持有帧引用，id 在会话内不会被复用
+        self._owners: dict[int, tuple] = {}
+
+    def _belongs_to_target(self, frame) -> bool:
+        # 只按 f_code 匹配，取最外层的方法帧（_worker / execute 等长期存在的协程帧）
+        owner = None
+        while frame is not None:
+            if frame.f_code in self._codes:
+                owner = frame
+            frame = frame.f_back
+        if owner is None:
+            return False
+        cached = self._owners.get(id(owner))
+        if cached is None:
+            # 每个帧只跨线程读取一次 self（f_locals 会在目标线程之外物化局部变量）
+            cached = self._owners[id(owner)] = (owner, owner.f_locals.get("self") is self.target)
+        return cached[1]
+
+    def _sample_loop(self, thread_id: int):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None or thread_id == own_id:
+                continue
+            self._total_samples += 1
+            if not self._belongs_to_target(frame):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.reverse()
+            self._stacks[";".join(stack)] += 1
+            self._self_time[stack[-1]] += 1
+            del frame, stack
+
+    async def run(self, seconds: float) -> dict:
+        """
+        采样指定时长后返回分析结果（期间不阻塞事件循环）
+
+        Raises:
+            ProfilerBusyError: 已有分析会话在运行
+        """
+        if not _session_lock.acquire(blocking=False):
+            raise ProfilerBusyError("已有分析会话在运行")
+
+        started_tracemalloc = False
+        try:
+            if self.trace_alloc and not tracemalloc.is_tracing():
+                tracemalloc.start(10)
+                started_tracemalloc = True
+
+            sampler = threading.Thread(
+                target=self._sample_loop,
+                args=(threading.get_ident(),),
+                name="rulecrawl-profiler",
+                daemon=True,
+            )
+            started = time.perf_counter()
+            sampler.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                self._stop.set()
+                # 最多等待一个采样间隔，不在事件循环线程中阻塞
+                await asyncio.to_thread(sampler.join)
+            elapsed = time.perf_counter() - started
+
+            allocations = self._top_allocations() if self.trace_alloc else []
+        finally:
+            if started_tracemalloc:
+                tracemalloc.stop()
+            self._owners.clear()
+            _session_lock.release()
+
+        task_samples = sum(self._stacks.values())
+        return {
+            "duration_s": round(elapsed, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": self._total_samples,
+            "task_samples": task_samples,
+            "folded": self.folded(),
+            "top_functions": [
+                {"function": name, "samples": count,
+                 "ratio": round(count / task_samples, 4) if task_samples else 0.0}
+                for name, count in self._self_time.most_common(_TOP_N)
+            ],
+            "allocations": allocations,
+        }
+
+    def folded(self) -> str:
+        """折叠栈格式：每行 "frame;frame;... count" """
+        return "\n".join(f"{stack} {count}" for stack, count in self._stacks.most_common())
+
+    @staticmethod
+    def _top_allocations() -> list[dict]:
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        return [
+            {
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_kb": round(stat.size / 1024, 1),
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[:_TOP_N]
+        ]
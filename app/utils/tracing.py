@@ -0,0 +1,170 @@
+"""
+节点执行追踪（Span）
+按采样率记录单次节点执行的耗时拆分：排队等待 / 网络 / 解析 / 入库
+
+当前 Span 通过 ContextVar 传递，fetch()、解析、数据库写入处的
+measure() 会把耗时累加到当前 Span；未采样时仅有一次 ContextVar 读取。
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("trace_span", default=None)
+
+PHASES = ("queue_wait", "network", "parse", "persist")
+
+# 每个节点保留的耗时样本数（用于估算 p95）
+_RESERVOIR_SIZE = 1024
+# 任务摘要中保留的最慢 Span 数
+_SLOWEST_KEPT = 10
+
+
+@dataclass
+class Span:
+    """单次节点执行的耗时记录（秒）"""
+    node_id: str
+    node_type: str
+    url: str
+    queue_wait: float = 0.0
+    network: float = 0.0
+    parse: float = 0.0
+    persist: float = 0.0
+    total: float = 0.0
+
+
+@contextmanager
+def measure(histogram=None, phase: str = None, **labels):
+    """
+    计时上下文：耗时同时写入指标直方图和当前 Span 的对应阶段
+
+    Args:
+        histogram: metrics.Histogram 实例，可为空
+        phase: Span 阶段名（network / parse / persist）
+        labels: 传给直方图的额外标签
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if histogram is not None:
+            histogram.observe(elapsed, **labels)
+        if phase:
+            add_phase(phase, elapsed)
+
+
+def add_phase(phase: str, seconds: float):
+    """将耗时累加到当前 Span 的指定阶段（无活动 Span 时忽略）"""
+    span = _current_span.get()
+    if span is not None:
+        setattr(span, phase, getattr(span, phase) + seconds)
+
+
+class _NodeStats:
+    """单个节点的聚合统计"""
+
+    __slots__ = ("node_type", "count", "total", "phases", "samples", "seen")
+
+    def __init__(self, node_type: str):
+        self.node_type = node_type
+        self.count = 0
+        self.total = 0.0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.samples: list[float] = []
+        self.seen = 0
+
+    def add(self, span: Span):
+        self.count += 1
+        self.total += span.total
+        for phase in PHASES:
+            self.phases[phase] += getattr(span, phase)
+        # 蓄水池抽样，内存占用与执行次数无关
+        self.seen += 1
+        if len(self.samples) < _RESERVOIR_SIZE:
+            self.samples.append(span.total)
+        else:
+            index = random.randrange(self.seen)
+            if index < _RESERVOIR_SIZE:
+                self.samples[index] = span.total
+
+    def summary(self) -> dict:
+        ordered = sorted(self.samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0
+        return {
+            "node_type": self.node_type,
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "p95_ms": round(p95 * 1000, 3),
+            **{f"{phase}_ms": round(v * 1000, 3) for phase, v in self.phases.items()},
+        }
+
+
+class TaskTracer:
+    """
+    任务级追踪器，按采样率创建 Span 并按节点聚合
+
+    Args:
+        sample_rate: 采样率 0~1，0 表示关闭
+    """
+
+    def __init__(self, sample_rate: float = 0.0):
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self._nodes: dict[str, _NodeStats] = {}
+        self._slowest: list[Span] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    @contextmanager
+    def span(self, node_id: str, node_type: str, url: str, queue_wait: float = 0.0):
+        """
+        在上下文中激活一个 Span（未采样时不做任何记录）
+        """
+        if not self.enabled or random.random() >= self.sample_rate:
+            yield None
+            return
+
+        span = Span(node_id=node_id, node_type=node_type, url=url, queue_wait=queue_wait)
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.total = time.perf_counter() - started
+            _current_span.reset(token)
+            self._record(span)
+
+    def _record(self, span: Span):
+        stats = self._nodes.get(span.node_id)
+        if stats is None:
+            stats = self._nodes[span.node_id] = _NodeStats(span.node_type)
+        stats.add(span)
+
+        self._slowest.append(span)
+        if len(self._slowest) > _SLOWEST_KEPT * 2:
+            self._slowest.sort(key=lambda s: s.total, reverse=True)
+            del self._slowest[_SLOWEST_KEPT:]
+
+    def summary(self) -> dict:
+        """
+        按节点聚合的耗时摘要，写入任务文档的 trace_summary 字段
+        """
+        slowest = sorted(self._slowest, key=lambda s: s.total, reverse=True)[:_SLOWEST_KEPT]
+        return {
+            "sample_rate": self.sample_rate,
+            "nodes": {node_id: stats.summary() for node_id, stats in self._nodes.items()},
+            "slowest": [
+                {
+                    (f"{k}_ms" if isinstance(v, float) else k): (
+                        round(v * 1000, 3) if isinstance(v, float) else v
+                    )
+                    for k, v in asdict(s).items()
+                }
+                for s in slowest
+            ],
+        }
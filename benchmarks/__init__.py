@@ -0,0 +1,11 @@
+"""
+RuleCrawl 基准测试套件
+
+- fixture_server: 本地合成站点（列表页 / 详情页 / JSON API）
+- mock_db: 用 mongomock-motor 替代真实 MongoDB
+- bench_flow: FlowManager.execute 端到端吞吐与节点延迟
+- bench_parser: UniversalParser 各选择器类型的微基准
+- bench_json: 标准库 json 与 json_codec 后端在 JSON-API 热路径上的对比
+
+运行方式: python -m benchmarks [--json 输出文件]
+"""
@@ -0,0 +1,61 @@
+"""
+基准测试入口
+
+    python -m benchmarks --pages 20 --items-per-page 50 --latency-ms 5 --json bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+
+from benchmarks import bench_flow, bench_json, bench_parser
+from benchmarks.fixture_server import FixtureConfig
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RuleCrawl 基准测试")
+    parser.add_argument("--pages", type=int, default=10, help="合成站点列表页数")
+    parser.add_argument("--items-per-page", type=int, default=20, help="每页条目数")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="每个响应的模拟延迟")
+    parser.add_argument("--body-size", type=int, default=2048, help="详情正文填充字节数")
+    parser.add_argument(
+        "--scenario", action="append", choices=sorted(bench_flow.SCENARIOS),
+        help="仅执行指定的端到端场景（可重复）",
+    )
+    parser.add_argument(
+        "--storage", choices=["mock", "sqlite"], default="mock",
+        help="端到端基准的数据库替身：mongomock-motor / 内存 SQLite",
+    )
+    parser.add_argument("--skip-flow", action="store_true", help="跳过端到端基准")
+    parser.add_argument("--skip-parser", action="store_true", help="跳过解析器微基准")
+    parser.add_argument("--skip-json", action="store_true", help="跳过 JSON 编解码基准")
+    parser.add_argument("--json", dest="json_path", help="将结果写入 JSON 文件，便于回归对比")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    results = {}
+    if not args.skip_parser:
+        results["parser"] = bench_parser.run()
+        bench_parser.report(results["parser"])
+    if not args.skip_json:
+        results["json"] = bench_json.run()
+        bench_json.report(results["json"])
+    if not args.skip_flow:
+        config = FixtureConfig(
+            pages=args.pages,
+            items_per_page=args.items_per_page,
+            latency_ms=args.latency_ms,
+            body_size=args.body_size,
+        )
+        results["flow"] = asyncio.run(bench_flow.run(config, args.scenario, args.storage))
+        bench_flow.report(results["flow"])
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
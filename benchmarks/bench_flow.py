@@ -0,0 +1,250 @@
+"""
+FlowManager 端到端基准
+针对合成站点运行完整工作流，输出 pages/sec、items/sec、节点延迟分位数和峰值 RSS
+"""
+
+import asyncio
+import resource
+import sys
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from app.engine.flow_manager import FlowManager
+from app.utils.http_client import init_client, close_client
+from benchmarks.fixture_server import FixtureConfig, run_fixture_server
+from benchmarks.mock_db import use_mock_database, use_sqlite_database
+
+
+class TimedFlowManager(FlowManager):
+    """记录每次节点执行耗时的 FlowManager（含流式列表页的起始页 / 列表页）"""
+
+    def __init__(self, project_id: str, task_id: str):
+        super().__init__(project_id, task_id)
+        self.node_latencies: dict[str, list[float]] = defaultdict(list)
+
+    @contextmanager
+    def _node_scope(self, node, url: str, queue_wait: float = 0.0):
+        started = time.perf_counter()
+        try:
+            with super()._node_scope(node, url, queue_wait):
+                yield
+        finally:
+            self.node_latencies[node.node_type].append(time.perf_counter() - started)
+
+
+def _html_nodes(base_url: str, pages: int) -> list[dict]:
+    return [
+        {
+            "_id": "start", "node_type": "start", "name": "起始页",
+            "request_config": {"url": f"{base_url}/list/1"},
+            "parse_rules": {}, "callback_node_id": "list",
+        },
+        {
+            "_id": "list", "node_type": "list", "name": "列表页",
+            "request_config": {},
+            "parse_rules": {
+                "parser_type": "xpath",
+                "item_selector": "//div[@class='item']",
+                "link_selector": ".//a/@href",
+                "fields": [
+                    {"name": "author", "selector": ".//span[@class='author']/text()",
+                     "selector_type": "xpath"},
+                ],
+            },
+            "callback_node_id": "detail",
+        },
+        {
+            "_id": "next", "node_type": "next", "name": "下一页",
+            "request_config": {}, "parse_rules": {},
+            "pagination": {
+                "selector": "//a[@class='next']/@href",
+                "selector_type": "xpath",
+                "max_pages": pages,
+            },
+            "callback_node_id": "list",
+        },
+        {
+            "_id": "detail", "node_type": "detail", "name": "详情页",
+            "request_config": {},
+            "parse_rules": {
+                "fields": [
+                    {"name": "title", "selector": "//h1/text()", "selector_type": "xpath"},
+                    {"name": "date", "selector": "//span[@class='date']/text()",
+                     "selector_type": "xpath"},
+                ],
+            },
+            "callback_node_id": None,
+        },
+    ]
+
+
+def _json_nodes(base_url: str, pages: int) -> list[dict]:
+    return [
+        {
+            "_id": "start", "node_type": "start", "name": "起始页",
+            "request_config": {"url": f"{base_url}/api/list?page=1"},
+            "parse_rules": {}, "callback_node_id": "list",
+        },
+        {
+            "_id": "list", "node_type": "list", "name": "列表页",
+            "request_config": {},
+            "parse_rules": {
+                "parser_type": "jsonpath",
+                "item_selector": "$.data.list[*]",
+                "item_selector_type": "jsonpath",
+                "link_selector": "",
+                "fields": [],
+            },
+            "callback_node_id": "detail",
+        },
+        {
+            "_id": "next", "node_type": "next", "name": "下一页",
+            "request_config": {}, "parse_rules": {},
+            "pagination": {"selector": "$.next", "selector_type": "jsonpath", "max_pages": pages},
+            "callback_node_id": "list",
+        },
+        {
+            "_id": "detail", "node_type": "detail", "name": "详情页",
+            "request_config": {},
+            "parse_rules": {
+                "parser_type": "jsonpath",
+                "fields": [
+                    {"name": "title", "selector": "$.title", "selector_type": "jsonpath"},
+                    {"name": "author", "selector": "$.author.name", "selector_type": "jsonpath"},
+                ],
+            },
+            "callback_node_id": None,
+        },
+    ]
+
+
+def _json_stream_nodes(base_url: str, pages: int) -> list[dict]:
+    """JSON 场景的流式版本：列表页开启 stream_items（流式模式不翻页，仅第一页）"""
+    nodes = [n for n in _json_nodes(base_url, pages) if n["node_type"] != "next"]
+    for node in nodes:
+        if node["node_type"] == "list":
+            node["parse_rules"]["stream_items"] = True
+    return nodes
+
+
+SCENARIOS = {
+    "html": _html_nodes,
+    "json": _json_nodes,
+    "json_stream": _json_stream_nodes,
+}
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def run_scenario(scenario: str, base_url: str, pages: int, storage: str = "mock") -> dict:
+    """在内存数据库上执行一次完整工作流并汇总指标"""
+    db = await use_sqlite_database() if storage == "sqlite" else use_mock_database()
+    project_id = str(uuid.uuid4())
+    task_id = str(uuid.uuid4())
+
+    for node in SCENARIOS[scenario](base_url, pages):
+        await db.nodes.insert_one({**node, "project_id": project_id})
+    await db.tasks.insert_one({
+        "_id": task_id,
+        "project_id": project_id,
+        "status": "pending",
+        "started_at": None,
+        "finished_at": None,
+        "stats": {"total_requests": 0, "total_items": 0, "errors": 0, "current_page": 0},
+        "error_message": None,
+    })
+
+    manager = TimedFlowManager(project_id, task_id)
+    started = time.perf_counter()
+    await manager.execute()
+    elapsed = time.perf_counter() - started
+
+    task = await db.tasks.find_one({"_id": task_id})
+    stats = task.get("stats", {})
+    stored = await db.data_store.count_documents({"task_id": task_id})
+
+    latencies = {
+        node_type: {
+            "count": len(samples),
+            "p50_ms": _percentile(samples, 50) * 1000,
+            "p99_ms": _percentile(samples, 99) * 1000,
+        }
+        for node_type, samples in manager.node_latencies.items()
+    }
+    list_pages = manager.node_latencies.get("list", [])
+
+    return {
+        "scenario": scenario,
+        "status": task.get("status"),
+        "elapsed_s": elapsed,
+        "requests": stats.get("total_requests", 0),
+        "items": stored,
+        "errors": stats.get("errors", 0),
+        "pages_per_s": len(list_pages) / elapsed if elapsed else 0.0,
+        "requests_per_s": stats.get("total_requests", 0) / elapsed if elapsed else 0.0,
+        "items_per_s": stored / elapsed if elapsed else 0.0,
+        "node_latency": latencies,
+        "peak_rss_mb": _peak_rss_mb(),
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+async def run(
+    config: FixtureConfig, scenarios: list[str] = None, storage: str = "mock"
+) -> list[dict]:
+    """
+    启动合成站点并依次执行各场景
+
+    Args:
+        config: 合成站点参数
+        scenarios: 要执行的场景名，默认全部
+        storage: 数据库替身，mock（mongomock-motor）/ sqlite（内存 SQLite）
+
+    Returns:
+        各场景的指标字典列表
+    """
+    results = []
+    with run_fixture_server(config) as base_url:
+        await init_client()
+        try:
+            for scenario in scenarios or list(SCENARIOS):
+                results.append(await run_scenario(scenario, base_url, config.pages, storage))
+        finally:
+            await close_client()
+    return results
+
+
+def report(results: list[dict]):
+    for r in results:
+        print(
+            f"[{r['scenario']}] status={r['status']} elapsed={r['elapsed_s']:.2f}s "
+            f"requests={r['requests']} items={r['items']} errors={r['errors']}"
+        )
+        print(
+            f"  pages/s={r['pages_per_s']:.1f} requests/s={r['requests_per_s']:.1f} "
+            f"items/s={r['items_per_s']:.1f} peak_rss={r['peak_rss_mb']:.1f}MB"
+        )
+        for node_type, lat in sorted(r["node_latency"].items()):
+            print(
+                f"  {node_type:<8} n={lat['count']:<6} "
+                f"p50={lat['p50_ms']:.2f}ms p99={lat['p99_ms']:.2f}ms"
+            )
+
+
+if __name__ == "__main__":
+    report(asyncio.run(run(FixtureConfig())))
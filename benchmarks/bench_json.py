@@ -0,0 +1,117 @@
+"""
+JSON 编解码基准
+对比标准库 json 与 app.utils.json_codec（当前后端）在 JSON-API 热路径上的耗时：
+- 解析 API 列表页响应
+- data:// 条目内容哈希
+- 渲染 list_data 数据页响应（FastAPI 默认路径 vs FastJSONResponse）
+"""
+
+import hashlib
+import json
+import timeit
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from app.engine.context import make_data_url
+from app.utils import json_codec
+
+
+def _api_payload(items: int, body_size: int) -> str:
+    return json.dumps({
+        "data": {
+            "list": [
+                {
+                    "id": i,
+                    "title": f"Item {i}",
+                    "author": {"name": f"author-{i % 7}"},
+                    "tags": ["a", "b", "c"],
+                    "score": i * 0.5,
+                    "content": "x" * body_size,
+                }
+                for i in range(items)
+            ]
+        }
+    })
+
+
+def _data_page(items: int, body_size: int) -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "total": 1_000_000,
+        "page": 1,
+        "page_size": items,
+        "items": [
+            {
+                "_id": ObjectId(),
+                "project_id": "p",
+                "task_id": "t",
+                "source_url": f"https://example.com/item/{i}",
+                "crawled_at": now,
+                "data": {"title": f"Item {i}", "content": "x" * body_size},
+            }
+            for i in range(items)
+        ],
+    }
+
+
+def _stdlib_data_url(item) -> str:
+    canonical = json.dumps(item, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return f"data://{hashlib.sha1(canonical.encode('utf-8')).hexdigest()}"
+
+
+def _stdlib_render(page: dict) -> bytes:
+    # FastAPI 默认路径：jsonable_encoder 逐字段转换后由 JSONResponse 渲染
+    page = {**page, "items": [{**doc, "_id": str(doc["_id"])} for doc in page["items"]]}
+    return JSONResponse(jsonable_encoder(page)).body
+
+
+def _measure(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1e6
+
+
+def run(items: int = 100, body_size: int = 512, number: int = 50) -> dict:
+    """
+    Returns:
+        {case: {"stdlib_us": ..., "codec_us": ..., "speedup": ...}}
+    """
+    payload = _api_payload(items, body_size)
+    parsed = json.loads(payload)["data"]["list"]
+    page = _data_page(items, body_size)
+
+    cases = {
+        "parse_api_page": (lambda: json.loads(payload), lambda: json_codec.loads(payload)),
+        "data_url_hash": (
+            lambda: [_stdlib_data_url(it) for it in parsed],
+            lambda: [make_data_url(it) for it in parsed],
+        ),
+        "render_data_page": (
+            lambda: _stdlib_render(page),
+            lambda: json_codec.FastJSONResponse(page).body,
+        ),
+    }
+    results = {}
+    for name, (baseline, codec) in cases.items():
+        before = _measure(baseline, number)
+        after = _measure(codec, number)
+        results[name] = {
+            "stdlib_us": before,
+            "codec_us": after,
+            "speedup": before / after if after else 0.0,
+        }
+    return results
+
+
+def report(results: dict):
+    print(f"JSON 编解码基准（后端: {json_codec.BACKEND}，单次平均，μs）")
+    for name, r in results.items():
+        print(
+            f"  {name:<18} stdlib={r['stdlib_us']:>10.1f} codec={r['codec_us']:>10.1f} "
+            f"x{r['speedup']:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    report(run())
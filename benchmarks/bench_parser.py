@@ -0,0 +1,75 @@
+"""
+UniversalParser 微基准
+分别测量 xpath / css / jsonpath / regex 的构造与提取耗时
+"""
+
+import json
+import timeit
+
+from app.engine.parser import UniversalParser
+
+
+def _sample_html(items: int) -> str:
+    rows = "".join(
+        f'<div class="item"><a href="/detail/{i}">Item {i}</a>'
+        f'<span class="author">author-{i % 7}</span></div>'
+        for i in range(items)
+    )
+    return f"<html><body>{rows}</body></html>"
+
+
+def _sample_json(items: int) -> str:
+    return json.dumps({
+        "data": {
+            "list": [
+                {"id": i, "title": f"Item {i}", "author": {"name": f"author-{i % 7}"}}
+                for i in range(items)
+            ]
+        }
+    })
+
+
+def _measure(fn, number: int) -> float:
+    """返回单次调用的平均耗时（微秒），取 3 轮中的最小值"""
+    best = min(timeit.repeat(fn, number=number, repeat=3))
+    return best / number * 1e6
+
+
+def run(items: int = 100, number: int = 200) -> dict:
+    """
+    执行解析器微基准
+
+    Args:
+        items: 合成文档中的列表项数量
+        number: 每项测量的调用次数
+
+    Returns:
+        {case_name: 平均耗时(μs)}
+    """
+    html = _sample_html(items)
+    data = _sample_json(items)
+    html_parser = UniversalParser(html, "html")
+    json_parser = UniversalParser(data, "json")
+
+    cases = {
+        "construct_html": lambda: UniversalParser(html, "html"),
+        "construct_json": lambda: UniversalParser(data, "json"),
+        "xpath_extract": lambda: html_parser.extract("//div[@class='item']/a/@href", "xpath"),
+        "css_extract": lambda: html_parser.extract("div.item a::attr(href)", "css"),
+        "jsonpath_extract": lambda: json_parser.extract("$.data.list[*].title", "jsonpath"),
+        "regex_extract": lambda: html_parser.extract(r'href="(/detail/\d+)"', "regex"),
+        "xpath_items": lambda: html_parser.extract_items("//div[@class='item']", "xpath"),
+        "css_items": lambda: html_parser.extract_items("div.item", "css"),
+        "jsonpath_items": lambda: json_parser.extract_items("$.data.list[*]", "jsonpath"),
+    }
+    return {name: _measure(fn, number) for name, fn in cases.items()}
+
+
+def report(results: dict):
+    print("UniversalParser 微基准（单次平均，μs）")
+    for name, value in results.items():
+        print(f"  {name:<18} {value:>12.1f}")
+
+
+if __name__ == "__main__":
+    report(run())
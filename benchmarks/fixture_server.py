@@ -0,0 +1,164 @@
+"""
+本地合成站点（Fixture Server）
+在独立子进程中运行，为基准测试提供可控的列表页 / 详情页 / JSON API
+
+路由：
+- /list/{page}            HTML 列表页，含 items_per_page 个详情链接和下一页链接
+- /detail/{page}/{index}  HTML 详情页，正文按 body_size 填充
+- /api/list?page=N        JSON 列表接口，用于 data:// 透传流程
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import HTMLResponse, Response
+
+
+@dataclass
+class FixtureConfig:
+    """合成站点参数"""
+    pages: int = 10
+    items_per_page: int = 20
+    latency_ms: float = 0.0
+    body_size: int = 2048
+
+
+def create_app(config: FixtureConfig) -> FastAPI:
+    """根据配置构建合成站点应用"""
+    app = FastAPI()
+    filler = "x" * max(config.body_size, 0)
+
+    async def delay():
+        if config.latency_ms > 0:
+            await asyncio.sleep(config.latency_ms / 1000)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/list/{page}")
+    async def list_page(page: int):
+        await delay()
+        if page > config.pages:
+            return HTMLResponse("<html><body></body></html>")
+        rows = "".join(
+            f'<div class="item"><a href="/detail/{page}/{i}">Item {page}-{i}</a>'
+            f'<span class="author">author-{i % 7}</span></div>'
+            for i in range(config.items_per_page)
+        )
+        next_link = f'<a class="next" href="/list/{page + 1}">next</a>' if page < config.pages else ""
+        return HTMLResponse(f"<html><body>{rows}{next_link}</body></html>")
+
+    @app.get("/detail/{page}/{index}")
+    async def detail_page(page: int, index: int):
+        await delay()
+        return HTMLResponse(
+            f"<html><body><h1 class=\"title\">Item {page}-{index}</h1>"
+            f"<span class=\"date\">2026-01-{index % 28 + 1:02d}</span>"
+            f"<div class=\"content\">{filler}</div></body></html>"
+        )
+
+    @app.get("/api/list")
+    async def api_list(page: int = 1):
+        await delay()
+        items = []
+        if page <= config.pages:
+            items = [
+                {
+                    "id": (page - 1) * config.items_per_page + i,
+                    "title": f"Item {page}-{i}",
+                    "author": {"name": f"author-{i % 7}"},
+                    "tags": ["a", "b", "c"],
+                    "content": filler,
+                }
+                for i in range(config.items_per_page)
+            ]
+        payload = {
+            "data": {"list": items},
+            "next": f"/api/list?page={page + 1}" if page < config.pages else None,
+        }
+        return Response(json.dumps(payload), media_type="application/json")
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def run_fixture_server(config: FixtureConfig, startup_timeout: float = 15.0):
+    """
+    在子进程中启动合成站点，退出上下文时关闭
+
+    子进程隔离可避免站点本身的 CPU / 内存计入被测进程。
+
+    Yields:
+        站点根地址，如 http://127.0.0.1:54321
+    """
+    port = _free_port()
+    cmd = [
+        sys.executable, "-m", "benchmarks.fixture_server",
+        "--port", str(port),
+        "--pages", str(config.pages),
+        "--items-per-page", str(config.items_per_page),
+        "--latency-ms", str(config.latency_ms),
+        "--body-size", str(config.body_size),
+    ]
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proc = subprocess.Popen(cmd, cwd=root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            try:
+                if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if proc.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("合成站点启动失败")
+            time.sleep(0.1)
+        yield base_url
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="RuleCrawl 基准测试合成站点")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--items-per-page", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--body-size", type=int, default=2048)
+    args = parser.parse_args()
+
+    config = FixtureConfig(
+        pages=args.pages,
+        items_per_page=args.items_per_page,
+        latency_ms=args.latency_ms,
+        body_size=args.body_size,
+    )
+    uvicorn.run(create_app(config), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+内存数据库替身
+使用 mongomock-motor 或嵌入式 SQLite 替代真实 MongoDB，使基准测试只衡量引擎本身
+"""
+
+import app.database as database
+
+
+def use_mock_database(name: str = "rulecrawl_bench"):
+    """
+    将全局数据库实例替换为 mongomock-motor 内存库
+
+    Returns:
+        替换后的数据库实例
+    """
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError as e:
+        raise RuntimeError(
+            "基准测试需要 mongomock-motor，请执行: pip install -e .[bench]"
+        ) from e
+
+    database.client = AsyncMongoMockClient()
+    database.db = database.client[name]
+    return database.db
+
+
+async def use_sqlite_database(path: str = ":memory:"):
+    """
+    将全局数据库实例替换为 SQLite 后端（与 STORAGE_BACKEND=sqlite 相同的实现）
+
+    Returns:
+        替换后的数据库实例
+    """
+    from app.storage.sqlite import SQLiteDatabase
+
+    if isinstance(database.db, SQLiteDatabase):
+        database.db.close()
+    database.client = None
+    database.db = SQLiteDatabase(path)
+    await database.create_indexes(database.db)
+    return database.db
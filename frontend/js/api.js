@@ -91,6 +91,10 @@ const api = {
         return res.json();
     },
 
+    taskEventsUrl(taskId) {
+        return `${API_BASE}/tasks/${taskId}/events`;
+    },
+
     async stopTask(taskId) {
         const res = await fetch(`${API_BASE}/tasks/${taskId}/stop`, { method: 'POST' });
         return res.json();
@@ -109,8 +113,18 @@ const api = {
         return res.json();
     },
 
+    async getDataStats(projectId) {
+        const res = await fetch(`${API_BASE}/projects/${projectId}/data/stats`);
+        return res.json();
+    },
+
     async clearData(projectId) {
         const res = await fetch(`${API_BASE}/projects/${projectId}/data`, { method: 'DELETE' });
         return res.json();
     },
+
+    async getDeletion(projectId) {
+        const res = await fetch(`${API_BASE}/projects/${projectId}/deletion`);
+        return res.json();
+    },
 };
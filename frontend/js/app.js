@@ -154,8 +154,8 @@ function renderProjectList(projects) {
         tr.onclick = () => selectProject(p);
 
         const createdDate = new Date(p.created_at || Date.now()).toLocaleDateString();
-        const statusText = p.status === 'running' ? '运行中' : '空闲';
-        const statusClass = p.status === 'running' ? 'running' : 'completed';
+        const statusText = { running: '运行中', deleting: '删除中' }[p.status] || '空闲';
+        const statusClass = { running: 'running', deleting: 'stopping' }[p.status] || 'completed';
 
         // Name
         const tdName = document.createElement('td');
@@ -318,8 +318,16 @@ async function confirmCreateProject() {
 async function deleteProject(id, name) {
     if (!confirm(`确定要删除项目 "${name}" 吗？`)) return;
     try {
-        await api.deleteProject(id);
-        showToast('项目已删除', 'success');
+        const result = await api.deleteProject(id);
+        if (!result.job_id) {
+            showToast('删除失败: ' + (result.detail || '未知错误'), 'error');
+            return;
+        }
+        showToast('项目正在后台删除', 'info');
+        loadProjects();
+        const job = await waitDeletion(id);
+        showToast(job.status === 'completed' ? '项目已删除' : '删除失败: ' + job.error_message,
+            job.status === 'completed' ? 'success' : 'error');
         loadProjects();
     } catch (e) {
         showToast('删除失败: ' + e.message, 'error');
@@ -379,27 +387,92 @@ async function stopTask() {
     }
 }
 
-/** 轮询任务状态 */
-function pollTaskStatus(taskId) {
+/** 渲染任务状态与统计 */
+function renderTaskProgress(task) {
     const statusEl = document.getElementById('taskStatus');
     const statsEl = document.getElementById('taskStats');
+    if (statusEl) {
+        statusEl.innerHTML = `<span class="status-badge ${task.status}">${task.status}</span>`;
+    }
+    if (statsEl && task.stats) {
+        statsEl.textContent = `请求: ${task.stats.total_requests} | 采集: ${task.stats.total_items} | 错误: ${task.stats.errors}`;
+    }
+}
+
+/** 任务结束后的提示与刷新 */
+async function onTaskFinished(task) {
+    await loadProjects();
+    if (task.status === 'completed') {
+        showToast('✅ 任务完成！', 'success');
+    } else if (task.status === 'failed') {
+        showToast('❌ 任务失败: ' + (task.error_message || ''), 'error');
+    }
+}
+
+const FINAL_TASK_STATUSES = ['completed', 'failed', 'stopped'];
+
+/** 订阅任务进度（服务端推送），浏览器不支持或连接被关闭时退回轮询 */
+function pollTaskStatus(taskId) {
+    if (!window.EventSource) {
+        pollTaskStatusByInterval(taskId);
+        return;
+    }
+    const source = new EventSource(api.taskEventsUrl(taskId));
+    let task = null;
+    let finished = false;
+
+    const finish = async () => {
+        if (finished) return;
+        finished = true;
+        source.close();
+        renderTaskProgress(task);
+        await onTaskFinished(task);
+    };
+
+    source.addEventListener('snapshot', (e) => {
+        task = JSON.parse(e.data);
+        task.stats = task.stats || {};
+        renderTaskProgress(task);
+        if (FINAL_TASK_STATUSES.includes(task.status)) finish();
+    });
+    source.addEventListener('status', (e) => {
+        if (!task) return;
+        task.status = JSON.parse(e.data).status;
+        renderTaskProgress(task);
+    });
+    source.addEventListener('stats', (e) => {
+        if (!task) return;
+        Object.assign(task.stats, JSON.parse(e.data).stats);
+        renderTaskProgress(task);
+    });
+    source.addEventListener('node_error', (e) => {
+        if (!task) return;
+        const error = JSON.parse(e.data);
+        if (error.node_type === 'task') task.error_message = error.message;
+    });
+    source.addEventListener('end', (e) => {
+        if (!task) return;
+        task.status = JSON.parse(e.data).status;
+        finish();
+    });
+    source.onerror = () => {
+        // 连接中断时浏览器会自动重连；被关闭（如代理不支持）则改为轮询
+        if (source.readyState === EventSource.CLOSED && !finished) {
+            finished = true;
+            pollTaskStatusByInterval(taskId);
+        }
+    };
+}
+
+/** 轮询任务状态（服务端推送不可用时使用） */
+function pollTaskStatusByInterval(taskId) {
     const interval = setInterval(async () => {
         try {
             const task = await api.getTaskStatus(taskId);
-            if (statusEl) {
-                statusEl.innerHTML = `<span class="status-badge ${task.status}">${task.status}</span>`;
-            }
-            if (statsEl && task.stats) {
-                statsEl.textContent = `请求: ${task.stats.total_requests} | 采集: ${task.stats.total_items} | 错误: ${task.stats.errors}`;
-            }
-            if (['completed', 'failed', 'stopped'].includes(task.status)) {
+            renderTaskProgress(task);
+            if (FINAL_TASK_STATUSES.includes(task.status)) {
                 clearInterval(interval);
-                await loadProjects();
-                if (task.status === 'completed') {
-                    showToast('✅ 任务完成！', 'success');
-                } else if (task.status === 'failed') {
-                    showToast('❌ 任务失败: ' + (task.error_message || ''), 'error');
-                }
+                await onTaskFinished(task);
             }
         } catch (e) {
             clearInterval(interval);
@@ -417,13 +490,30 @@ async function loadData(page = 1) {
     }
     app.state.dataPage = page;
     try {
-        const result = await api.listData(app.state.currentProjectId, page, 20);
+        const [result, stats] = await Promise.all([
+            api.listData(app.state.currentProjectId, page, 20),
+            api.getDataStats(app.state.currentProjectId),
+        ]);
         renderDataTable(result);
+        renderDataStats(stats);
     } catch (e) {
         showToast('加载数据失败', 'error');
     }
 }
 
+/** 渲染字段统计（填充率与去重计数） */
+function renderDataStats(stats) {
+    const container = document.getElementById('dataStatsContainer');
+    if (!stats || !stats.fields || stats.fields.length === 0) {
+        container.innerHTML = '';
+        return;
+    }
+    const fields = stats.fields.map(f =>
+        `<span class="status-badge completed" title="约 ${f.distinct} 个不同值">${escapeHtml(f.name)}: ${(f.fill_rate * 100).toFixed(1)}%</span>`
+    ).join(' ');
+    container.innerHTML = `<div style="color:var(--text-dim);font-size:13px;">共 ${stats.total_items} 条 · 字段填充率 ${fields}</div>`;
+}
+
 /** 渲染数据表格 */
 function renderDataTable(result) {
     const container = document.getElementById('dataTableContainer');
@@ -470,13 +560,30 @@ function renderDataTable(result) {
     container.innerHTML = html;
 }
 
+/** 等待项目的后台删除作业结束（每秒查询一次进度） */
+async function waitDeletion(projectId) {
+    while (true) {
+        const job = await api.getDeletion(projectId);
+        if (job.status !== 'running') return job;
+        await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+}
+
 /** 清空数据 */
 async function clearData() {
     if (!app.state.currentProjectId) return;
     if (!confirm('确定要清空所有采集数据吗？')) return;
     try {
-        await api.clearData(app.state.currentProjectId);
-        showToast('数据已清空', 'success');
+        const projectId = app.state.currentProjectId;
+        const result = await api.clearData(projectId);
+        if (!result.job_id) {
+            showToast('清空失败: ' + (result.detail || '未知错误'), 'error');
+            return;
+        }
+        showToast('数据正在后台清空', 'info');
+        const job = await waitDeletion(projectId);
+        showToast(job.status === 'completed' ? `数据已清空 (${job.deleted} 条)` : '清空失败: ' + job.error_message,
+            job.status === 'completed' ? 'success' : 'error');
         loadData(1);
     } catch (e) {
         showToast('清空失败: ' + e.message, 'error');
@@ -95,6 +95,10 @@ function loadNodeToForm(node) {
         if (dedupFieldEl) {
             dedupFieldEl.value = pr.deduplication_field || '';
         }
+        const changeEl = document.getElementById('detail-change-detection');
+        if (changeEl) {
+            changeEl.value = pr.change_detection ? 'true' : 'false';
+        }
     }
 
     // 列表页透传字段
@@ -170,6 +174,7 @@ function collectNodeData(type) {
         data.parse_rules.fields = collectDetailFields();
         data.parse_rules.deduplication_type = document.getElementById('detail-dedup-type')?.value || 'none';
         data.parse_rules.deduplication_field = document.getElementById('detail-dedup-field')?.value || null;
+        data.parse_rules.change_detection = document.getElementById('detail-change-detection')?.value === 'true';
     }
 
     return data;
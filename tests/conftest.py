@@ -0,0 +1,14 @@
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import app.database as database
+
+
+@pytest.fixture
+def mock_db():
+    """以 mongomock-motor 内存库替换全局数据库实例"""
+    saved = database.client, database.db
+    database.client = AsyncMongoMockClient()
+    database.db = database.client["rulecrawl_test"]
+    yield database.db
+    database.client, database.db = saved
@@ -0,0 +1,69 @@
+"""请求槽位池：按权重公平分配、份额移除与等待方取消"""
+
+import asyncio
+
+import pytest
+
+from app.engine.admission import FetchSlotPool
+
+
+def test_contended_slots_go_to_the_lightest_share():
+    async def scenario():
+        pool = FetchSlotPool(total=2)
+        heavy, light = pool.share("heavy", 1.0), pool.share("light", 1.0)
+        await heavy.acquire()
+        await heavy.acquire()
+        granted = []
+
+        async def wait(share):
+            await share.acquire()
+            granted.append(share.name)
+
+        waiters = [asyncio.ensure_future(wait(s)) for s in (heavy, heavy, light)]
+        await asyncio.sleep(0)
+        heavy.release()
+        await asyncio.sleep(0)
+        assert granted == ["light"]
+        for task in waiters:
+            task.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        assert pool._waiting == 0
+
+    asyncio.run(scenario())
+
+
+def test_removing_a_share_with_waiters_does_not_stall_the_pool():
+    async def scenario():
+        pool = FetchSlotPool(total=1)
+        a, c = pool.share("a"), pool.share("c")
+        await c.acquire()
+        waiter = asyncio.ensure_future(a.acquire())
+        await asyncio.sleep(0)
+        pool.remove(a)
+        c.release()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert pool._waiting == 0 and pool.in_use == 0
+        # 之后的请求仍可直接取得槽位
+        await asyncio.wait_for(c.acquire(), 1)
+        assert pool.in_use == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_popped_by_release_raises_cancelled():
+    async def scenario():
+        pool = FetchSlotPool(total=1)
+        a, b = pool.share("a"), pool.share("b")
+        await a.acquire()
+        waiter = asyncio.ensure_future(b.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        # 等待方恢复执行前 release() 已把已取消的 future 弹出
+        a.release()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert pool._waiting == 0 and pool.in_use == 0 and b.in_use == 0
+        await asyncio.wait_for(b.acquire(), 1)
+
+    asyncio.run(scenario())
@@ -0,0 +1,122 @@
+"""按主机自适应并发：AIMD 调整、上下限与等待方取消"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.engine.concurrency import AdaptiveConcurrency, HostLimiter, SlotOutcome
+
+
+def _limiter(floor=1, ceiling=8, initial=4, adaptive=True) -> HostLimiter:
+    return HostLimiter("example.com", floor, ceiling, initial, adaptive)
+
+
+def _complete(limiter: HostLimiter, latency=0.1, **outcome):
+    """模拟一次已占用槽位的请求结束"""
+    limiter.inflight += 1
+    limiter.release(latency, SlotOutcome(**outcome))
+
+
+def test_additive_increase_is_about_one_per_window():
+    limiter = _limiter(initial=4)
+    for _ in range(4):
+        _complete(limiter, status=200)
+    assert 4.9 < limiter.limit < 5.0
+    for _ in range(5):
+        _complete(limiter, status=200)
+    assert int(limiter.limit) == 5
+
+
+def test_overload_halves_once_per_window():
+    limiter = _limiter(initial=8)
+    for _ in range(5):
+        _complete(limiter, status=429)
+    assert limiter.limit == 4
+    assert limiter.throttled == 5
+    limiter._last_decrease -= 10  # 进入下一个窗口
+    _complete(limiter, error=httpx.ReadTimeout("timeout"))
+    assert limiter.limit == 2
+    assert limiter.timeouts == 1
+
+
+def test_limit_stays_within_floor_and_ceiling():
+    limiter = _limiter(floor=2, ceiling=3, initial=3)
+    for _ in range(20):
+        _complete(limiter, status=200)
+    assert limiter.limit == 3
+    for _ in range(5):
+        limiter._last_decrease = 0.0
+        _complete(limiter, status=503)
+    assert limiter.limit == 2
+
+
+def test_latency_growth_backs_off():
+    limiter = _limiter(initial=8)
+    _complete(limiter, latency=0.1, status=200)
+    for _ in range(10):
+        _complete(limiter, latency=1.0, status=200)
+    assert limiter.limit < 8
+
+
+def test_unrelated_errors_and_fixed_mode_keep_limit():
+    limiter = _limiter(initial=4)
+    _complete(limiter, error=httpx.ConnectError("refused"))
+    _complete(limiter, error=asyncio.CancelledError())
+    assert limiter.limit == 4 and limiter.requests == 1
+    fixed = _limiter(initial=4, adaptive=False)
+    _complete(fixed, status=429)
+    assert fixed.limit == 4 and fixed.requests == 0
+
+
+def test_cancelled_waiter_popped_by_release_raises_cancelled():
+    async def scenario():
+        limiter = _limiter(floor=1, ceiling=1, initial=1)
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        # 等待方恢复执行前 release() 已把已取消的 future 弹出
+        limiter.release(0.1, SlotOutcome(status=200))
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter.inflight == 0 and not limiter._waiters
+        await asyncio.wait_for(limiter.acquire(), 1)
+
+    asyncio.run(scenario())
+
+
+def test_waiters_are_woken_in_order():
+    async def scenario():
+        limiter = _limiter(floor=1, ceiling=1, initial=1)
+        await limiter.acquire()
+        order = []
+
+        async def wait(name):
+            await limiter.acquire()
+            order.append(name)
+
+        waiters = [asyncio.ensure_future(wait(n)) for n in "abc"]
+        await asyncio.sleep(0)
+        for _ in range(3):
+            limiter.release(0.1, SlotOutcome(status=200))
+            await asyncio.sleep(0)
+        await asyncio.gather(*waiters)
+        assert order == ["a", "b", "c"]
+
+    asyncio.run(scenario())
+
+
+def test_gate_slot_tracks_hosts_separately():
+    async def scenario():
+        gate = AdaptiveConcurrency(floor=1, ceiling=4, initial=2, adaptive=True)
+        async with gate.slot("a.example") as outcome:
+            outcome.status = 200
+            async with gate.slot("b.example"):
+                pass
+        hosts = {h["host"]: h for h in gate.snapshot()}
+        assert hosts["a.example"]["inflight"] == 0
+        assert hosts["a.example"]["requests"] == 1
+        assert hosts["b.example"]["requests"] == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,73 @@
+"""数据统计：HyperLogLog 合并与增量合并"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.engine import data_stats
+from app.engine.data_stats import DistinctSketch, StatsDelta
+
+
+def _sketch(values) -> DistinctSketch:
+    sketch = DistinctSketch()
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+def test_estimate_within_error_bounds():
+    for n in (10, 1000, 20000):
+        estimate = _sketch(range(n)).estimate()
+        assert abs(estimate - n) <= max(2, n * 0.1)
+
+
+def test_merge_equals_union_and_is_idempotent():
+    left, right = _sketch(range(0, 3000)), _sketch(range(2000, 5000))
+    union = _sketch(range(0, 5000))
+    left.merge(right)
+    assert left.registers == union.registers
+    left.merge(right)
+    assert left.registers == union.registers
+
+
+def test_sketch_round_trips_through_hex():
+    sketch = _sketch(["a", "b", {"k": 1}, 1.5])
+    assert DistinctSketch(sketch.dumps()).registers == sketch.registers
+
+
+def test_equal_values_count_once():
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    sketch = _sketch([{"a": 1, "b": 2}, {"b": 2, "a": 1}, now, now.replace(tzinfo=None)])
+    assert sketch.estimate() == 2
+
+
+def test_delta_merge_accumulates_across_tasks():
+    hour = datetime(2026, 1, 1, 8, tzinfo=timezone.utc)
+    first, second = StatsDelta(), StatsDelta()
+    for i in range(3):
+        first.add({"task_id": "t1", "crawled_at": hour, "data": {"sku": f"s{i}", "price": ""}})
+    second.add({"task_id": "t2", "crawled_at": hour + timedelta(hours=1), "data": {"sku": "s0"}})
+
+    doc = second.merge_into(first.merge_into(None, "p"), "p")
+    rendered = data_stats.render(doc)
+    assert doc["version"] == 2
+    assert rendered["total_items"] == 4
+    assert rendered["fields"] == [{"name": "sku", "filled": 4, "fill_rate": 1.0, "distinct": 3}]
+    assert rendered["per_task"] == [{"task_id": "t1", "items": 3}, {"task_id": "t2", "items": 1}]
+    assert [h["items"] for h in rendered["per_hour"]] == [3, 1]
+
+
+def test_apply_task_skips_records_first_seen_before_the_task(mock_db):
+    async def scenario():
+        started = datetime(2026, 1, 2, tzinfo=timezone.utc)
+        await mock_db.tasks.insert_one({"_id": "t2", "started_at": started})
+        await mock_db.data_store.insert_many([
+            {"project_id": "p", "task_id": "t2", "crawled_at": started, "data": {"sku": "new"},
+             "first_seen": started},
+            {"project_id": "p", "task_id": "t2", "crawled_at": started, "data": {"sku": "old"},
+             "first_seen": started - timedelta(days=1)},
+        ])
+        await data_stats.apply_task("p", "t2")
+        doc = await mock_db.data_stats.find_one({"_id": "p"})
+        assert doc["total_items"] == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,56 @@
+"""删除作业：开始删除时的状态占用与冲突回滚"""
+
+import asyncio
+
+import pytest
+
+from app.engine import data_stats
+from app.engine.deletion import DeletionConflictError, start_deletion
+
+
+async def _stale_project(db, status="running"):
+    """写入项目并返回一份过时的快照（调用方读取后，最后一个任务已结束）"""
+    await db.projects.insert_one({"_id": "p", "status": status})
+    snapshot = await db.projects.find_one({"_id": "p"})
+    await db.projects.update_one({"_id": "p"}, {"$set": {"status": "idle"}})
+    return snapshot
+
+
+def test_conflict_rollback_recomputes_status_from_active_tasks(mock_db):
+    async def scenario():
+        project = await _stale_project(mock_db)
+        data_stats._rebuilding["p"] = None
+        try:
+            with pytest.raises(DeletionConflictError):
+                await start_deletion(project, "data", is_active=lambda pid: False)
+        finally:
+            data_stats._rebuilding.pop("p", None)
+        doc = await mock_db.projects.find_one({"_id": "p"})
+        assert doc["status"] == "idle"
+        assert doc.get("deletion_job_id") is None
+        assert await mock_db.deletion_jobs.count_documents({}) == 0
+
+    asyncio.run(scenario())
+
+
+def test_conflict_with_active_task_keeps_project_running(mock_db):
+    async def scenario():
+        project = await _stale_project(mock_db, status="idle")
+        with pytest.raises(DeletionConflictError):
+            await start_deletion(project, "data", is_active=lambda pid: True)
+        doc = await mock_db.projects.find_one({"_id": "p"})
+        assert doc["status"] == "running"
+
+    asyncio.run(scenario())
+
+
+def test_deleting_project_is_not_claimed_twice(mock_db):
+    async def scenario():
+        await mock_db.projects.insert_one({"_id": "p", "status": "deleting", "deletion_job_id": "j1"})
+        project = await mock_db.projects.find_one({"_id": "p"})
+        with pytest.raises(DeletionConflictError):
+            await start_deletion(project, "data", is_active=lambda pid: False)
+        doc = await mock_db.projects.find_one({"_id": "p"})
+        assert (doc["status"], doc["deletion_job_id"]) == ("deleting", "j1")
+
+    asyncio.run(scenario())
@@ -0,0 +1,40 @@
+"""详情页入库：去重、变更检测与 stored 标记"""
+
+import asyncio
+
+from app.engine.context import CrawlContext, make_data_url
+from app.engine.nodes.detail import DetailNode
+
+
+def _detail(**parse_rules):
+    return DetailNode({
+        "_id": "detail", "node_type": "detail",
+        "parse_rules": {
+            "fields": [{"name": "title", "selector": "$.title", "selector_type": "jsonpath"}],
+            **parse_rules,
+        },
+    })
+
+
+def _context(item):
+    return CrawlContext(url=make_data_url(item), data=item, content_type="json", project_id="p", task_id="t")
+
+
+def test_dedup_skipped_record_is_not_stored(mock_db):
+    async def scenario():
+        node = _detail(deduplication_type="url")
+        first = await node.execute(_context({"title": "a"}))
+        second = await node.execute(_context({"title": "a"}))
+        assert first.stored and not second.stored
+        assert await mock_db.data_store.count_documents({}) == 1
+
+    asyncio.run(scenario())
+
+
+def test_change_detection_stores_only_new_and_changed(mock_db):
+    async def scenario():
+        node = _detail(deduplication_type="field", deduplication_field="title", change_detection=True)
+        results = [await node.execute(_context({"title": "a"})) for _ in range(2)]
+        assert [(r.record_change, r.stored) for r in results] == [("new", True), ("unchanged", False)]
+
+    asyncio.run(scenario())
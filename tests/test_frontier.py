@@ -0,0 +1,85 @@
+"""Frontier：排序策略、软上限与防死锁"""
+
+import asyncio
+
+import pytest
+
+from app.engine.context import CrawlContext
+from app.engine.frontier import Frontier, WorkItem, _Policy
+
+
+def _item(name, terminal=False):
+    return WorkItem(name, CrawlContext(), terminal=terminal)
+
+
+async def _order(policy, items):
+    frontier = Frontier(policy, max_size=0, workers=1)
+    for item in items:
+        await frontier.put(item)
+    popped = []
+    while len(frontier):
+        popped.append((await frontier.get()).node_id)
+    return popped
+
+
+def _items():
+    return [_item("a"), _item("b", terminal=True), _item("c")]
+
+
+def test_policy_order():
+    assert asyncio.run(_order("bfs", _items())) == ["a", "b", "c"]
+    assert asyncio.run(_order("dfs", _items())) == ["c", "b", "a"]
+    assert asyncio.run(_order("terminal_first", _items())) == ["b", "a", "c"]
+
+
+def test_policy_base_is_abstract():
+    with pytest.raises(TypeError):
+        _Policy()
+
+
+def test_unknown_policy_rejected():
+    with pytest.raises(ValueError):
+        Frontier("random", 0, 1)
+
+
+def test_full_frontier_blocks_producer_until_consumed():
+    async def scenario():
+        frontier = Frontier("bfs", max_size=1, workers=2)
+        await frontier.put(_item("a"))
+        blocked = asyncio.ensure_future(frontier.put(_item("b")))
+        await asyncio.sleep(0)
+        assert not blocked.done() and len(frontier) == 1
+
+        assert (await frontier.get()).node_id == "a"
+        await asyncio.wait_for(blocked, 1)
+        assert len(frontier) == 1
+
+    asyncio.run(scenario())
+
+
+def test_last_unblocked_worker_may_exceed_cap():
+    """其余工作协程都阻塞在 put 上时，最后一个不再等待，避免死锁"""
+    async def scenario():
+        frontier = Frontier("bfs", max_size=1, workers=2)
+        await frontier.put(_item("a"))
+        blocked = asyncio.ensure_future(frontier.put(_item("b")))
+        await asyncio.sleep(0)
+        await asyncio.wait_for(frontier.put(_item("c")), 1)
+        assert len(frontier) == 2 and frontier.peak == 2
+        assert not blocked.done()
+        await frontier.close()
+        await asyncio.wait_for(blocked, 1)
+
+    asyncio.run(scenario())
+
+
+def test_close_moves_pending_items_to_leftover():
+    async def scenario():
+        frontier = Frontier("dfs", max_size=0, workers=1)
+        await frontier.put(_item("a"))
+        await frontier.close()
+        await frontier.put(_item("b"))
+        assert await frontier.get() is None
+        assert sorted(i.node_id for i in frontier.leftover) == ["a", "b"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,93 @@
+"""工作流图编译与校验"""
+
+import asyncio
+
+from app.engine.graph import bump_graph_version, compile_graph, invalidate_graph, load_graph
+from app.engine.context import CrawlContext
+from app.engine.nodes.start import StartNode
+
+
+def _node(node_id, node_type, callback=None, **extra):
+    return {"_id": node_id, "name": node_id, "node_type": node_type, "callback_node_id": callback, **extra}
+
+
+def _stream_list(node_id="list", callback="detail"):
+    return _node(node_id, "list", callback, parse_rules={
+        "item_selector": "$.data[*]", "item_selector_type": "jsonpath", "stream_items": True,
+    })
+
+
+def test_stream_list_with_next_node_is_rejected():
+    nodes = [
+        _node("start", "start", "list"),
+        _stream_list(),
+        _node("detail", "detail"),
+        _node("next", "next", "list"),
+    ]
+    errors = compile_graph("p", 1, nodes).errors
+    assert any("流式解析" in e for e in errors)
+
+
+def test_stream_list_without_next_node_is_valid():
+    nodes = [_node("start", "start", "list"), _stream_list(), _node("detail", "detail")]
+    assert compile_graph("p", 1, nodes).errors == []
+
+
+def test_stream_children_do_not_inherit_start_request():
+    start = StartNode(_node("start", "start", "list", request_config={
+        "url": "https://example.com/api", "method": "POST", "body": "{}",
+        "content_type": "application/json", "headers": {"X-Token": "t"},
+    }))
+    request = start.prepare(CrawlContext())
+    assert (request.method, request.body) == ("POST", "{}")
+    assert request.headers["Content-Type"] == "application/json"
+
+    child = start.callback_context(CrawlContext())
+    assert (child.method, child.body) == ("GET", None)
+    assert "Content-Type" not in child.headers
+    assert child.headers.get("X-Token") == "t"
+
+
+def test_callback_cycle_is_reported():
+    nodes = [
+        _node("start", "start", "a"),
+        _node("a", "intermediate", "b"),
+        _node("b", "intermediate", "a"),
+    ]
+    errors = compile_graph("p", 1, nodes).errors
+    assert [e for e in errors if "循环" in e] == ["节点回调存在循环: a → b → a"]
+
+
+def test_next_page_loop_is_not_a_cycle():
+    nodes = [
+        _node("start", "start", "list"),
+        _node("list", "list", "detail"),
+        _node("detail", "detail"),
+        _node("next", "next", "list"),
+    ]
+    graph = compile_graph("p", 1, nodes)
+    assert graph.errors == []
+    assert graph.next_for_list["list"]["_id"] == "next"
+
+
+def test_dangling_callback_and_missing_start():
+    errors = compile_graph("p", 1, [_node("a", "intermediate", "missing")]).errors
+    assert "缺少起始页节点" in errors
+    assert any("missing" in e for e in errors)
+
+
+def test_load_graph_reuses_cache_until_version_bump(mock_db):
+    async def scenario():
+        await mock_db.projects.insert_one({"_id": "p", "graph_version": 0})
+        await mock_db.nodes.insert_one({**_node("start", "start"), "project_id": "p"})
+        first = await load_graph("p")
+        assert await load_graph("p") is first
+
+        await mock_db.nodes.insert_one({**_node("detail", "detail"), "project_id": "p"})
+        assert await load_graph("p") is first  # 未递增版本：仍使用缓存
+        await bump_graph_version("p")
+        second = await load_graph("p")
+        assert second is not first and set(second.nodes) == {"start", "detail"}
+        invalidate_graph("p")
+
+    asyncio.run(scenario())
@@ -0,0 +1,131 @@
+"""响应体读取：大小上限、Content-Type 白名单；请求合并"""
+
+import asyncio
+import gzip
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.config import ALLOWED_CONTENT_TYPES
+from app.utils import http_client
+from app.utils.http_client import (
+    ContentTypeNotAllowed, ResponseTooLarge, _read_limited, content_type_allowed,
+    bind_request_budget, bind_request_gate, fetch,
+)
+
+_REQUEST = httpx.Request("GET", "https://example.com/data")
+
+
+def _streamed(body: bytes, **headers) -> httpx.Response:
+    return httpx.Response(200, headers=headers, stream=httpx.ByteStream(body), request=_REQUEST)
+
+
+def test_reads_decoded_body_into_new_response():
+    body = "callback({\"ok\": true, \"text\": \"中文\"})".encode("utf-8")
+    streamed = _streamed(
+        gzip.compress(body),
+        **{"content-type": "application/x-javascript; charset=utf-8", "content-encoding": "gzip"},
+    )
+    response = asyncio.run(_read_limited(streamed, 0, ALLOWED_CONTENT_TYPES))
+    assert response.content == body
+    assert response.text == body.decode("utf-8")
+    assert response.url == _REQUEST.url
+    assert "content-encoding" not in response.headers
+
+
+def test_rejects_body_over_limit():
+    with pytest.raises(ResponseTooLarge):
+        asyncio.run(_read_limited(_streamed(b"x" * 100, **{"content-type": "text/html"}), 10, ["text/"]))
+
+
+def test_rejects_content_type_outside_allow_list():
+    with pytest.raises(ContentTypeNotAllowed):
+        asyncio.run(_read_limited(_streamed(b"..", **{"content-type": "image/png"}), 0, ALLOWED_CONTENT_TYPES))
+
+
+def test_default_allow_list_covers_legacy_javascript():
+    for mime in ("application/javascript", "application/x-javascript", "text/javascript", "application/ld+json"):
+        assert content_type_allowed(mime, ALLOWED_CONTENT_TYPES)
+
+
+class _Gate:
+    """记录经过闸门的主机"""
+
+    def __init__(self):
+        self.hosts = []
+
+    @asynccontextmanager
+    async def slot(self, host):
+        self.hosts.append(host)
+        yield SimpleNamespace(status=None)
+
+
+class _Budget:
+    def __init__(self):
+        self.requests = 0
+
+    def charge_request(self, nbytes):
+        self.requests += 1
+
+
+@pytest.fixture
+def slow_site():
+    """请求在 release 事件触发前一直挂起的 mock 站点"""
+    site = SimpleNamespace(hits=0, release=None)
+
+    async def handler(request):
+        site.hits += 1
+        await site.release.wait()
+        return httpx.Response(200, headers={"content-type": "text/html"}, text="ok")
+
+    saved = http_client._client
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    yield site
+    http_client._client = saved
+
+
+def _task_fetch(gate, budget, url="https://example.com/shared"):
+    async def run():
+        with bind_request_gate(gate), bind_request_budget(budget):
+            return await fetch(url)
+    return asyncio.ensure_future(run())
+
+
+def test_identical_fetches_within_a_task_share_one_request(slow_site):
+    async def scenario():
+        slow_site.release = asyncio.Event()
+        gate, budget = _Gate(), _Budget()
+        first, second = _task_fetch(gate, budget), _task_fetch(gate, budget)
+        await asyncio.sleep(0.01)
+        slow_site.release.set()
+        responses = await asyncio.gather(first, second)
+        assert responses[0] is responses[1]
+        assert slow_site.hits == 1
+        assert gate.hosts == ["example.com"] and budget.requests == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_one_task_does_not_affect_another_tasks_fetch(slow_site):
+    async def scenario():
+        slow_site.release = asyncio.Event()
+        gate_a, gate_b, budget_a, budget_b = _Gate(), _Gate(), _Budget(), _Budget()
+        task_a = _task_fetch(gate_a, budget_a)
+        await asyncio.sleep(0.01)
+        task_b = _task_fetch(gate_b, budget_b)
+        await asyncio.sleep(0.01)
+        # 不同任务的请求不共享：B 的请求经过自己的闸门并计入自己的预算
+        assert gate_b.hosts == ["example.com"]
+
+        task_a.cancel()
+        await asyncio.sleep(0.01)
+        slow_site.release.set()
+        response = await asyncio.wait_for(task_b, 1)
+        assert response.text == "ok"
+        assert task_a.cancelled()
+        assert budget_a.requests == 1 and budget_b.requests == 1
+        assert not http_client._inflight
+
+    asyncio.run(scenario())
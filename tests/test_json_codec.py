@@ -0,0 +1,34 @@
+"""JSON 编解码：内容哈希与后端无关"""
+
+import json
+from datetime import datetime, timezone
+
+from app.engine.context import make_data_url
+from app.engine.nodes.detail import content_digest
+from app.utils import json_codec
+
+
+def _stdlib_canonical(obj) -> bytes:
+    return json.dumps(
+        obj, default=json_codec._default, ensure_ascii=False, separators=(",", ":"), sort_keys=True,
+    ).encode("utf-8")
+
+
+def test_canonical_bytes_uses_stdlib_format():
+    item = {"b": 1e16, "a": datetime(2026, 1, 1), "c": "中文"}
+    assert json_codec.canonical_bytes(item) == _stdlib_canonical(item)
+    assert json_codec.canonical_bytes(item) == (
+        '{"a":"2026-01-01T00:00:00+00:00","b":1e+16,"c":"中文"}'.encode("utf-8")
+    )
+
+
+def test_hashes_ignore_key_order():
+    assert make_data_url({"a": 1, "b": [1.5, None]}) == make_data_url({"b": [1.5, None], "a": 1})
+    assert content_digest({"x": 1, "y": "2"}) == content_digest({"y": "2", "x": 1})
+
+
+def test_naive_datetime_serialized_as_utc():
+    naive = datetime(2026, 1, 1, 8, 30)
+    aware = naive.replace(tzinfo=timezone.utc)
+    assert json_codec.dumps({"t": naive}) == json_codec.dumps({"t": aware})
+    assert json_codec.loads(json_codec.dumps({"t": naive}))["t"] == "2026-01-01T08:30:00+00:00"
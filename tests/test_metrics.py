@@ -0,0 +1,28 @@
+"""指标标签与序列清理"""
+
+from app.utils import metrics
+
+
+def test_counters_do_not_carry_task_label():
+    counter = metrics.Counter("test_requests_total", "test", ("host",))
+    with metrics.bind_labels(project="p1", task="t1"):
+        counter.inc(host="a")
+    with metrics.bind_labels(project="p1", task="t2"):
+        counter.inc(host="a")
+    assert counter._values == {("p1", "a"): 2}
+
+
+def test_forget_task_removes_only_that_tasks_gauges():
+    gauge = metrics.Gauge("test_queue_depth", "test")
+    counter = metrics.Counter("test_items_total", "test")
+    with metrics.bind_labels(project="p1", task="t1"):
+        gauge.set(3)
+        counter.inc()
+    with metrics.bind_labels(project="p1", task="t2"):
+        gauge.set(5)
+    metrics.forget(task="t1")
+    assert gauge._values == {("p1", "t2"): 5}
+    assert counter._values == {("p1",): 1}
+
+    metrics.forget(project="p1")
+    assert gauge._values == {} and counter._values == {}
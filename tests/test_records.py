@@ -0,0 +1,98 @@
+"""RecordWriter：批量写入与失败计数"""
+
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import BulkWriteError
+
+from app.storage.records import RecordWriter
+
+
+def _collection():
+    return AsyncMongoMockClient()["test"]["data_store"]
+
+
+def test_flushes_by_batch_size_and_on_close():
+    async def scenario():
+        collection = _collection()
+        writer = RecordWriter(collection, batch_size=2, flush_interval=0)
+        for i in range(3):
+            await writer.add({"n": i})
+        assert await collection.count_documents({}) == 2
+        await writer.close()
+        assert await collection.count_documents({}) == 3
+        assert (writer.written, writer.failed) == (3, 0)
+
+    asyncio.run(scenario())
+
+
+def test_pending_matches_buffered_records():
+    async def scenario():
+        writer = RecordWriter(_collection(), batch_size=10, flush_interval=0)
+        await writer.add({"project_id": "p", "data": {"sku": "a"}})
+        assert writer.pending({"project_id": "p", "data.sku": "a"})
+        assert not writer.pending({"project_id": "p", "data.sku": "b"})
+
+    asyncio.run(scenario())
+
+
+class _BlockedInsert:
+    """insert_many 在 release 事件触发前挂起"""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.docs = []
+
+    async def insert_many(self, docs, ordered=True):
+        self.started.set()
+        await self.release.wait()
+        self.docs.extend(docs)
+
+
+def test_pending_sees_batches_being_written():
+    async def scenario():
+        collection = _BlockedInsert()
+        writer = RecordWriter(collection, batch_size=2, flush_interval=0)
+        await writer.add({"project_id": "p", "data": {"sku": "a"}})
+        flush = asyncio.ensure_future(writer.add({"project_id": "p", "data": {"sku": "b"}}))
+        await collection.started.wait()
+        assert not writer._buffer
+        assert writer.pending({"project_id": "p", "data.sku": "a"})
+        assert writer.pending({"project_id": "p", "data.sku": "b"})
+        collection.release.set()
+        await flush
+        assert not writer.pending({"project_id": "p", "data.sku": "a"})
+        assert len(collection.docs) == 2
+
+    asyncio.run(scenario())
+
+
+class _PartialFailure:
+    """insert_many 时第 2 条记录重复键，其余写入成功（ordered=False）"""
+
+    async def insert_many(self, docs, ordered=True):
+        raise BulkWriteError({
+            "nInserted": len(docs) - 1,
+            "writeErrors": [{"index": 1, "code": 11000, "errmsg": "duplicate key"}],
+        })
+
+    async def update_many(self, filter, update):
+        raise ConnectionError("db down")
+
+
+def test_partial_bulk_failure_counts_only_failed_records():
+    async def scenario():
+        writer = RecordWriter(_PartialFailure(), batch_size=10, flush_interval=0)
+        await writer.add({"n": 0})
+        await writer.add({"n": 1, "content_hash": "x"})
+        await writer.add({"n": 2})
+        await writer.touch("some-id")
+        await writer.close()
+        assert writer.written == 2
+        assert writer.failed == 1
+        assert writer.failed_new == 1
+        assert writer.failed_touches == 1
+        assert writer.last_error
+
+    asyncio.run(scenario())
@@ -0,0 +1,141 @@
+"""定时调度：Cron 解析、下一次运行时间、抖动与多进程认领"""
+
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.engine.scheduler import Clock, Scheduler, next_run_time
+from app.utils.cron import CronSpec
+
+T0 = datetime(2026, 3, 2, 10, 7, 30, tzinfo=timezone.utc)  # 周一
+
+
+class FakeClock(Clock):
+    """手动推进的时钟"""
+
+    def __init__(self, now: datetime):
+        self.current = now
+
+    def now(self) -> datetime:
+        return self.current
+
+    def advance(self, **delta):
+        self.current += timedelta(**delta)
+
+    async def sleep(self, seconds: float):
+        self.advance(seconds=seconds)
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("* * * * *", datetime(2026, 3, 2, 10, 8, tzinfo=timezone.utc)),
+    ("*/15 * * * *", datetime(2026, 3, 2, 10, 15, tzinfo=timezone.utc)),
+    ("0 9-17/4 * * *", datetime(2026, 3, 2, 13, 0, tzinfo=timezone.utc)),
+    ("30 2 1 * *", datetime(2026, 4, 1, 2, 30, tzinfo=timezone.utc)),
+    ("0 0 * * 7", datetime(2026, 3, 8, 0, 0, tzinfo=timezone.utc)),  # 周日写作 7
+    ("0 0 * * 0", datetime(2026, 3, 8, 0, 0, tzinfo=timezone.utc)),
+    ("0 0 29 2 *", datetime(2028, 2, 29, 0, 0, tzinfo=timezone.utc)),
+    # 日和周都被限定时满足其一即可：3 月 5 日（周四）早于下一个周日
+    ("0 0 5 * 0", datetime(2026, 3, 5, 0, 0, tzinfo=timezone.utc)),
+])
+def test_cron_next_after(expression, expected):
+    assert CronSpec(expression).next_after(T0) == expected
+
+
+def test_cron_next_after_is_strictly_later():
+    exact = datetime(2026, 3, 2, 10, 15, tzinfo=timezone.utc)
+    assert CronSpec("*/15 * * * *").next_after(exact) == exact + timedelta(minutes=15)
+
+
+@pytest.mark.parametrize("expression", [
+    "* * * *", "60 * * * *", "* 24 * * *", "*/0 * * * *", "5-1 * * * *", "a * * * *",
+])
+def test_cron_rejects_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSpec(expression)
+
+
+def test_cron_without_any_match_raises():
+    with pytest.raises(ValueError):
+        CronSpec("0 0 30 2 *").next_after(T0)
+
+
+def test_next_run_time_applies_bounded_jitter():
+    schedule = {"interval_seconds": 60, "jitter_seconds": 30}
+    rng = random.Random(1)
+    runs = [next_run_time(schedule, T0, rng) for _ in range(50)]
+    assert all(T0 + timedelta(seconds=60) <= r < T0 + timedelta(seconds=90) for r in runs)
+    assert len(set(runs)) > 1
+    assert next_run_time({"cron": "0 * * * *"}, T0) == datetime(2026, 3, 2, 11, 0, tzinfo=timezone.utc)
+
+
+async def _add_project(db, project_id="p", **schedule):
+    await db.projects.insert_one({
+        "_id": project_id,
+        "schedule": {"enabled": True, "interval_seconds": 300, **schedule},
+    })
+
+
+def _scheduler(clock, submitted, active=()):
+    async def submit(project):
+        submitted.append(project["_id"])
+        return f"task-{len(submitted)}"
+    return Scheduler(submit, is_active=lambda pid: pid in active, clock=clock, rng=random.Random(0))
+
+
+def test_tick_submits_when_due_and_not_before(mock_db):
+    async def scenario():
+        await _add_project(mock_db)
+        clock, submitted = FakeClock(T0), []
+        scheduler = _scheduler(clock, submitted)
+
+        assert await scheduler.tick() == []  # 首次只计算 next_run_at
+        state = (await mock_db.projects.find_one({"_id": "p"}))["schedule_state"]
+        assert state["next_run_at"].replace(tzinfo=timezone.utc) == T0 + timedelta(seconds=300)
+
+        clock.advance(seconds=299)
+        assert await scheduler.tick() == []
+        clock.advance(seconds=1)
+        assert await scheduler.tick() == ["task-1"]
+        assert await scheduler.tick() == []  # 下一次运行已推进
+
+        project = await mock_db.projects.find_one({"_id": "p"})
+        assert project["schedule_state"]["last_result"] == "submitted"
+        assert project["schedule_state"]["last_task_id"] == "task-1"
+
+    asyncio.run(scenario())
+
+
+def test_due_run_is_claimed_by_only_one_scheduler(mock_db):
+    async def scenario():
+        await _add_project(mock_db)
+        await mock_db.projects.update_one(
+            {"_id": "p"}, {"$set": {"schedule_state.next_run_at": T0}}
+        )
+        submitted = []
+        first, second = _scheduler(FakeClock(T0), submitted), _scheduler(FakeClock(T0), submitted)
+        # 两个进程读到同一份到期的项目文档后同时尝试认领
+        project = await mock_db.projects.find_one({"_id": "p"})
+        results = [await s._check_project(project, T0) for s in (first, second)]
+        assert results == ["task-1", None]
+        assert submitted == ["p"]
+
+    asyncio.run(scenario())
+
+
+def test_active_project_is_skipped(mock_db):
+    async def scenario():
+        await _add_project(mock_db)
+        await mock_db.projects.update_one(
+            {"_id": "p"}, {"$set": {"schedule_state.next_run_at": T0}}
+        )
+        submitted = []
+        scheduler = _scheduler(FakeClock(T0), submitted, active={"p"})
+        assert await scheduler.tick() == []
+        project = await mock_db.projects.find_one({"_id": "p"})
+        assert submitted == []
+        assert project["schedule_state"]["last_result"] == "skipped"
+        assert project["schedule_state"]["next_run_at"].replace(tzinfo=timezone.utc) > T0
+
+    asyncio.run(scenario())
@@ -0,0 +1,96 @@
+"""SQLite 后端：下推到 SQL 的查询与内存匹配（query.match）结果一致"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from app.storage.query import match
+from app.storage.sqlite import SQLiteDatabase
+
+DOCS = [
+    {"_id": "a", "project_id": "p1", "n": 1, "tags": ["x", "y"], "data": {"sku": "s1"},
+     "at": datetime(2026, 1, 1, tzinfo=timezone.utc)},
+    {"_id": "b", "project_id": "p1", "n": 2, "tags": ["y"], "data": {"sku": "s2"},
+     "at": datetime(2026, 1, 2, tzinfo=timezone.utc)},
+    {"_id": "c", "project_id": "p2", "n": 3, "tags": [], "data": {}},
+    {"_id": "d", "project_id": "p2", "n": 2.5, "status": None, "data": {"sku": "s1"}},
+    {"_id": 7, "project_id": "p3", "n": 7},
+]
+
+QUERIES = [
+    {},
+    {"_id": "a"},
+    {"_id": 7},
+    {"_id": {"$in": ["a", "c", "zzz"]}},
+    {"_id": {"$in": []}},
+    {"project_id": "p1"},
+    {"project_id": "p1", "n": 2},
+    {"project_id": "p2", "data.sku": "s1"},
+    {"tags": "y"},
+    {"tags": {"$in": ["x", "q"]}},
+    {"n": {"$gte": 2, "$lt": 3}},
+    {"n": {"$ne": 2}},
+    {"n": {"$nin": [1, 3]}},
+    {"status": None},
+    {"status": {"$exists": True}},
+    {"data.sku": {"$regex": "^S", "$options": "i"}},
+    {"at": {"$gt": datetime(2026, 1, 1, 12, tzinfo=timezone.utc)}},
+    {"$or": [{"project_id": "p3"}, {"n": 1}]},
+    {"$and": [{"project_id": "p1"}, {"tags": "x"}]},
+    {"$nor": [{"project_id": "p1"}]},
+]
+
+
+@pytest.fixture(scope="module")
+def collection():
+    database = SQLiteDatabase(":memory:")
+    coll = database.items
+
+    async def setup():
+        for field in ("project_id", "n", "tags", "data.sku"):
+            await coll.create_index(field)
+        await coll.insert_many([dict(doc) for doc in DOCS])
+
+    asyncio.run(setup())
+    yield coll
+    database.close()
+
+
+@pytest.mark.parametrize("query", QUERIES, ids=lambda q: repr(q)[:60])
+def test_sqlite_find_matches_in_memory_match(collection, query):
+    expected = sorted(str(doc["_id"]) for doc in DOCS if match(doc, query))
+    found = asyncio.run(collection.find(query).to_list(None))
+    assert sorted(str(doc["_id"]) for doc in found) == expected
+    assert asyncio.run(collection.count_documents(query)) == len(expected)
+
+
+def test_sqlite_update_and_delete_use_same_matching(collection):
+    async def scenario():
+        result = await collection.update_many({"tags": "y"}, {"$set": {"flag": True}})
+        assert result.matched_count == 2
+        assert sorted(d["_id"] for d in await collection.find({"flag": True}).to_list(None)) == ["a", "b"]
+        deleted = await collection.delete_many({"_id": {"$in": ["c", "d"]}, "project_id": "p2"})
+        assert deleted.deleted_count == 2
+
+    asyncio.run(scenario())
+
+
+def test_array_valued_index_detected_after_reopen(tmp_path):
+    path = str(tmp_path / "store.db")
+
+    async def write():
+        database = SQLiteDatabase(path)
+        await database.items.create_index("tags")
+        await database.items.insert_many([{"_id": "a", "tags": ["x", "y"]}, {"_id": "b", "tags": "y"}])
+        database.close()
+
+    async def read():
+        database = SQLiteDatabase(path)
+        try:
+            return sorted(d["_id"] for d in await database.items.find({"tags": "y"}).to_list(None))
+        finally:
+            database.close()
+
+    asyncio.run(write())
+    assert asyncio.run(read()) == ["a", "b"]
@@ -0,0 +1,44 @@
+"""提交运行：重建数据统计期间拒绝新的运行"""
+
+import asyncio
+
+import pytest
+
+from app.api import tasks
+from app.engine import data_stats
+
+
+@pytest.fixture
+def rebuilding():
+    yield data_stats._rebuilding
+    data_stats._rebuilding.pop("p", None)
+
+
+def test_run_is_rejected_while_stats_rebuild(mock_db, rebuilding):
+    async def scenario():
+        await mock_db.projects.insert_one({"_id": "p", "status": "idle"})
+        rebuilding["p"] = None
+        with pytest.raises(tasks.StatsRebuildingError):
+            await tasks.submit_run(await mock_db.projects.find_one({"_id": "p"}))
+        assert await mock_db.tasks.count_documents({}) == 0
+
+    asyncio.run(scenario())
+
+
+def test_rebuild_starting_during_submission_rolls_back(mock_db, rebuilding, monkeypatch):
+    async def validate(self):
+        # 校验期间（提交过程中的 await）重建开始
+        rebuilding["p"] = None
+        return []
+
+    monkeypatch.setattr(tasks.FlowManager, "validate", validate)
+
+    async def scenario():
+        await mock_db.projects.insert_one({"_id": "p", "status": "idle"})
+        with pytest.raises(tasks.StatsRebuildingError):
+            await tasks.submit_run(await mock_db.projects.find_one({"_id": "p"}))
+        assert await mock_db.tasks.count_documents({}) == 0
+        assert (await mock_db.projects.find_one({"_id": "p"}))["status"] == "idle"
+        assert not tasks.task_queue.is_active("p")
+
+    asyncio.run(scenario())
@@ -0,0 +1,36 @@
+"""模板翻页调度"""
+
+from app.engine.context import CrawlContext
+from app.engine.nodes.next_page import NextPageNode, TemplatePager
+
+
+def _next_node(**pagination):
+    return NextPageNode({
+        "_id": "next", "node_type": "next",
+        "pagination": {"mode": "template", "url_template": "https://example.com/?p={page}", **pagination},
+    })
+
+
+def test_issues_pages_until_end():
+    pager = TemplatePager(_next_node(start=2, end=4), CrawlContext(url="https://example.com/"))
+    assert pager.burst is None
+    urls = []
+    while (page := pager.issue()) is not None:
+        urls.append(page.url)
+    assert urls == ["https://example.com/?p=2", "https://example.com/?p=3", "https://example.com/?p=4"]
+
+
+def test_pages_after_an_empty_page_are_skipped():
+    pager = TemplatePager(_next_node(start=2, end=10), CrawlContext(url="https://example.com/"))
+    issued = [pager.issue().page_number for _ in range(5)]  # 第 2..6 页已调度
+    assert issued == [2, 3, 4, 5, 6]
+    pager.stop(3)
+    assert not pager.skips(3)
+    assert pager.skips(4) and pager.skips(6)
+    assert pager.issue() is None
+
+
+def test_detached_pager_fetches_itself_only():
+    pager = TemplatePager.detached(_next_node(start=2, end=10), CrawlContext(url="https://example.com/"))
+    assert not pager.skips(5)  # 恢复的页面本身仍需抓取
+    assert pager.issue() is None